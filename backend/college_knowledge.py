@@ -0,0 +1,170 @@
+"""
+College Knowledge Base
+Sections of the college information file, embedded once and searched per question so the
+homepage chatbot sends only the relevant sections to the model. The file is re-read when it
+changes; unchanged sections keep their cached embeddings.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from file_locks import atomic_pickle_dump
+
+COLLEGE_KNOWLEDGE_PATH = os.getenv("COLLEGE_KNOWLEDGE_PATH", "knowledge/college_info.md")
+COLLEGE_KNOWLEDGE_EMBEDDINGS_PATH = os.getenv(
+    "COLLEGE_KNOWLEDGE_EMBEDDINGS_PATH", "storage/college_knowledge_embeddings.pkl"
+)
+# Sections sent to the model per question (the overview section is always included)
+COLLEGE_KNOWLEDGE_TOP_K = int(os.getenv("COLLEGE_KNOWLEDGE_TOP_K", 3))
+
+WORD_PATTERN = re.compile(r"[a-z0-9&]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "at", "about", "can", "do", "does", "for", "how", "i", "in", "is",
+    "me", "mce", "of", "on", "the", "to", "what", "which", "who", "with", "you", "tell", "college"
+}
+
+
+def parse_sections(text: str) -> List[Dict[str, str]]:
+    """Split the knowledge file into {"title", "body"} sections at "## " headings"""
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.S)
+    sections = []
+    title, body = None, []
+
+    for line in text.splitlines():
+        if line.startswith("## "):
+            if title and "".join(body).strip():
+                sections.append({"title": title, "body": "\n".join(body).strip()})
+            title, body = line[3:].strip(), []
+        elif title is not None:
+            body.append(line)
+
+    if title and "".join(body).strip():
+        sections.append({"title": title, "body": "\n".join(body).strip()})
+    return sections
+
+
+def _words(text: str) -> set:
+    return {word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS}
+
+
+class CollegeKnowledgeBase:
+    def __init__(self, embed: Callable[[List[str]], np.ndarray], path: str = COLLEGE_KNOWLEDGE_PATH,
+                 embeddings_path: str = COLLEGE_KNOWLEDGE_EMBEDDINGS_PATH):
+        """embed maps a list of texts to an array of embedding vectors"""
+        self.embed = embed
+        self.path = Path(path)
+        self.embeddings_path = Path(embeddings_path)
+        self._lock = threading.Lock()
+        
+        # Current snapshot, replaced as a whole on reload
+        self.sections: List[Dict[str, str]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._version = None
+
+    @staticmethod
+    def _section_key(section: Dict[str, str]) -> str:
+        return hashlib.sha256(f"{section['title']}\n{section['body']}".encode("utf-8")).hexdigest()
+
+    def _file_version(self):
+        stat = self.path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self, embed_missing: bool = True) -> Dict[str, int]:
+        """(Re)load the knowledge file and embed sections not seen before.
+        
+        With embed_missing False no embeddings call is made; if a section has no cached vector
+        the knowledge base is searched by keywords until it is loaded again with embeddings.
+        """
+        with self._lock:
+            version = self._file_version()
+            sections = parse_sections(self.path.read_text(encoding="utf-8"))
+            
+            cached = {}
+            if self.embeddings_path.exists():
+                try:
+                    with open(self.embeddings_path, "rb") as f:
+                        cached = pickle.load(f)
+                except Exception as e:
+                    print(f"Error reading college knowledge embeddings: {e}")
+            
+            keys = [self._section_key(section) for section in sections]
+            missing = [index for index, key in enumerate(keys) if key not in cached]
+            vectors = None
+            if missing and not embed_missing:
+                self.sections, self._vectors, self._version = sections, None, version
+                return {"sections": len(sections), "embedded": 0, "pending": len(missing)}
+            
+            try:
+                if missing:
+                    texts = [f"{sections[i]['title']}\n{sections[i]['body']}" for i in missing]
+                    for index, vector in zip(missing, self.embed(texts)):
+                        cached[keys[index]] = np.asarray(vector, dtype="float32")
+                    self.embeddings_path.parent.mkdir(parents=True, exist_ok=True)
+                    # Keep only the vectors of current sections
+                    atomic_pickle_dump({key: cached[key] for key in keys}, self.embeddings_path)
+                
+                if sections:
+                    vectors = np.vstack([cached[key] for key in keys])
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+            except Exception as e:
+                # Without embeddings the sections are still searchable by keywords
+                print(f"Error embedding college knowledge, using keyword search: {e}")
+                vectors = None
+            
+            self.sections, self._vectors, self._version = sections, vectors, version
+            embedded = vectors is not None
+            return {
+                "sections": len(sections),
+                "embedded": len(missing) if embedded else 0,
+                "pending": 0 if embedded else len(missing)
+            }
+
+    def reload_if_changed(self):
+        """Reload when the knowledge file was edited since it was loaded"""
+        try:
+            if self._file_version() != self._version:
+                self.load()
+        except FileNotFoundError:
+            print(f"College knowledge file not found: {self.path}")
+
+    def search(self, query: str, top_k: int = COLLEGE_KNOWLEDGE_TOP_K) -> List[Dict[str, str]]:
+        """Sections most relevant to query, overview first, in document order"""
+        self.reload_if_changed()
+        sections, vectors = self.sections, self._vectors
+        if not sections:
+            return []
+        
+        scores = None
+        if vectors is not None:
+            try:
+                query_vector = np.asarray(self.embed([query])[0], dtype="float32")
+                query_vector /= np.linalg.norm(query_vector) + 1e-12
+                scores = vectors @ query_vector
+            except Exception as e:
+                print(f"Error embedding college chat query, using keyword search: {e}")
+        
+        if scores is None:
+            query_words = _words(query)
+            scores = np.array([
+                len(query_words & _words(section["title"])) * 2 + len(query_words & _words(section["body"]))
+                for section in sections
+            ], dtype="float32")
+        
+        ranked = [int(index) for index in np.argsort(-scores, kind="stable")[:top_k]]
+        selected = sorted(set(ranked) | {0})
+        return [sections[index] for index in selected]
+
+    def metrics(self) -> Dict[str, object]:
+        """Size and search mode of the loaded knowledge base"""
+        return {
+            "path": str(self.path),
+            "sections": len(self.sections),
+            "mode": "embeddings" if self._vectors is not None else "keywords"
+        }
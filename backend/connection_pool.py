@@ -0,0 +1,197 @@
+"""
+Database Connection Pool
+Bounded, thread-safe pool of database connections with health checks and usage metrics
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+class PooledConnection:
+    """Proxy around a pooled connection - close() returns it to the pool instead of closing it"""
+
+    def __init__(self, pool: "ConnectionPool", connection: Any):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise AttributeError(f"Connection already returned to pool (accessing '{name}')")
+        return getattr(self._connection, name)
+
+    def close(self):
+        """Return the underlying connection to the pool"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def discard(self):
+        """Close the underlying connection for good (e.g. after a fatal error)"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection, discard=True)
+
+
+class ConnectionPool:
+    def __init__(self, connect: Callable[[], Any], size: int = 5, acquire_timeout: float = 10.0,
+                 health_check: Optional[Callable[[Any], bool]] = None,
+                 health_check_interval: float = 30.0, name: str = "pool"):
+        """Create a pool that opens at most `size` connections using `connect`
+
+        Connections idle for longer than `health_check_interval` seconds are checked
+        with `health_check` before being handed out and replaced if they are dead.
+        """
+        self.name = name
+        self.size = max(1, size)
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect
+        self._health_check = health_check
+        self._health_check_interval = health_check_interval
+
+        self._condition = threading.Condition()
+        self._idle: List[tuple] = []  # (connection, returned_at)
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Metrics
+        self._acquired_total = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._health_check_failures = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a connection, waiting up to `timeout` seconds for one to be free"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._condition:
+            if self._closed:
+                raise PoolTimeoutError(f"Connection pool '{self.name}' is closed")
+
+            self._waiting += 1
+            try:
+                while not self._idle and self._created >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:.1f}s waiting for a connection from pool '{self.name}'"
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            if self._idle:
+                connection, returned_at = self._idle.pop()
+            else:
+                connection, returned_at = None, None
+                self._created += 1
+            self._in_use += 1
+
+            waited = time.monotonic() - started
+            self._acquired_total += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+
+        # Connect and health-check outside the lock so other callers are not blocked
+        try:
+            if connection is not None and self._needs_health_check(returned_at):
+                if not self._is_healthy(connection):
+                    self._health_check_failures += 1
+                    self._close_quietly(connection)
+                    connection = None
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        return PooledConnection(self, connection)
+
+    def release(self, connection: Any, discard: bool = False):
+        """Return a connection to the pool, discarding it if it can't be reset"""
+        if not discard:
+            try:
+                # End any open transaction so the next user starts with a fresh snapshot
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._created -= 1
+                self._close_quietly(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager that checks a connection out and always returns it"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            pooled.close()
+
+    def close_all(self):
+        """Close idle connections and stop handing out new ones"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current pool usage and cumulative wait statistics"""
+        with self._condition:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "open_connections": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "acquired_total": self._acquired_total,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 2),
+                "wait_time_avg_ms": round(self._wait_time_total * 1000 / self._acquired_total, 2) if self._acquired_total else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 2),
+                "timeouts": self._timeouts,
+                "health_check_failures": self._health_check_failures
+            }
+
+    def _needs_health_check(self, returned_at: Optional[float]) -> bool:
+        return (
+            self._health_check is not None
+            and returned_at is not None
+            and time.monotonic() - returned_at >= self._health_check_interval
+        )
+
+    def _is_healthy(self, connection: Any) -> bool:
+        try:
+            return bool(self._health_check(connection))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection: Any):
+        try:
+            connection.close()
+        except Exception:
+            pass
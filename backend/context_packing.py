@@ -0,0 +1,185 @@
+"""
+Context Packing
+Fits retrieved chunks into a fixed token budget: best-ranked chunks first, near-duplicates
+dropped, the splitter's repeated overlaps cut, and the last chunk trimmed at a sentence
+boundary, so prompt size (and latency and cost) stays predictable
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+# Tokens of retrieved context per chat prompt, and the smallest trimmed piece worth sending
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+CONTEXT_MIN_CHUNK_TOKENS = int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", 40))
+
+# Share of a chunk's word shingles already in the context for it to count as a duplicate
+DUPLICATE_SHINGLE_RATIO = 0.8
+SHINGLE_WORDS = 5
+# Shortest shared prefix/suffix treated as a splitter overlap rather than coincidence
+MIN_OVERLAP_CHARS = 30
+MAX_OVERLAP_CHARS = 400
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+# Sentence ends or line breaks (list items), for picking passages out of a chunk
+PASSAGE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_encoding = None
+
+
+def _get_encoding():
+    """tiktoken encoder when installed, otherwise None (a character estimate is used)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text for the chat models (estimated without tiktoken)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # ~4 characters per token for English, never fewer tokens than words
+    return max(math.ceil(len(text) / 4), len(text.split()))
+
+
+def trim_to_sentences(text: str, max_tokens: int) -> str:
+    """Longest run of whole sentences from the start of text that fits in max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    kept = []
+    used = 0
+    for sentence in SENTENCE_END.split(text):
+        tokens = count_tokens(sentence)
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    if kept:
+        return " ".join(kept)
+
+    # A single sentence longer than the budget: cut at a word boundary
+    words = text.split()
+    trimmed = []
+    for word in words:
+        if count_tokens(" ".join(trimmed + [word])) > max_tokens:
+            break
+        trimmed.append(word)
+    return " ".join(trimmed)
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _strip_overlap(text: str, selected_texts: List[str]) -> str:
+    """Remove a prefix (or suffix) of text that repeats the end (or start) of a selected chunk"""
+    for other in selected_texts:
+        limit = min(len(text), len(other), MAX_OVERLAP_CHARS)
+        for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+            if other.endswith(text[:size]):
+                text = text[size:].lstrip()
+                break
+            if other.startswith(text[-size:]):
+                text = text[:-size].rstrip()
+                break
+    return text
+
+
+def pack_context(chunks: List[Dict[str, Any]], text_key: str = "text", budget: int = CONTEXT_TOKEN_BUDGET,
+                 overhead_tokens: int = 0) -> List[Dict[str, Any]]:
+    """Select chunks (ranked best first) whose text fits in budget tokens.
+
+    Returns copies of the selected chunks with text_key replaced by the packed text and a
+    "tokens" count. overhead_tokens is charged per chunk for labels and separators.
+    """
+    packed = []
+    seen_shingles = set()
+    selected_by_document: Dict[Optional[str], List[str]] = {}
+    remaining = budget
+
+    for chunk in chunks:
+        text = (chunk.get(text_key) or "").strip()
+        if not text or remaining - overhead_tokens < CONTEXT_MIN_CHUNK_TOKENS:
+            continue
+        
+        # Adjacent chunks of one document share the splitter's overlap
+        document_key = chunk.get("document_id")
+        text = _strip_overlap(text, selected_by_document.get(document_key, []))
+        
+        shingles = _shingles(text)
+        if not shingles or len(shingles & seen_shingles) >= DUPLICATE_SHINGLE_RATIO * len(shingles):
+            continue
+        
+        tokens = count_tokens(text)
+        if tokens + overhead_tokens > remaining:
+            text = trim_to_sentences(text, remaining - overhead_tokens)
+            tokens = count_tokens(text)
+            if tokens < CONTEXT_MIN_CHUNK_TOKENS:
+                continue
+        
+        packed_chunk = dict(chunk)
+        packed_chunk[text_key] = text
+        packed_chunk["tokens"] = tokens
+        packed.append(packed_chunk)
+        
+        seen_shingles |= shingles
+        selected_by_document.setdefault(document_key, []).append(text)
+        remaining -= tokens + overhead_tokens
+
+    return packed
+
+
+def usage_from_response(response) -> Dict[str, int]:
+    """Prompt/completion token counts reported by an OpenAI chat completion"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens
+    }
+
+
+def extractive_answer(query: str, chunks: List[Dict[str, Any]], text_key: str = "text",
+                      title_key: str = "title", max_sentences: int = 4) -> str:
+    """Answer without the LLM: the sentences of chunks sharing the most words with query.
+
+    Used while the upstream model is unavailable; sentences keep their chunk order and are
+    labelled with their source.
+    """
+    query_words = {word for word in re.findall(r"\w+", query.lower()) if len(word) > 2}
+    scored = []
+    for chunk_index, chunk in enumerate(chunks):
+        for sentence_index, sentence in enumerate(PASSAGE_BREAK.split(chunk.get(text_key) or "")):
+            sentence = " ".join(sentence.strip(" -*•\t").split())
+            if len(sentence) < 20:
+                continue
+            overlap = len(query_words & set(re.findall(r"\w+", sentence.lower())))
+            # Ties go to better-ranked chunks and earlier sentences
+            scored.append((-overlap, chunk_index, sentence_index, sentence, chunk.get(title_key)))
+
+    if any(item[0] < 0 for item in scored):
+        # Passages sharing no word with the question only pad the answer
+        scored = [item for item in scored if item[0] < 0]
+    best = sorted(scored)[:max_sentences]
+    best.sort(key=lambda item: (item[1], item[2]))
+
+    lines = []
+    for _, _, _, sentence, title in best:
+        lines.append(f"• {sentence}" + (f" [{title}]" if title else ""))
+    return "\n".join(lines)
@@ -0,0 +1,115 @@
+"""
+Embedding Batcher
+Collects query embeddings requested by concurrent chat requests within a few milliseconds
+and sends them as one batched embeddings call, fanning the vectors back out to the callers
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Most queries in one embeddings call, and the longest a query waits for others to join it
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 64))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", 5))
+
+
+class _PendingQuery:
+    __slots__ = ("text", "queued_at", "done", "vector", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.vector: Optional[np.ndarray] = None
+        self.error: Optional[Exception] = None
+
+
+class EmbeddingBatcher:
+    def __init__(self, embed: Callable[[List[str]], np.ndarray], max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_MAX_WAIT_MS):
+        """embed maps a list of texts to an array of embedding vectors (blocking)"""
+        self.embed_batch = embed
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._cond = threading.Condition()
+        self._queue: List[_PendingQuery] = []
+        self._worker: Optional[threading.Thread] = None
+        
+        self.queries = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self.max_batch = 0
+        self.total_wait = 0.0
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embedding vector of text, computed in a batch with concurrent queries (blocking)"""
+        pending = _PendingQuery(text)
+        with self._cond:
+            self._queue.append(pending)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.vector
+
+    def _next_batch(self) -> List[_PendingQuery]:
+        """Wait for queries, then until the batch is full or the oldest query's wait is up"""
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].queued_at + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:self.max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.monotonic()
+            
+            # The same question asked by several users is embedded once
+            texts = list(dict.fromkeys(pending.text for pending in batch))
+            try:
+                vectors = np.asarray(self.embed_batch(texts), dtype="float32")
+                by_text: Dict[str, np.ndarray] = dict(zip(texts, vectors))
+                for pending in batch:
+                    pending.vector = by_text[pending.text]
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            
+            with self._cond:
+                self.queries += len(batch)
+                self.batches += 1
+                self.deduplicated += len(batch) - len(texts)
+                self.max_batch = max(self.max_batch, len(batch))
+                self.total_wait += sum(started - pending.queued_at for pending in batch)
+            for pending in batch:
+                pending.done.set()
+
+    def metrics(self) -> Dict[str, float]:
+        """Batch sizes and the time queries waited to be batched"""
+        with self._cond:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queries": self.queries,
+                "batches": self.batches,
+                "deduplicated": self.deduplicated,
+                "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.max_batch,
+                "queue_depth": len(self._queue),
+                "avg_wait_ms": round(self.total_wait / self.queries * 1000, 2) if self.queries else 0.0
+            }
@@ -0,0 +1,370 @@
+"""
+Event Storage Backends
+SQL dialect, connection and schema handling for the events table on MySQL or a local SQLite file
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+# Event scopes stored in the events table
+COLLEGE_SCOPE = 'college'
+DEPARTMENT_SCOPE = 'department'
+
+# Columns returned for events (migration bookkeeping columns are left out)
+EVENT_COLUMNS = '''
+    id, scope, department, document_id, document_title, event_date, event_time, location,
+    related_information, document_path, created_at, updated_at
+'''
+
+# Storage backend selection: "mysql" (default) or "sqlite" for local runs without a MySQL server
+EVENT_DB_BACKEND = os.getenv('EVENT_DB_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'storage/events.sqlite3')
+MYSQL_CONNECT_TIMEOUT = int(os.getenv('MYSQL_CONNECT_TIMEOUT', 5))
+
+def department_key(department: str) -> str:
+    """Normalized department name used for lookups (same rule as the old per-department table names)"""
+    return department.replace(" ", "_").replace("-", "_").lower()
+
+class MySQLBackend:
+    name = 'mysql'
+
+    def __init__(self):
+        """MySQL connection settings - mysql.connector is only imported when this backend is used"""
+        import mysql.connector
+
+        self._connector = mysql.connector
+        self.Error = mysql.connector.Error
+        self.connection_config = {
+            'host': os.getenv('MYSQL_HOST', 'localhost'),
+            'port': int(os.getenv('MYSQL_PORT', 3306)),
+            'user': os.getenv('MYSQL_USER', 'root'),
+            'password': os.getenv('MYSQL_PASSWORD', ''),
+            'database': os.getenv('MYSQL_DATABASE', 'ai_eventmanager_events'),
+            'charset': 'utf8mb4',
+            'collation': 'utf8mb4_unicode_ci',
+            'connection_timeout': MYSQL_CONNECT_TIMEOUT
+        }
+
+    def connect(self):
+        """Open a new connection to the events database"""
+        return self._connector.connect(**self.connection_config)
+
+    @staticmethod
+    def is_healthy(conn) -> bool:
+        return conn.is_connected()
+
+    @staticmethod
+    def cursor(conn, dictionary: bool = False):
+        return conn.cursor(dictionary=dictionary)
+
+    def init_schema(self):
+        """Create the database, the events table and its indexes, then migrate legacy tables"""
+        # First, connect without specifying database to create it if needed
+        temp_config = self.connection_config.copy()
+        database_name = temp_config.pop('database')
+
+        conn = self._connector.connect(**temp_config)
+        cursor = conn.cursor()
+
+        try:
+            # Create database if it doesn't exist
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            cursor.execute(f"USE {database_name}")
+
+            # Single events table: college-wide events (scope 'college', empty department)
+            # and department events (scope 'department')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS events (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    scope VARCHAR(20) NOT NULL,
+                    department VARCHAR(255) NOT NULL DEFAULT '',
+                    department_key VARCHAR(255) NOT NULL DEFAULT '',
+                    document_id VARCHAR(255) NOT NULL,
+                    document_title VARCHAR(500),
+                    event_date DATE,
+                    related_information TEXT,
+                    event_time TIME NULL,
+                    location VARCHAR(500) NULL,
+                    document_path VARCHAR(1000) NULL,
+                    legacy_table VARCHAR(255) NULL,
+                    legacy_id INT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_document_id (document_id),
+                    INDEX idx_event_date (event_date, event_time),
+                    INDEX idx_scope_department_date (scope, department_key, event_date, event_time),
+                    INDEX idx_scope_department_date_id (scope, department_key, event_date, id),
+                    FULLTEXT INDEX ft_event_text (document_title, related_information, location),
+                    UNIQUE KEY uq_legacy_row (legacy_table, legacy_id)
+                ) ENGINE=InnoDB
+            ''')
+
+            # Indexes added after the table was first created
+            self._ensure_index(cursor, 'idx_scope_department_date_id',
+                               'INDEX idx_scope_department_date_id (scope, department_key, event_date, id)')
+            self._ensure_index(cursor, 'ft_event_text',
+                               'FULLTEXT INDEX ft_event_text (document_title, related_information, location)')
+
+            conn.commit()
+
+            # Copy rows from admin_events and the old <dept>_events tables (safe to repeat)
+            self._migrate_legacy_tables(conn)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _ensure_index(cursor, index_name: str, definition: str):
+        """Add an index to the events table if an older schema is missing it"""
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'events' AND index_name = %s
+        ''', (index_name,))
+        if cursor.fetchone()[0] == 0:
+            print(f"Adding index {index_name} to events table")
+            cursor.execute(f"ALTER TABLE events ADD {definition}")
+
+    def _migrate_legacy_tables(self, conn) -> int:
+        """Copy events from admin_events and the per-department <dept>_events tables into events.
+
+        Each legacy table is migrated once (recorded in event_migrations) so events deleted
+        later are not copied back on the next startup.
+        """
+        cursor = conn.cursor()
+        migrated = 0
+
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS event_migrations (
+                    legacy_table VARCHAR(255) PRIMARY KEY,
+                    migrated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB
+            ''')
+            cursor.execute("SELECT legacy_table FROM event_migrations")
+            done_tables = {row[0] for row in cursor.fetchall()}
+
+            cursor.execute("SHOW TABLES LIKE '%\\_events'")
+            legacy_tables = [row[0] for row in cursor.fetchall() if row[0] not in done_tables]
+
+            for table_name in legacy_tables:
+                if table_name == 'admin_events':
+                    scope, department, key = COLLEGE_SCOPE, '', ''
+                else:
+                    # Keep the name the department's events are already stored under, so its
+                    # migrated and new events are listed as one department
+                    key = table_name[:-len('_events')]
+                    cursor.execute('''
+                        SELECT department FROM events
+                        WHERE scope = %s AND department_key = %s AND legacy_table IS NULL
+                        LIMIT 1
+                    ''', (DEPARTMENT_SCOPE, key))
+                    rows = cursor.fetchall()
+                    scope, department = DEPARTMENT_SCOPE, rows[0][0] if rows else key.replace('_', ' ').title()
+
+                cursor.execute(f'''
+                    INSERT IGNORE INTO events (
+                        scope, department, department_key, document_id, document_title, event_date,
+                        related_information, event_time, location, document_path,
+                        legacy_table, legacy_id, created_at, updated_at
+                    )
+                    SELECT %s, %s, %s, document_id, document_title, event_date,
+                           related_information, event_time, location, document_path,
+                           %s, id, created_at, updated_at
+                    FROM `{table_name}`
+                ''', (scope, department, key, table_name))
+                migrated += cursor.rowcount
+                cursor.execute("INSERT INTO event_migrations (legacy_table) VALUES (%s)", (table_name,))
+
+            conn.commit()
+            if migrated:
+                print(f"Migrated {migrated} events from {len(legacy_tables)} legacy tables")
+            return migrated
+
+        except self.Error as e:
+            conn.rollback()
+            print(f"Error migrating legacy event tables: {e}")
+            return 0
+
+    @staticmethod
+    def first_inserted_id(cursor, row_count: int) -> int:
+        """A multi-row insert reports the id of its first row; the rest are consecutive"""
+        return cursor.lastrowid
+
+    @staticmethod
+    def search_query(query: str, conditions: List[str]) -> Tuple[str, List[Any]]:
+        """Ranked full-text search SQL over ft_event_text; returns (sql, leading params)"""
+        match = "MATCH(document_title, related_information, location) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        sql = f'''
+            SELECT {EVENT_COLUMNS}, {match} AS relevance
+            FROM events
+            WHERE {" AND ".join([match] + conditions)}
+            ORDER BY relevance DESC, event_date DESC, id DESC
+            LIMIT %s
+        '''
+        return sql, [query, query]
+
+class SQLiteCursor:
+    """DB-API cursor adapter so EventDatabase's %s-style SQL and dictionary rows work on sqlite3"""
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def execute(self, sql: str, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params))
+        return self
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+class SQLiteBackend:
+    name = 'sqlite'
+    Error = sqlite3.Error
+
+    def __init__(self, path: str = SQLITE_PATH):
+        """Local single-file stand-in for MySQL (benchmarks and runs without a database server)"""
+        self.path = Path(path)
+        self.fulltext = True
+
+    def connect(self):
+        """Open a connection usable from the pool's worker threads"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        # WAL lets readers run concurrently with the single writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def is_healthy(conn) -> bool:
+        conn.execute("SELECT 1")
+        return True
+
+    @staticmethod
+    def cursor(conn, dictionary: bool = False) -> SQLiteCursor:
+        return SQLiteCursor(conn.cursor(), dictionary)
+
+    def init_schema(self):
+        """Create the events table, its indexes and the FTS5 search index"""
+        conn = self.connect()
+
+        try:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    scope TEXT NOT NULL,
+                    department TEXT NOT NULL DEFAULT '',
+                    department_key TEXT NOT NULL DEFAULT '',
+                    document_id TEXT NOT NULL,
+                    document_title TEXT,
+                    event_date TEXT,
+                    related_information TEXT,
+                    event_time TEXT,
+                    location TEXT,
+                    document_path TEXT,
+                    legacy_table TEXT,
+                    legacy_id INTEGER,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_document_id ON events (document_id);
+                CREATE INDEX IF NOT EXISTS idx_event_date ON events (event_date, event_time);
+                CREATE INDEX IF NOT EXISTS idx_scope_department_date ON events (scope, department_key, event_date, event_time);
+                CREATE INDEX IF NOT EXISTS idx_scope_department_date_id ON events (scope, department_key, event_date, id);
+            ''')
+
+            try:
+                # External-content FTS5 index kept in sync with events by triggers
+                conn.executescript('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+                        document_title, related_information, location,
+                        content='events', content_rowid='id'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+                        INSERT INTO events_fts (rowid, document_title, related_information, location)
+                        VALUES (new.id, new.document_title, new.related_information, new.location);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+                        INSERT INTO events_fts (events_fts, rowid, document_title, related_information, location)
+                        VALUES ('delete', old.id, old.document_title, old.related_information, old.location);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE ON events BEGIN
+                        INSERT INTO events_fts (events_fts, rowid, document_title, related_information, location)
+                        VALUES ('delete', old.id, old.document_title, old.related_information, old.location);
+                        INSERT INTO events_fts (rowid, document_title, related_information, location)
+                        VALUES (new.id, new.document_title, new.related_information, new.location);
+                    END;
+                ''')
+            except sqlite3.OperationalError as e:
+                # SQLite builds without FTS5 fall back to LIKE matching
+                print(f"SQLite FTS5 unavailable, event search will use LIKE: {e}")
+                self.fulltext = False
+
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def first_inserted_id(cursor, row_count: int) -> int:
+        """SQLite reports the id of the last row of a multi-row insert"""
+        return cursor.lastrowid - row_count + 1
+
+    def search_query(self, query: str, conditions: List[str]) -> Tuple[str, List[Any]]:
+        """Ranked search SQL over events_fts (bm25); returns (sql, leading params)"""
+        words = [word for word in query.split() if word.strip('"')]
+
+        if not self.fulltext:
+            like = "(document_title LIKE %s OR related_information LIKE %s OR location LIKE %s)"
+            params: List[Any] = []
+            for word in words:
+                params.extend([f"%{word}%"] * 3)
+            sql = f'''
+                SELECT {EVENT_COLUMNS}, 0 AS relevance
+                FROM events
+                WHERE {" AND ".join(["(" + " OR ".join([like] * len(words)) + ")"] + conditions)}
+                ORDER BY event_date DESC, id DESC
+                LIMIT %s
+            '''
+            return sql, params
+
+        # Quote every word so user input can't use FTS5 query syntax; any word may match,
+        # like MySQL's natural language mode
+        fts_query = " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+        sql = f'''
+            SELECT {EVENT_COLUMNS}, matches.relevance AS relevance
+            FROM events
+            JOIN (
+                SELECT rowid AS event_id, -bm25(events_fts) AS relevance
+                FROM events_fts WHERE events_fts MATCH %s
+            ) AS matches ON matches.event_id = events.id
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            ORDER BY relevance DESC, event_date DESC, id DESC
+            LIMIT %s
+        '''
+        return sql, [fts_query]
+
+def create_event_backend(backend: Optional[str] = None):
+    """Instantiate the storage backend selected by EVENT_DB_BACKEND"""
+    backend = (backend or EVENT_DB_BACKEND).lower()
+    if backend == 'sqlite':
+        return SQLiteBackend()
+    if backend == 'mysql':
+        return MySQLBackend()
+    raise ValueError(f"Unknown EVENT_DB_BACKEND '{backend}' (expected 'mysql' or 'sqlite')")
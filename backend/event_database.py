@@ -1,200 +1,288 @@
 """
 Event Database Management System
-Handles storage of extracted event data in role and department-specific tables using MySQL
+Handles storage of extracted event data in a single events table keyed by scope and department
+using MySQL, or a local SQLite file when EVENT_DB_BACKEND=sqlite
 """
 
-import mysql.connector
+import base64
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dotenv import load_dotenv
 
+from connection_pool import ConnectionPool
+
 load_dotenv()
 
+from event_backends import COLLEGE_SCOPE, DEPARTMENT_SCOPE, EVENT_COLUMNS, create_event_backend, department_key
+
+# Connection pool settings (shared by both storage backends)
+MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 5))
+MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', 10))
+MYSQL_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('MYSQL_POOL_HEALTH_CHECK_INTERVAL', 30))
+
 class EventDatabase:
     def __init__(self):
-        """Initialize MySQL connection"""
-        self.connection_config = {
-            'host': os.getenv('MYSQL_HOST', 'localhost'),
-            'port': int(os.getenv('MYSQL_PORT', 3306)),
-            'user': os.getenv('MYSQL_USER', 'root'),
-            'password': os.getenv('MYSQL_PASSWORD', ''),
-            'database': os.getenv('MYSQL_DATABASE', 'ai_eventmanager_events'),
-            'charset': 'utf8mb4',
-            'collation': 'utf8mb4_unicode_ci'
-        }
-        self.init_database()
+        """Initialize the storage backend and connection pool (tables are created by init_database at startup)"""
+        self.backend = create_event_backend()
+        self.available = False
+        self.pool = ConnectionPool(
+            connect=self.backend.connect,
+            size=MYSQL_POOL_SIZE,
+            acquire_timeout=MYSQL_POOL_TIMEOUT,
+            health_check=self.backend.is_healthy,
+            health_check_interval=MYSQL_POOL_HEALTH_CHECK_INTERVAL,
+            name=f'{self.backend.name}_events'
+        )
+        # Callbacks run after events are inserted or deleted (cache invalidation, push notifications)
+        self._change_listeners = []
     
     def get_connection(self):
-        """Get MySQL database connection"""
-        return mysql.connector.connect(**self.connection_config)
+        """Get a pooled database connection - closing it returns it to the pool"""
+        return self.pool.acquire()
     
-    def init_database(self):
-        """Initialize database and required tables"""
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close_all()
+    
+    def add_change_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback receiving a description of every committed event change"""
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, change: Dict[str, Any]):
+        """Run change listeners - a failing listener never fails the write that triggered it"""
+        for listener in self._change_listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                print(f"Error in event change listener: {e}")
+
+    def init_database(self) -> bool:
+        """Initialize database and required tables, returning whether the database is reachable"""
         try:
-            # First, connect without specifying database to create it if needed
-            temp_config = self.connection_config.copy()
-            database_name = temp_config.pop('database')
-            
-            conn = mysql.connector.connect(**temp_config)
-            cursor = conn.cursor()
-            
-            # Create database if it doesn't exist
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
-            cursor.execute(f"USE {database_name}")
-            
-            # Create admin events table (for college-wide events)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admin_events (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    document_id VARCHAR(255) NOT NULL,
-                    document_title VARCHAR(500),
-                    event_date DATE,
-                    related_information TEXT,
-                    event_time TIME NULL,
-                    location VARCHAR(500) NULL,
-                    document_path VARCHAR(1000) NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_document_id (document_id),
-                    INDEX idx_event_date (event_date)
-                ) ENGINE=InnoDB
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
-        except mysql.connector.Error as e:
+            self.backend.init_schema()
+            self.available = True
+        
+        except self.backend.Error as e:
             print(f"Error initializing database: {e}")
+            self.available = False
+        
+        return self.available
     
-    def create_department_table(self, department: str) -> str:
-        """Create a department-specific events table with same structure as admin_events"""
-        # Sanitize department name for table name
-        safe_dept_name = department.replace(" ", "_").replace("-", "_").lower()
-        table_name = f"{safe_dept_name}_events"
+    @staticmethod
+    def _parse_value(value: Any, formats: tuple, kind: str) -> Optional[str]:
+        """value in the first of formats it parses with, or None (stored as NULL) when it is missing
+        or not a real value, e.g. an LLM-extracted "TBD" or "2025-02-30" """
+        if value is None or value == '':
+            return None
+        if hasattr(value, 'strftime'):
+            return value.strftime(formats[0])
+        text = str(value).strip()
+        for fmt in formats:
+            try:
+                return datetime.strptime(text, fmt).strftime(fmt)
+            except ValueError:
+                continue
+        print(f"Ignoring invalid event {kind} {value!r}")
+        return None
+
+    @classmethod
+    def _event_row(cls, scope: str, department: str, event_data: Dict[str, Any]) -> tuple:
+        """Column values for inserting an event (invalid dates and times become NULL)"""
+        return (
+            scope,
+            department or '',
+            department_key(department) if department else '',
+            event_data.get('document_id'),
+            event_data.get('document_title'),
+            cls._parse_value(event_data.get('event_date'), ('%Y-%m-%d',), 'date'),
+            event_data.get('related_information'),
+            cls._parse_value(event_data.get('event_time'), ('%H:%M', '%H:%M:%S'), 'time'),
+            event_data.get('location'),
+            event_data.get('document_path')
+        )
+
+    @staticmethod
+    def _serialize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert datetime objects to strings for JSON serialization (SQLite already returns strings)"""
+        if event.get('event_date') and not isinstance(event['event_date'], str):
+            event['event_date'] = event['event_date'].strftime('%Y-%m-%d')
+        if event.get('event_time'):
+            event['event_time'] = str(event['event_time'])
+        if event.get('created_at') and not isinstance(event['created_at'], str):
+            event['created_at'] = event['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+        if event.get('updated_at') and not isinstance(event['updated_at'], str):
+            event['updated_at'] = event['updated_at'].strftime('%Y-%m-%d %H:%M:%S')
+        return event
+
+    def _store_events_bulk(self, scope: str, department: str, events: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Insert all events in one multi-row INSERT and a single transaction.
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        If the multi-row insert fails, the events are inserted one at a time so one bad row does
+        not lose the others; the ids of rows that still fail are None. Raises when no event could
+        be stored, so callers can tell a failed store from a document without events.
+        """
+        if not events:
+            return []
         
+        conn = None
         try:
-            # Create the department-specific table with same structure as admin_events
-            cursor.execute(f'''
-                CREATE TABLE IF NOT EXISTS {table_name} (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    document_id VARCHAR(255) NOT NULL,
-                    document_title VARCHAR(500),
-                    event_date DATE,
-                    related_information TEXT,
-                    event_time TIME NULL,
-                    location VARCHAR(500) NULL,
-                    document_path VARCHAR(1000) NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_document_id (document_id),
-                    INDEX idx_event_date (event_date)
-                ) ENGINE=InnoDB
-            ''')
-            
-            conn.commit()
-            return table_name
+            conn = self.get_connection()
+            cursor = self.backend.cursor(conn)
+            if scope == DEPARTMENT_SCOPE:
+                department = self._department_name(conn, cursor, department)
+            rows = [self._event_row(scope, department, event_data) for event_data in events]
+            try:
+                row_placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+                cursor.execute(f'''
+                    INSERT INTO events (
+                        scope, department, department_key, document_id, document_title, event_date,
+                        related_information, event_time, location, document_path
+                    ) VALUES {row_placeholders}
+                ''', [value for row in rows for value in row])
+                
+                # Ids of a multi-row insert are consecutive
+                first_id = self.backend.first_inserted_id(cursor, len(rows))
+                conn.commit()
+                event_ids = [first_id + offset for offset in range(len(rows))]
             
-        except mysql.connector.Error as e:
-            print(f"Error creating department table: {e}")
-            return table_name
+            except self.backend.Error as e:
+                conn.rollback()
+                print(f"Error bulk storing {scope} events, storing them one at a time: {e}")
+                event_ids = self._store_events_individually(conn, cursor, rows)
         finally:
-            conn.close()
-    
-    def store_admin_event(self, event_data: Dict[str, Any]) -> int:
-        """Store event in admin table"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+            if conn is not None:
+                conn.close()
         
-        try:
-            cursor.execute('''
-                INSERT INTO admin_events (
-                    document_id, document_title, event_date, related_information, event_time, location, document_path
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                event_data.get('document_id'),
-                event_data.get('document_title'),
-                event_data.get('event_date'),
-                event_data.get('related_information'),
-                event_data.get('event_time'),
-                event_data.get('location'),
-                event_data.get('document_path')
-            ))
-            
-            event_id = cursor.lastrowid
+        stored = [(event_id, event) for event_id, event in zip(event_ids, events) if event_id is not None]
+        self._notify_change({
+            'action': 'insert',
+            'scope': scope,
+            'department': department or None,
+            'event_ids': [event_id for event_id, _ in stored],
+            'event_dates': sorted({str(event.get('event_date')) for _, event in stored if event.get('event_date')})
+        })
+        return event_ids
+
+    def _department_name(self, conn, cursor, department: str) -> str:
+        """Name under which a department's events are stored, so it never shows in two spellings.
+        
+        The first name a user supplies for a department is kept for all its later events. Events
+        migrated from a <dept>_events table (named after the table) are renamed to it.
+        """
+        key = department_key(department)
+        cursor.execute('''
+            SELECT department FROM events
+            WHERE scope = %s AND department_key = %s AND legacy_table IS NULL
+            LIMIT 1
+        ''', (DEPARTMENT_SCOPE, key))
+        rows = cursor.fetchall()
+        name = rows[0][0] if rows else department
+        
+        cursor.execute('''
+            UPDATE events SET department = %s
+            WHERE scope = %s AND department_key = %s AND legacy_table IS NOT NULL AND department <> %s
+        ''', (name, DEPARTMENT_SCOPE, key, name))
+        if cursor.rowcount:
             conn.commit()
-            return event_id
-            
-        except mysql.connector.Error as e:
-            print(f"Error storing admin event: {e}")
-            return 0
-        finally:
-            conn.close()
+            print(f"Renamed {cursor.rowcount} migrated events of department '{name}'")
+        return name
+
+    def _store_events_individually(self, conn, cursor, rows: List[tuple]) -> List[Optional[int]]:
+        """Insert rows one per transaction (ids of failed rows are None), raising if none was stored"""
+        event_ids = []
+        last_error = None
+        for row in rows:
+            try:
+                cursor.execute('''
+                    INSERT INTO events (
+                        scope, department, department_key, document_id, document_title, event_date,
+                        related_information, event_time, location, document_path
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ''', row)
+                event_id = self.backend.first_inserted_id(cursor, 1)
+                conn.commit()
+                event_ids.append(event_id)
+            except self.backend.Error as e:
+                conn.rollback()
+                print(f"Error storing event '{row[4]}': {e}")
+                event_ids.append(None)
+                last_error = e
+        
+        if last_error is not None and all(event_id is None for event_id in event_ids):
+            raise last_error
+        return event_ids
     
+    def store_admin_event(self, event_data: Dict[str, Any]) -> int:
+        """Store a college-wide event"""
+        event_ids = self._store_events_bulk(COLLEGE_SCOPE, '', [event_data])
+        return event_ids[0] if event_ids else 0
+
     def store_department_event(self, department: str, event_data: Dict[str, Any]) -> int:
-        """Store event in department-specific table"""
-        table_name = self.create_department_table(department)
-        
+        """Store an event for a department"""
+        event_ids = self._store_events_bulk(DEPARTMENT_SCOPE, department, [event_data])
+        return event_ids[0] if event_ids else 0
+
+    def store_admin_events(self, events: List[Dict[str, Any]]) -> List[int]:
+        """Store all college-wide events of a document in one transaction"""
+        return self._store_events_bulk(COLLEGE_SCOPE, '', events)
+    
+    def store_department_events(self, department: str, events: List[Dict[str, Any]]) -> List[int]:
+        """Store all department events of a document in one transaction"""
+        return self._store_events_bulk(DEPARTMENT_SCOPE, department, events)
+    
+    def delete_events_by_document(self, document_id: str, department: Optional[str] = None) -> int:
+        """Delete all events extracted from a document (college events, or a department's events)"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        cursor = self.backend.cursor(conn)
+
         try:
-            cursor.execute(f'''
-                INSERT INTO {table_name} (
-                    document_id, document_title, event_date, related_information, event_time, location, document_path
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                event_data.get('document_id'),
-                event_data.get('document_title'),
-                event_data.get('event_date'),
-                event_data.get('related_information'),
-                event_data.get('event_time'),
-                event_data.get('location'),
-                event_data.get('document_path')
-            ))
-            
-            event_id = cursor.lastrowid
+            if department:
+                cursor.execute('''
+                    DELETE FROM events
+                    WHERE document_id = %s AND scope = %s AND department_key = %s
+                ''', (document_id, DEPARTMENT_SCOPE, department_key(department)))
+            else:
+                cursor.execute('''
+                    DELETE FROM events
+                    WHERE document_id = %s AND scope = %s
+                ''', (document_id, COLLEGE_SCOPE))
+
+            deleted_count = cursor.rowcount
             conn.commit()
-            return event_id
             
-        except mysql.connector.Error as e:
-            print(f"Error storing department event: {e}")
+            if deleted_count:
+                self._notify_change({
+                    'action': 'delete',
+                    'scope': DEPARTMENT_SCOPE if department else COLLEGE_SCOPE,
+                    'department': department,
+                    'document_id': document_id
+                })
+            return deleted_count
+
+        except self.backend.Error as e:
+            print(f"Error deleting events for document {document_id}: {e}")
             return 0
         finally:
             conn.close()
-    
+
     def get_admin_events(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get all admin events"""
         conn = self.get_connection()
-        cursor = conn.cursor(dictionary=True)
+        cursor = self.backend.cursor(conn, dictionary=True)
         
         try:
-            cursor.execute('''
-                SELECT * FROM admin_events 
-                ORDER BY event_date DESC, created_at DESC 
+            cursor.execute(f'''
+                SELECT {EVENT_COLUMNS} FROM events
+                WHERE scope = %s AND department_key = ''
+                ORDER BY event_date DESC, created_at DESC
                 LIMIT %s
-            ''', (limit,))
-            
-            events = cursor.fetchall()
-            
-            # Convert datetime objects to strings for JSON serialization
-            for event in events:
-                if event.get('event_date'):
-                    event['event_date'] = event['event_date'].strftime('%Y-%m-%d')
-                if event.get('event_time'):
-                    event['event_time'] = str(event['event_time'])
-                if event.get('created_at'):
-                    event['created_at'] = event['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-                if event.get('updated_at'):
-                    event['updated_at'] = event['updated_at'].strftime('%Y-%m-%d %H:%M:%S')
-            
-            return events
+            ''', (COLLEGE_SCOPE, limit))
             
-        except mysql.connector.Error as e:
+            return [self._serialize_event(event) for event in cursor.fetchall()]
+        
+        except self.backend.Error as e:
             print(f"Error getting admin events: {e}")
             return []
         finally:
@@ -203,73 +291,188 @@ class EventDatabase:
     def get_department_events(self, department: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Get events for a specific department"""
         conn = self.get_connection()
-        cursor = conn.cursor(dictionary=True)
+        cursor = self.backend.cursor(conn, dictionary=True)
         
         try:
-            # Generate table name directly from department name
-            safe_dept_name = department.replace(" ", "_").replace("-", "_").lower()
-            table_name = f"{safe_dept_name}_events"
-            
-            # Check if table exists by trying to query it
-            cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
-            if not cursor.fetchone():
-                return []  # Table doesn't exist yet
-            
             cursor.execute(f'''
-                SELECT * FROM {table_name} 
-                ORDER BY event_date DESC, created_at DESC 
+                SELECT {EVENT_COLUMNS} FROM events
+                WHERE scope = %s AND department_key = %s
+                ORDER BY event_date DESC, created_at DESC
                 LIMIT %s
-            ''', (limit,))
-            
-            events = cursor.fetchall()
+            ''', (DEPARTMENT_SCOPE, department_key(department), limit))
             
-            # Convert datetime objects to strings for JSON serialization
-            for event in events:
-                if event.get('event_date'):
-                    event['event_date'] = event['event_date'].strftime('%Y-%m-%d')
-                if event.get('event_time'):
-                    event['event_time'] = str(event['event_time'])
-                if event.get('created_at'):
-                    event['created_at'] = event['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-                if event.get('updated_at'):
-                    event['updated_at'] = event['updated_at'].strftime('%Y-%m-%d %H:%M:%S')
-            
-            return events
-            
-        except mysql.connector.Error as e:
+            return [self._serialize_event(event) for event in cursor.fetchall()]
+        
+        except self.backend.Error as e:
             print(f"Error getting department events: {e}")
             return []
         finally:
             conn.close()
     
-    def get_all_departments(self) -> List[str]:
-        """Get list of all departments by scanning for department event tables"""
+    @staticmethod
+    def encode_cursor(event: Dict[str, Any]) -> str:
+        """Opaque pagination cursor pointing just past a serialized event"""
+        raw = json.dumps([event.get('event_date'), event['id']])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """Decode a cursor into (event_date, id), raising ValueError if it is malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            event_date, event_id = json.loads(raw)
+            if event_date is not None:
+                datetime.strptime(event_date, '%Y-%m-%d')
+            return event_date, int(event_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    def list_events(self, department: Optional[str] = None, start_date: Optional[str] = None,
+                    end_date: Optional[str] = None, location: Optional[str] = None,
+                    cursor: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """Page through college events (or a department's events), newest event date first.
+        
+        Uses keyset pagination on (event_date, id) so every page is a range scan on
+        idx_scope_department_date_id. Events without a date sort last. Pass the returned
+        next_cursor to get the following page; it is None on the last page.
+        """
+        if department:
+            conditions = ["scope = %s", "department_key = %s"]
+            params: List[Any] = [DEPARTMENT_SCOPE, department_key(department)]
+        else:
+            conditions = ["scope = %s", "department_key = ''"]
+            params = [COLLEGE_SCOPE]
+        
+        if start_date:
+            conditions.append("event_date >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("event_date <= %s")
+            params.append(end_date)
+        if location:
+            conditions.append("location LIKE %s")
+            params.append(f"%{location}%")
+        
+        if cursor:
+            cursor_date, cursor_id = self.decode_cursor(cursor)
+            if cursor_date is None:
+                conditions.append("(event_date IS NULL AND id < %s)")
+                params.append(cursor_id)
+            else:
+                conditions.append("(event_date < %s OR (event_date = %s AND id < %s) OR event_date IS NULL)")
+                params.extend([cursor_date, cursor_date, cursor_id])
+        
         conn = self.get_connection()
-        cursor = conn.cursor()
+        db_cursor = self.backend.cursor(conn, dictionary=True)
         
         try:
-            # Get all tables that match the department pattern
-            cursor.execute("SHOW TABLES LIKE '%_events'")
-            tables = cursor.fetchall()
+            # Fetch one extra row to know whether another page exists (NULL dates sort last in DESC order)
+            db_cursor.execute(f'''
+                SELECT {EVENT_COLUMNS} FROM events
+                WHERE {" AND ".join(conditions)}
+                ORDER BY event_date DESC, id DESC
+                LIMIT %s
+            ''', params + [limit + 1])
+            
+            events = [self._serialize_event(event) for event in db_cursor.fetchall()]
+            has_more = len(events) > limit
+            events = events[:limit]
             
-            departments = []
-            for table in tables:
-                table_name = table[0]
-                # Skip admin_events table
-                if table_name == 'admin_events':
-                    continue
-                # Extract department name from table name (remove _events suffix)
-                dept_name = table_name.replace('_events', '').replace('_', ' ').title()
-                departments.append(dept_name)
+            return {
+                'events': events,
+                'next_cursor': self.encode_cursor(events[-1]) if has_more else None
+            }
+        
+        except self.backend.Error as e:
+            print(f"Error listing events: {e}")
+            return {'events': [], 'next_cursor': None}
+        finally:
+            conn.close()
+    
+    def search_events(self, query: str, scope: Optional[str] = None, department: Optional[str] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over event titles, details and locations, best matches first.
+        
+        Matches use the backend's full-text index (MySQL FULLTEXT in natural language mode,
+        SQLite FTS5 ranked by bm25) and can be narrowed to a scope ('college' or 'department'),
+        one department and an event date window.
+        """
+        if not query.strip(' "'):
+            return []
+        
+        conditions: List[str] = []
+        params: List[Any] = []
+        
+        if department:
+            conditions.extend(["scope = %s", "department_key = %s"])
+            params.extend([DEPARTMENT_SCOPE, department_key(department)])
+        elif scope:
+            conditions.append("scope = %s")
+            params.append(scope)
+        
+        if start_date:
+            conditions.append("event_date >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("event_date <= %s")
+            params.append(end_date)
+        
+        conn = self.get_connection()
+        cursor = self.backend.cursor(conn, dictionary=True)
+        
+        try:
+            sql, match_params = self.backend.search_query(query, conditions)
+            cursor.execute(sql, match_params + params + [limit])
             
-            return sorted(departments)
+            events = []
+            for event in cursor.fetchall():
+                event['relevance'] = round(float(event['relevance']), 6)
+                events.append(self._serialize_event(event))
+            return events
+        
+        except self.backend.Error as e:
+            print(f"Error searching events: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_all_departments(self) -> List[str]:
+        """Get list of all departments that have stored events"""
+        conn = self.get_connection()
+        cursor = self.backend.cursor(conn)
+        
+        try:
+            cursor.execute('''
+                SELECT MIN(department) FROM events
+                WHERE scope = %s
+                GROUP BY department_key
+            ''', (DEPARTMENT_SCOPE,))
             
-        except mysql.connector.Error as e:
+            return sorted(row[0] for row in cursor.fetchall())
+        
+        except self.backend.Error as e:
             print(f"Error getting departments: {e}")
             return []
         finally:
             conn.close()
     
+    def get_change_version(self) -> Optional[tuple]:
+        """Cheap fingerprint of the events table that changes with every insert or delete, from
+        any process (events are never updated in place); None if the database is unreachable"""
+        conn = self.get_connection()
+        cursor = self.backend.cursor(conn)
+        
+        try:
+            cursor.execute('SELECT COUNT(*), MAX(id) FROM events')
+            return tuple(cursor.fetchone())
+        
+        except self.backend.Error as e:
+            print(f"Error reading events change version: {e}")
+            return None
+        finally:
+            conn.close()
+
     def get_upcoming_events(self, days_ahead: int = 2) -> Dict[str, List[Dict[str, Any]]]:
         """Get upcoming events from today to specified days ahead for notifications"""
         from datetime import datetime, timedelta
@@ -278,7 +481,7 @@ class EventDatabase:
         end_date = today + timedelta(days=days_ahead)
         
         conn = self.get_connection()
-        cursor = conn.cursor(dictionary=True)
+        cursor = self.backend.cursor(conn, dictionary=True)
         
         result = {
             'college_events': [],
@@ -286,75 +489,29 @@ class EventDatabase:
         }
         
         try:
-            # Get college events (admin events)
+            # One range scan on idx_event_date covers college and all department events
             cursor.execute('''
-                SELECT id, document_id, document_title, event_date, event_time, location, 
+                SELECT id, scope, department, document_id, document_title, event_date, event_time, location,
                        related_information, document_path, created_at
-                FROM admin_events 
+                FROM events
                 WHERE event_date >= %s AND event_date <= %s
                 ORDER BY event_date ASC, event_time ASC
-            ''', (today, end_date))
-            
-            college_events = cursor.fetchall()
+            ''', (str(today), str(end_date)))
             
-            # Convert datetime objects to strings for JSON serialization
-            for event in college_events:
-                if event.get('event_date'):
-                    event['event_date'] = event['event_date'].strftime('%Y-%m-%d')
-                if event.get('event_time'):
-                    event['event_time'] = str(event['event_time'])
-                if event.get('created_at'):
-                    event['created_at'] = event['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            
-            result['college_events'] = college_events
-            
-            # Get department events from all department tables
-            # Create a fresh cursor without dictionary mode for SHOW TABLES
-            tables_cursor = conn.cursor()  # Regular cursor, not dictionary mode
-            tables_cursor.execute("SHOW TABLES LIKE '%_events'")
-            tables = tables_cursor.fetchall()
-            tables_cursor.close()
-            
-            for table_row in tables:
-                # For regular cursor, results are tuples
-                table_name = table_row[0]  # Get first element from tuple
-                    
-                # Skip admin_events table as it's handled above
-                if table_name == 'admin_events':
-                    continue
-                
-                # Extract department name from table name
-                department = table_name.replace('_events', '').replace('_', ' ').title()
+            for event in cursor.fetchall():
+                scope = event.pop('scope')
+                department = event.pop('department')
+                self._serialize_event(event)
                 
-                cursor.execute(f'''
-                    SELECT id, document_id, document_title, event_date, event_time, location, 
-                           related_information, document_path, created_at
-                    FROM {table_name}
-                    WHERE event_date >= %s AND event_date <= %s
-                    ORDER BY event_date ASC, event_time ASC
-                ''', (today, end_date))
-                
-                dept_events = cursor.fetchall()
-                
-                # Convert datetime objects to strings
-                for event in dept_events:
-                    if event.get('event_date'):
-                        event['event_date'] = event['event_date'].strftime('%Y-%m-%d')
-                    if event.get('event_time'):
-                        event['event_time'] = str(event['event_time'])
-                    if event.get('created_at'):
-                        event['created_at'] = event['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-                
-                if dept_events:
-                    result['department_events'][department] = dept_events
+                if scope == COLLEGE_SCOPE:
+                    result['college_events'].append(event)
+                else:
+                    result['department_events'].setdefault(department, []).append(event)
             
             return result
-            
-        except mysql.connector.Error as e:
+        
+        except self.backend.Error as e:
             print(f"Error getting upcoming events: {e}")
             return result
         finally:
             conn.close()
-
-# Create global instance
-event_db = EventDatabase()
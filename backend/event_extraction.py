@@ -0,0 +1,212 @@
+"""
+Event Extraction
+Extracts structured events from whole documents by running the LLM over token-bounded
+windows concurrently and merging the results
+"""
+
+import asyncio
+import os
+import re
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from extraction_cache import ExtractionCache
+from llm_gateway import llm_gateway
+from openai_clients import EVENT_EXTRACTION_MODEL
+from rule_based_extraction import extract_events_locally
+
+# Window size for one extraction call, overlap so events on a window boundary are seen whole,
+# and how many windows of one document are extracted at the same time
+EXTRACTION_WINDOW_TOKENS = int(os.getenv("EXTRACTION_WINDOW_TOKENS", 3000))
+EXTRACTION_WINDOW_OVERLAP_TOKENS = int(os.getenv("EXTRACTION_WINDOW_OVERLAP_TOKENS", 150))
+EXTRACTION_MAX_CONCURRENCY = int(os.getenv("EXTRACTION_MAX_CONCURRENCY", 4))
+
+# "auto": use the local rule-based extractor when it is confident, otherwise the LLM;
+# "llm": always use the LLM; "local": never call the LLM (offline)
+EVENT_EXTRACTION_MODE = os.getenv("EVENT_EXTRACTION_MODE", "auto").lower()
+LOCAL_EXTRACTION_MIN_CONFIDENCE = float(os.getenv("LOCAL_EXTRACTION_MIN_CONFIDENCE", 0.7))
+
+# Model used for extraction, and a version to bump whenever the prompt or windowing changes
+# so cached results from the old prompt are not reused
+EXTRACTION_MODEL = EVENT_EXTRACTION_MODEL
+EXTRACTION_PROMPT_VERSION = "2"
+
+# Rough token estimate for English text, good enough for sizing windows
+CHARS_PER_TOKEN = 4
+
+# Event extraction models for AI processing
+class ExtractedEvent(BaseModel):
+    """Model for a single extracted event"""
+    document_title: str = Field(description="Title of the event")
+    event_date: Optional[str] = Field(None, description="Event date in YYYY-MM-DD format, or None if not found")
+    event_time: Optional[str] = Field(None, description="Event time in HH:MM format, or None if not found")
+    location: Optional[str] = Field(None, description="Event location or venue, or None if not found")
+    related_information: str = Field(description="Main content/description of the event")
+
+class ExtractedEvents(BaseModel):
+    """Model for multiple extracted events from a document"""
+    events: List[ExtractedEvent] = Field(description="List of all events found in the document")
+
+def split_into_windows(text: str, max_tokens: int = EXTRACTION_WINDOW_TOKENS,
+                       overlap_tokens: int = EXTRACTION_WINDOW_OVERLAP_TOKENS) -> List[str]:
+    """Split text into windows of at most max_tokens, breaking at paragraphs, then lines, then spaces"""
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+    overlap_chars = max(0, min(overlap_tokens * CHARS_PER_TOKEN, max_chars // 2))
+
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    windows = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            # Prefer the last natural break in the second half of the window
+            for separator in ("\n\n", "\n", ". ", " "):
+                cut = text.rfind(separator, start + max_chars // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        
+        windows.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+
+    return [window for window in windows if window]
+
+def _event_key(event: dict) -> Tuple[str, str, str, str]:
+    """Identity of an event for de-duplication across overlapping windows"""
+    def normalize(value) -> str:
+        return re.sub(r"\s+", " ", str(value or "")).strip().lower()
+
+    event_time = normalize(event.get("event_time"))
+    # "09:30" and "09:30:00" are the same time
+    if re.fullmatch(r"\d{1,2}:\d{2}(:00)?", event_time):
+        hours, minutes = event_time.split(":")[:2]
+        event_time = f"{int(hours):02d}:{minutes}"
+
+    return (
+        normalize(event.get("document_title")),
+        normalize(event.get("event_date")),
+        event_time,
+        normalize(event.get("location"))
+    )
+
+def merge_events(window_events: List[List[dict]]) -> List[dict]:
+    """Merge per-window results in document order, keeping one entry per (title, date, time, location)"""
+    merged = {}
+    for events in window_events:
+        for event in events:
+            key = _event_key(event)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = event
+            elif len(event.get("related_information") or "") > len(existing.get("related_information") or ""):
+                # The same event seen in two windows: keep the fuller description
+                existing["related_information"] = event["related_information"]
+    return list(merged.values())
+
+async def _extract_window(window: str, document_title: str, part: int, total_parts: int) -> List[dict]:
+    """Run one structured-output extraction call through the LLM gateway"""
+    part_note = f"This is part {part} of {total_parts} of the document." if total_parts > 1 else ""
+
+    prompt = f"""
+    Analyze the following document text and extract all event information.
+    Document title: {document_title}
+    {part_note}
+
+    For each event found, extract:
+    - document_title: Use the provided document title
+    - event_date: Date in YYYY-MM-DD format (if found)
+    - event_time: Time in HH:MM format (if found)
+    - location: Event venue/location (if mentioned)
+    - related_information: Main description/content of the event
+
+    If no events are found, return an empty events list.
+    If multiple events are in the document, extract each one separately.
+
+    Document text:
+    {window}
+    """
+
+    response = await llm_gateway.parse(
+        model=EXTRACTION_MODEL,
+        messages=[
+            {"role": "system", "content": "You are an expert at extracting event information from documents. Extract all events with their dates, times, locations, and descriptions."},
+            {"role": "user", "content": prompt}
+        ],
+        response_format=ExtractedEvents,
+        temperature=0.1
+    )
+
+    parsed_events = response.choices[0].message.parsed
+    return [event.dict() for event in parsed_events.events] if parsed_events else []
+
+def _fallback_events(text: str, document_title: str) -> List[dict]:
+    """Fallback: create a basic event from the document"""
+    return [{
+        "document_title": document_title,
+        "event_date": None,
+        "event_time": None,
+        "location": None,
+        "related_information": text[:500]  # First 500 chars as description
+    }]
+
+# LLM extraction results, reused across scopes and re-uploads of the same text
+extraction_cache = ExtractionCache()
+
+def _cache_version() -> str:
+    return (f"{EXTRACTION_PROMPT_VERSION}|{EXTRACTION_MODEL}|"
+            f"{EXTRACTION_WINDOW_TOKENS}|{EXTRACTION_WINDOW_OVERLAP_TOKENS}")
+
+# AI Event Extraction Function
+async def extract_events_from_text(text: str, document_title: str) -> List[dict]:
+    """Extract structured event data from the whole text using OpenAI with structured output.
+
+    Documents where the local rule-based extractor finds every event with enough evidence
+    (date plus time or venue) skip the LLM entirely. Long documents are split into overlapping
+    windows that are extracted concurrently (at most EXTRACTION_MAX_CONCURRENCY at a time), so
+    upload latency grows with the slowest window rather than the number of windows. LLM results
+    are cached on disk by text hash, so the same circular uploaded to another scope or under a
+    new title is free.
+    """
+    windows = split_into_windows(text)
+    if not windows:
+        return []
+
+    local_events, confidence = extract_events_locally(text, document_title)
+    if EVENT_EXTRACTION_MODE == "local" or (
+        EVENT_EXTRACTION_MODE == "auto" and local_events and confidence >= LOCAL_EXTRACTION_MIN_CONFIDENCE
+    ):
+        return local_events or _fallback_events(text, document_title)
+
+    cache_key = ExtractionCache.make_key(text, _cache_version())
+    cached_events = await asyncio.to_thread(extraction_cache.get, cache_key, document_title)
+    if cached_events is not None:
+        return cached_events
+
+    semaphore = asyncio.Semaphore(EXTRACTION_MAX_CONCURRENCY)
+
+    async def extract(part: int, window: str) -> Optional[List[dict]]:
+        async with semaphore:
+            try:
+                return await _extract_window(window, document_title, part, len(windows))
+            except Exception as e:
+                print(f"Error extracting events with AI (part {part}/{len(windows)}): {e}")
+                return None
+
+    results = await asyncio.gather(*(extract(part, window) for part, window in enumerate(windows, 1)))
+    successful = [events for events in results if events is not None]
+
+    if not successful:
+        # Fall back to whatever the local extractor found, even with low confidence
+        return local_events or _fallback_events(text, document_title)
+
+    events = merge_events(successful)
+    if len(successful) == len(windows):
+        # Partial results are not cached so a later upload retries the failed windows
+        await asyncio.to_thread(extraction_cache.put, cache_key, events)
+    return events
@@ -0,0 +1,100 @@
+"""
+Event Extraction Cache
+Durable cache of LLM event-extraction results keyed by a hash of the document text and the
+extraction prompt/model version, shared by college, department and subject uploads
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from file_locks import atomic_pickle_dump
+
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "storage/extraction_cache")
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir: str = EXTRACTION_CACHE_DIR, enabled: bool = EXTRACTION_CACHE_ENABLED):
+        """One pickle file per cached document under cache_dir"""
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def make_key(text: str, version: str) -> str:
+        """Cache key from the extracted text and everything that changes the extraction output.
+        
+        The document title is deliberately not part of the key: re-uploads under a corrected
+        title reuse the cached events and get the new title stamped on them.
+        """
+        digest = hashlib.sha256()
+        digest.update(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # Two-character fan-out keeps directories small during bulk re-ingestion
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def get(self, key: str, document_title: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached events for key with document_title stamped on them, or None"""
+        if not self.enabled:
+            return None
+        
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                events = pickle.load(f)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            # A truncated or unreadable entry is treated as a miss and rewritten later
+            print(f"Error reading extraction cache entry {path}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        
+        events = copy.deepcopy(events)
+        for event in events:
+            event["document_title"] = document_title
+        return events
+
+    def put(self, key: str, events: List[Dict[str, Any]]):
+        """Store events for key (written to a temp file and renamed so readers never see partial data)"""
+        if not self.enabled:
+            return
+        
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_pickle_dump(events, path)
+            with self._lock:
+                self.writes += 1
+        except Exception as e:
+            print(f"Error writing extraction cache entry {path}: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache hit/miss counters"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes
+            }
@@ -0,0 +1,173 @@
+"""
+Ingestion Pipeline
+Single pass over an uploaded file: text extraction -> splitting -> embedding and event
+extraction (concurrently) -> vector indexing -> event storage, with every artifact produced
+once and handed to the next stage
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from event_extraction import extract_events_from_text
+
+EVENT_SCOPES = ("college_event", "department_event")
+
+
+class IngestionPipeline:
+    def __init__(self, vector_db, event_db):
+        """Pipeline over the shared vector and event databases"""
+        self.vector_db = vector_db
+        self.event_db = event_db
+
+    async def ingest(self, scope: str, file_path: Path, filename: str, title: str, user_id: str, role: str,
+                     department: Optional[str] = None, subject: Optional[str] = None,
+                     event_type: Optional[str] = None, document_id: Optional[str] = None,
+                     content_hash: Optional[str] = None,
+                     manual_event: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Ingest a file already stored at file_path into scope.
+        
+        scope is "college_event", "department_event" or "document". For event scopes the
+        events are taken from manual_event when given (form fields), otherwise extracted from
+        the text while it is being embedded. Returns the process_* result and a summary of
+        the stored events (empty for documents and same-scope duplicates).
+        """
+        vector_db_path = await asyncio.to_thread(
+            self.vector_db.get_scope_vector_path, scope, user_id, role, department, subject
+        )
+        
+        # An identical file already in this scope is resolved by process_* without any work
+        if await asyncio.to_thread(self.vector_db.find_duplicate, content_hash, vector_db_path):
+            result = await asyncio.to_thread(
+                self._index, scope, file_path, filename, title, user_id, role,
+                department, subject, event_type, document_id, content_hash, None
+            )
+            return result, []
+        
+        extract_events = scope in EVENT_SCOPES and manual_event is None
+        
+        # Stage 1: text and chunks (vectors of the same file in another scope are reused)
+        reused = await asyncio.to_thread(self.vector_db.load_reusable_vectors, content_hash)
+        text = None
+        if reused is None or extract_events:
+            text = await asyncio.to_thread(self.vector_db.extract_text_from_document, str(file_path))
+        if reused is None:
+            chunks = self.vector_db.chunk_text(text)
+            text_length = len(text)
+        else:
+            chunks, _, text_length = reused
+        
+        # Stage 2: embeddings and LLM event extraction are independent, so run them together
+        async def embed():
+            if reused is not None:
+                return reused[1]
+            return await asyncio.to_thread(self.vector_db.create_embeddings, chunks)
+        
+        async def extract():
+            if not extract_events:
+                return []
+            return await extract_events_from_text(text, title)
+        
+        embeddings, events = await asyncio.gather(embed(), extract())
+        
+        # Stage 3: vector index, master indexes and catalog
+        result = await asyncio.to_thread(
+            self._index, scope, file_path, filename, title, user_id, role,
+            department, subject, event_type, document_id, content_hash, (chunks, embeddings, text_length)
+        )
+        
+        # A concurrent upload of the same file may have been stored first; its events already are
+        if scope not in EVENT_SCOPES or result.get("duplicate"):
+            return result, []
+        
+        # Stage 4: events of the document, stored in one transaction (invalid rows are skipped)
+        if manual_event is not None:
+            events = [dict(manual_event)]
+        document_path = Path(result["user_file_path"]).name
+        for event_data in events:
+            event_data.update({
+                'document_id': result["document_id"],
+                'document_path': document_path
+            })
+        
+        try:
+            if scope == "college_event":
+                event_ids = await asyncio.to_thread(self.event_db.store_admin_events, events)
+            else:
+                event_ids = await asyncio.to_thread(self.event_db.store_department_events, department, events)
+            # Only now is the document reusable as a duplicate of a later identical upload
+            await asyncio.to_thread(self.vector_db.mark_document_complete, result["document_id"])
+        except Exception:
+            # Without its events the upload failed: remove the indexed document so it is not
+            # left catalogued (and matched as a duplicate by the next upload of the same file)
+            await asyncio.to_thread(self.discard, result["document_id"], scope, department)
+            raise
+        
+        stored_events = [
+            {
+                'event_id': event_id,
+                'document_title': event_data.get('document_title'),
+                'event_date': event_data.get('event_date'),
+                'event_time': event_data.get('event_time'),
+                'location': event_data.get('location')
+            }
+            for event_id, event_data in zip(event_ids, events)
+            if event_id is not None
+        ]
+        return result, stored_events
+
+    def discard(self, document_id: str, scope: str, department: Optional[str] = None):
+        """Delete a document indexed by a failed upload, with any of its events already stored (blocking)"""
+        self.vector_db.delete_document(document_id, None, None)
+        if scope not in EVENT_SCOPES:
+            return
+        try:
+            self.event_db.delete_events_by_document(
+                document_id, department if scope == "department_event" else None
+            )
+        except Exception as e:
+            print(f"Error removing events of failed upload {document_id}: {e}")
+
+    def _index(self, scope: str, file_path: Path, filename: str, title: str, user_id: str, role: str,
+               department: Optional[str], subject: Optional[str], event_type: Optional[str],
+               document_id: Optional[str], content_hash: Optional[str], prepared) -> Dict[str, Any]:
+        """Hand the prepared artifacts to the scope's process_* method (blocking)"""
+        if scope == "college_event":
+            return self.vector_db.process_college_event_document(
+                file_path=str(file_path),
+                user_id=user_id,
+                role=role,
+                filename=filename,
+                title=title,
+                event_type=event_type or "college",
+                document_id=document_id,
+                content_hash=content_hash,
+                prepared=prepared,
+                awaiting_events=True
+            )
+        if scope == "department_event":
+            return self.vector_db.process_department_event_document(
+                file_path=str(file_path),
+                user_id=user_id,
+                role=role,
+                title=title,
+                event_type=event_type or "department",
+                department=department,
+                filename=filename,
+                document_id=document_id,
+                content_hash=content_hash,
+                prepared=prepared,
+                awaiting_events=True
+            )
+        return self.vector_db.process_document(
+            file_path=str(file_path),
+            user_id=user_id,
+            role=role,
+            department=department,
+            filename=filename,
+            title=title,
+            subject=subject,
+            document_id=document_id,
+            content_hash=content_hash,
+            prepared=prepared
+        )
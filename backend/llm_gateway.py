@@ -0,0 +1,205 @@
+"""
+LLM Gateway
+Shared path for every OpenAI call: a global and a per-model concurrency cap, coalescing
+of identical in-flight requests so a burst of the same question makes one upstream call,
+and the timeouts, retries and circuit breakers of llm_resilience
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from llm_resilience import ResiliencePolicy
+from openai_clients import get_async_openai_client, get_openai_client, request_timeout
+
+# Upstream calls running at the same time, in total and per model
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", 8))
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_concurrency_per_model: int = LLM_MAX_CONCURRENCY_PER_MODEL,
+                 resilience: Optional[ResiliencePolicy] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_concurrency_per_model = max(1, max_concurrency_per_model)
+        self.resilience = resilience or ResiliencePolicy()
+        self._lock = threading.Lock()
+        
+        # asyncio primitives belong to one event loop; they are recreated if the loop changes
+        self._loop = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._model_limits: Dict[str, asyncio.Semaphore] = {}
+        # Request key -> task of the upstream call all identical requests await
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        
+        self.requests = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.errors = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.running: Dict[str, int] = {}
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @staticmethod
+    def request_key(kind: str, model: str, request: Dict[str, Any]) -> str:
+        """Identity of a request: identical keys share one upstream call"""
+        payload = json.dumps({"kind": kind, "model": model, "request": request}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._model_limits = {}
+            self._in_flight = {}
+
+    async def run(self, kind: str, model: str, request: Dict[str, Any],
+                  invoke: Callable[[float], Awaitable[Any]]) -> Any:
+        """Result of awaiting invoke(timeout) (the upstream call), shared by identical concurrent requests.
+        
+        The call runs as its own task, so a caller that disconnects does not cancel it for the
+        others waiting on the same result. Raises CircuitOpenError without calling upstream
+        while the model's circuit is open, or the last error once retries are exhausted.
+        """
+        self._bind_loop()
+        key = self.request_key(kind, model, request)
+        
+        with self._lock:
+            self.requests += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(model, invoke))
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._finished, key))
+        else:
+            with self._lock:
+                self.coalesced += 1
+        
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller has gone away
+            task.exception()
+
+    async def _call(self, model: str, invoke: Callable[[float], Awaitable[Any]]) -> Any:
+        """Attempts of one upstream call; the concurrency slot is released while backing off"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                breaker = self.resilience.check(model)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                raise
+            try:
+                result = await self._attempt(model, invoke, started)
+            except Exception as e:
+                self.resilience.record_attempt(breaker, e)
+                delay = self.resilience.should_retry(attempt, started, e)
+                if delay is None:
+                    with self._lock:
+                        self.errors += 1
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            self.resilience.record_attempt(breaker)
+            return result
+
+    async def _attempt(self, model: str, invoke: Callable[[float], Awaitable[Any]], started: float) -> Any:
+        model_limit = self._model_limits.setdefault(model, asyncio.Semaphore(self.max_concurrency_per_model))
+        queued_at = time.monotonic()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        
+        admitted = False
+        try:
+            async with self._global_limit:
+                async with model_limit:
+                    wait = time.monotonic() - queued_at
+                    with self._lock:
+                        admitted = True
+                        self.queued -= 1
+                        self.upstream_calls += 1
+                        self.total_wait += wait
+                        self.max_wait = max(self.max_wait, wait)
+                        self.running[model] = self.running.get(model, 0) + 1
+                    try:
+                        return await invoke(self.resilience.attempt_timeout(started))
+                    finally:
+                        with self._lock:
+                            self.running[model] -= 1
+        finally:
+            if not admitted:
+                with self._lock:
+                    self.queued -= 1
+
+    @staticmethod
+    def _with_timeout(client, timeout: float):
+        """client with a per-attempt timeout and its built-in retries off (the gateway retries)"""
+        return client.with_options(timeout=request_timeout(timeout), max_retries=0)
+
+    async def chat(self, **request) -> Any:
+        """chat.completions.create on the shared async client"""
+        client = get_async_openai_client()
+        return await self.run("chat", request.get("model"), request,
+                              lambda timeout: self._with_timeout(client, timeout).chat.completions.create(**request))
+
+    async def parse(self, **request) -> Any:
+        """Structured-output chat completion (beta parse) on the shared async client"""
+        client = get_async_openai_client()
+        return await self.run("parse", request.get("model"), request,
+                              lambda timeout: self._with_timeout(client, timeout).beta.chat.completions.parse(**request))
+
+    async def embed(self, **request) -> Any:
+        """embeddings.create on the shared async client"""
+        client = get_async_openai_client()
+        return await self.run("embed", request.get("model"), request,
+                              lambda timeout: self._with_timeout(client, timeout).embeddings.create(**request))
+
+    def embed_blocking(self, **request) -> Any:
+        """embeddings.create on the shared blocking client, with timeouts, retries and the circuit
+        breaker, for synchronous code (no coalescing or concurrency cap, which need the event loop)"""
+        client = get_openai_client()
+        return self.resilience.call(request.get("model"),
+                                    lambda timeout: self._with_timeout(client, timeout).embeddings.create(**request))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, wait time, coalescing counters and circuit breaker states"""
+        with self._lock:
+            counters = {
+                "max_concurrency": self.max_concurrency,
+                "max_concurrency_per_model": self.max_concurrency_per_model,
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.upstream_calls,
+                "errors": self.errors,
+                "queue_depth": self.queued,
+                "max_queue_depth": self.max_queued,
+                "in_flight": {model: count for model, count in self.running.items() if count},
+                "avg_wait_ms": round(self.total_wait / self.upstream_calls * 1000, 1) if self.upstream_calls else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 1)
+            }
+        counters["resilience"] = self.resilience.metrics()
+        return counters
+
+
+# Gateway shared by the chat endpoints, RAG answers and event extraction
+llm_gateway = LLMGateway()
@@ -0,0 +1,229 @@
+"""
+LLM Resilience
+Per-call deadlines, jittered exponential retry of transient OpenAI errors, and a circuit
+breaker per model that fails fast while the upstream is degraded so callers can fall back
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from openai_clients import OPENAI_TIMEOUT
+
+# Deadline of one upstream attempt, and of all attempts of one call together
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", OPENAI_TIMEOUT))
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", 60))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 8))
+
+# Consecutive failures that open a model's circuit, and how long it stays open before a probe
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", 30))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while a model's circuit is open"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors, rate limits and 5xx are worth another attempt (and count
+    against the circuit)"""
+    try:
+        import openai
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+    except ImportError:
+        pass
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def retry_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it sent one"""
+    response = getattr(error, "response", None)
+    retry_after = None
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    if retry_after is not None:
+        return min(retry_after, LLM_RETRY_MAX_DELAY)
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self.recent_transitions = deque(maxlen=20)
+
+    def _transition(self, state: str):
+        """Change state and record the transition (caller holds the lock)"""
+        name = f"{self.state}->{state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        self.recent_transitions.append({"transition": name, "at": time.time(), "failures": self.failures})
+        print(f"LLM circuit {self.name}: {name} after {self.failures} failure(s)")
+        self.state = state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; after the reset period one probe is let through"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._transition(self.HALF_OPEN)
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self._transition(self.OPEN)
+
+    def release(self):
+        """End a probe that neither succeeded nor failed upstream (e.g. a bad request)"""
+        with self._lock:
+            self._probing = False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+                "recent_transitions": list(self.recent_transitions)
+            }
+
+
+class ResiliencePolicy:
+    def __init__(self, max_retries: int = LLM_MAX_RETRIES, timeout: float = LLM_TIMEOUT,
+                 deadline: float = LLM_CALL_DEADLINE):
+        self.max_retries = max(0, max_retries)
+        self.timeout = timeout
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        
+        self.attempts = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(model or "default")
+            return self._breakers[model]
+
+    def check(self, model: str) -> CircuitBreaker:
+        """Circuit breaker of model, raising CircuitOpenError when it rejects the call"""
+        breaker = self.breaker(model)
+        if not breaker.allow():
+            raise CircuitOpenError(f"LLM circuit for {model} is open; upstream is degraded")
+        return breaker
+
+    def attempt_timeout(self, started: float) -> float:
+        """Timeout for the next attempt: the per-call timeout, cut to what is left of the deadline"""
+        return max(1.0, min(self.timeout, self.deadline - (time.monotonic() - started)))
+
+    def should_retry(self, attempt: int, started: float, error: Exception) -> Optional[float]:
+        """Delay before retrying after error on attempt (0-based), or None to give up"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = retry_delay(attempt, error)
+        if time.monotonic() - started + delay >= self.deadline:
+            return None
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def record_attempt(self, breaker: CircuitBreaker, error: Optional[Exception] = None):
+        """Count an attempt and feed its outcome to the breaker"""
+        with self._lock:
+            self.attempts += 1
+            if error is not None:
+                self.failures += 1
+                if isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower():
+                    self.timeouts += 1
+        if error is None:
+            breaker.record_success()
+        elif is_retryable(error):
+            # Only transient errors say the upstream is unhealthy; a bad request does not
+            breaker.record_failure()
+        else:
+            breaker.release()
+
+    def call(self, model: str, invoke) -> Any:
+        """Blocking call of invoke(timeout) with retries, for code that is not async"""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            breaker = self.check(model)
+            try:
+                result = invoke(self.attempt_timeout(started))
+            except Exception as e:
+                self.record_attempt(breaker, e)
+                delay = self.should_retry(attempt, started, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.record_attempt(breaker)
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+            counters = {
+                "timeout_seconds": self.timeout,
+                "deadline_seconds": self.deadline,
+                "max_retries": self.max_retries,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "failures": self.failures
+            }
+        counters["circuits"] = {model: breaker.metrics() for model, breaker in breakers.items()}
+        return counters
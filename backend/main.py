@@ -1,27 +1,119 @@
 import os
-import shutil
+import hashlib
+import mimetypes
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
-from datetime import datetime, date, timedelta
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from datetime import datetime, date
+from email.utils import formatdate, parsedate_to_datetime
 import uvicorn
-import json
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Import our vector database
-from vector import vector_db
+# Import our vector database and event database (instances are created in the lifespan)
+from vector import VectorDatabase
+from event_database import EventDatabase
+from event_extraction import extraction_cache
+from ingestion import IngestionPipeline
+from college_knowledge import CollegeKnowledgeBase
+from context_packing import extractive_answer, pack_context, usage_from_response
+from llm_gateway import llm_gateway
+from openai_clients import CHAT_MODEL, client_settings, close_openai_clients
+from notifications import (
+    NOTIFICATION_HEARTBEAT_SECONDS, DigestScheduler, NotificationCache, NotificationHub,
+    build_today_notifications, build_upcoming_notifications, format_sse
+)
+
+vector_db: Optional[VectorDatabase] = None
+event_db: Optional[EventDatabase] = None
+ingestion_pipeline: Optional[IngestionPipeline] = None
+college_knowledge: Optional[CollegeKnowledgeBase] = None
+
+# Notification endpoints serve the scheduler's daily digest; payloads it can't answer
+# (e.g. before the first build) are cached per worker and invalidated whenever events change
+notification_cache = NotificationCache()
+notification_hub = NotificationHub()
+digest_scheduler: Optional[DigestScheduler] = None
+
+# Optional warm-up of the most used vector scopes before reporting ready
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "false").lower() in ("1", "true", "yes")
+WARMUP_MAX_SCOPES = int(os.getenv("WARMUP_MAX_SCOPES", 3))
+
+async def embed_college_knowledge():
+    """Embed the college knowledge sections missing from the vector cache (background task)"""
+    try:
+        loaded = await asyncio.to_thread(college_knowledge.load)
+        if loaded["embedded"]:
+            print(f"College knowledge embedded {loaded['embedded']} sections")
+    except Exception as e:
+        print(f"Error embedding college knowledge: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the databases at startup and optionally warm caches before serving"""
+    global vector_db, event_db, ingestion_pipeline, college_knowledge, digest_scheduler
+
+    app.state.ready = False
+    app.state.warmup = None
+    
+    vector_db = VectorDatabase()
+    event_db = EventDatabase()
+    event_db.add_change_listener(notification_cache.invalidate)
+    ingestion_pipeline = IngestionPipeline(vector_db, event_db)
+    
+    # One scheduler per process rebuilds the digest after each ingest, when another worker
+    # changed the events table, and at midnight, and pushes the changes to all connected
+    # notification streams
+    digest_scheduler = DigestScheduler(event_db.get_upcoming_events, event_db.get_change_version)
+    digest_scheduler.add_listener(notification_hub.publish_digest)
+    event_db.add_change_listener(digest_scheduler.notify_change)
+
+    # A MySQL outage must not prevent the API from starting; /api/health reports it instead
+    await asyncio.to_thread(event_db.init_database)
+    
+    # Homepage chatbot knowledge, embedded once (cached on disk across restarts). Sections not
+    # in the cache are embedded in the background and searched by keywords until then, so an
+    # unreachable embeddings API cannot hold up startup
+    college_knowledge = CollegeKnowledgeBase(vector_db.create_embeddings)
+    knowledge_task = None
+    try:
+        loaded = await asyncio.to_thread(college_knowledge.load, False)
+        if loaded["pending"]:
+            knowledge_task = asyncio.create_task(embed_college_knowledge())
+    except Exception as e:
+        print(f"Error loading college knowledge: {e}")
+
+    if WARMUP_ENABLED:
+        try:
+            app.state.warmup = await asyncio.to_thread(vector_db.warm_up, WARMUP_MAX_SCOPES)
+        except Exception as e:
+            print(f"Warm-up failed: {e}")
+            app.state.warmup = {"error": str(e)}
+    
+    digest_scheduler.start()
+
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    if knowledge_task is not None:
+        knowledge_task.cancel()
+    await digest_scheduler.stop()
+    notification_hub.close()
+    event_db.close()
+    await close_openai_clients()
 
 app = FastAPI(
     title="AI Event Manager API",
     description="Backend API for AI-powered event management system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -40,6 +132,68 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 # Constants
 ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx", ".txt"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Allowance for the multipart framing and form fields around the file itself
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+UPLOAD_PATHS = {
+    "/api/documents/upload",
+    "/api/documents/upload-subject",
+    "/api/college-events/upload",
+    "/api/department-events/upload"
+}
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads whose declared body is over the limit before any of it is read"""
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(status_code=413, content={"detail": "File too large. Maximum size is 10MB"})
+    return await call_next(request)
+
+async def save_upload_file(upload: UploadFile, destination: Path, max_size: int = MAX_FILE_SIZE):
+    """Stream an upload to destination in chunks, hashing as it goes.
+
+    Stops as soon as the file exceeds max_size, so oversized uploads are never held in
+    memory or left on disk. Returns (size in bytes, sha256 hex digest).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    partial_path = destination.with_name(f"{destination.name}.part")
+
+    try:
+        with open(partial_path, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
+                digest.update(chunk)
+                f.write(chunk)
+        os.replace(partial_path, destination)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+    return size, digest.hexdigest()
+
+async def discard_failed_upload(scope: str, document_id: Optional[str], stored_path: Optional[Path],
+                                department: Optional[str] = None):
+    """Remove what a failed upload left behind.
+
+    Once the document is catalogued the catalog points at its stored file, so the whole document
+    (vectors, index entries, events) is deleted; before that only the stored file is removed
+    (save_upload_file already removes its .part file).
+    """
+    try:
+        if document_id and await asyncio.to_thread(vector_db.get_catalog_entry, document_id):
+            await asyncio.to_thread(ingestion_pipeline.discard, document_id, scope, department)
+        elif stored_path is not None:
+            stored_path.unlink(missing_ok=True)
+    except Exception as e:
+        print(f"Error cleaning up failed upload {document_id}: {e}")
 
 # Pydantic models
 class ChatQuery(BaseModel):
@@ -61,6 +215,8 @@ class ChatResponse(BaseModel):
     source_documents: List[dict] = []
     search_context: Optional[dict] = {}
     context_breakdown: Optional[dict] = {}
+    usage: Optional[dict] = None  # prompt/completion tokens of the model call
+    degraded: bool = False  # answered from retrieved text because the model was unavailable
 
 class DocumentInfo(BaseModel):
     document_id: str
@@ -80,72 +236,6 @@ class SimpleChatQuery(BaseModel):
     role: str
     department: Optional[str] = None
 
-# Event extraction models for AI processing
-class ExtractedEvent(BaseModel):
-    """Model for a single extracted event"""
-    document_title: str = Field(description="Title of the event")
-    event_date: Optional[str] = Field(None, description="Event date in YYYY-MM-DD format, or None if not found")
-    event_time: Optional[str] = Field(None, description="Event time in HH:MM format, or None if not found")
-    location: Optional[str] = Field(None, description="Event location or venue, or None if not found")
-    related_information: str = Field(description="Main content/description of the event")
-
-class ExtractedEvents(BaseModel):
-    """Model for multiple extracted events from a document"""
-    events: List[ExtractedEvent] = Field(description="List of all events found in the document")
-
-# Import event database
-from event_database import event_db
-
-# AI Event Extraction Function
-async def extract_events_from_text(text: str, document_title: str) -> List[dict]:
-    """Extract structured event data from text using OpenAI with structured output"""
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    prompt = f"""
-    Analyze the following document text and extract all event information. 
-    Document title: {document_title}
-    
-    For each event found, extract:
-    - document_title: Use the provided document title
-    - event_date: Date in YYYY-MM-DD format (if found)
-    - event_time: Time in HH:MM format (if found) 
-    - location: Event venue/location (if mentioned)
-    - related_information: Main description/content of the event
-    
-    If no events are found, return an empty events list.
-    If multiple events are in the document, extract each one separately.
-    
-    Document text:
-    {text[:4000]}  # Limit text to avoid token limits
-    """
-    
-    try:
-        response = client.beta.chat.completions.parse(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert at extracting event information from documents. Extract all events with their dates, times, locations, and descriptions."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format=ExtractedEvents,
-            temperature=0.1
-        )
-        
-        parsed_events = response.choices[0].message.parsed
-        return [event.dict() for event in parsed_events.events] if parsed_events else []
-        
-    except Exception as e:
-        print(f"Error extracting events with AI: {e}")
-        # Fallback: create a basic event from the document
-        return [{
-            "document_title": document_title,
-            "event_date": None,
-            "event_time": None, 
-            "location": None,
-            "related_information": text[:500]  # First 500 chars as description
-        }]
-
 @app.get("/")
 async def root():
     return {"message": "AI Event Manager API is running!"}
@@ -160,6 +250,7 @@ async def upload_document(
     subject: str = Form(None)      # Optional parameter
 ):
     """Upload and process document for vector database creation"""
+    document_id = stored_path = None
     try:
         # Validate file
         if not file.filename:
@@ -172,45 +263,35 @@ async def upload_document(
                 detail=f"File type {file_extension} not allowed. Allowed types: {list(ALLOWED_EXTENSIONS)}"
             )
         
-        # Check file size
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
-        
-        # Save uploaded file temporarily
-        temp_file_path = UPLOAD_DIR / f"temp_{user_id}_{role}_{file.filename}"
-        with open(temp_file_path, "wb") as f:
-            f.write(contents)
+        # Stream the file straight to its storage location, enforcing the size limit on the way
+        filename = Path(file.filename).name
+        document_id, stored_path = vector_db.get_upload_path(
+            "document", filename, user_id=user_id, role=role,
+            department=department or "General", subject=subject
+        )
+        _, content_hash = await save_upload_file(file, stored_path)
         
-        try:
-            # Process document using our vector database
-            result = vector_db.process_document(
-                file_path=str(temp_file_path),
-                user_id=user_id,  # Already string now
-                role=role,
-                department=department or "General",
-                filename=file.filename,
-                title=title,
-                subject=subject
-            )
-            
-            return {
-                "success": True,
-                "message": "Document uploaded and processed successfully",
-                "data": result
-            }
-            
-        finally:
-            # Clean up temporary file
-            if temp_file_path.exists():
-                temp_file_path.unlink()
+        # Process document using our vector database
+        result, _ = await ingestion_pipeline.ingest(
+            "document", stored_path, filename, title,
+            user_id=user_id,  # Already string now
+            role=role,
+            department=department or "General",
+            subject=subject,
+            document_id=document_id,
+            content_hash=content_hash
+        )
         
+        return {
+            "success": True,
+            "message": "Document uploaded and processed successfully",
+            "data": result
+        }
+
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up temporary file on error
-        if 'temp_file_path' in locals() and temp_file_path.exists():
-            temp_file_path.unlink()
+        await discard_failed_upload("document", document_id, stored_path)
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 @app.post("/api/college-events/upload")
@@ -226,6 +307,7 @@ async def upload_college_event_document(
     description: str = Form(None)  # Optional description
 ):
     """Upload and process college event document - only for admin, teacher, department roles"""
+    document_id = stored_path = None
     try:
         # Debug logging
         print(f"Upload attempt - Role: '{role}', User ID: '{user_id}', Title: '{title}'")
@@ -250,101 +332,63 @@ async def upload_college_event_document(
                 detail=f"File type {file_extension} not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
             )
         
-        # Check file size
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+        # Stream the file straight to its storage location, enforcing the size limit on the way
+        filename = Path(file.filename).name
+        document_id, stored_path = vector_db.get_upload_path("college_event", filename)
+        _, content_hash = await save_upload_file(file, stored_path)
+        
+        # Form fields, when provided, describe the event instead of AI extraction
+        manual_event = None
+        if event_date or event_time or location:
+            manual_event = {
+                'document_title': title,
+                'related_information': description or title,
+                'event_date': event_date,
+                'event_time': event_time,
+                'location': location
+            }
         
-        # Save temporary file
-        temp_file_path = UPLOAD_DIR / f"temp_{file.filename}"
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(content)
+        # Index the document and store its events in the admin events table (college events)
+        result, stored_events = await ingestion_pipeline.ingest(
+            "college_event", stored_path, filename, title,
+            user_id=user_id,
+            role=role,
+            event_type=event_type,
+            document_id=document_id,
+            content_hash=content_hash,
+            manual_event=manual_event
+        )
         
-        try:
-            # Process college event document
-            result = vector_db.process_college_event_document(
-                file_path=str(temp_file_path),
-                user_id=user_id,
-                role=role,
-                filename=file.filename,
-                title=title,
-                event_type=event_type
-            )
-            
-            # Extract text content for AI processing
-            text_content = vector_db.extract_text_from_document(str(temp_file_path))
-            
-            # Create event data from form inputs or AI extraction
-            if event_date or event_time or location:
-                # Use form data when provided
-                event_data = {
-                    'document_title': title,
-                    'related_information': description or title,
-                    'event_date': event_date,
-                    'event_time': event_time,
-                    'location': location,
-                    'document_id': result["document_id"],
-                    'document_path': str(temp_file_path.name)
-                }
-                
-                # Store in admin events table (college events)
-                event_id = event_db.store_admin_event(event_data)
-                stored_events = []
-                if event_id:
-                    stored_events.append({
-                        'event_id': event_id,
-                        'document_title': event_data.get('document_title'),
-                        'event_date': event_data.get('event_date'),
-                        'event_time': event_data.get('event_time'),
-                        'location': event_data.get('location')
-                    })
-            else:
-                # Fall back to AI extraction for events from document content
-                extracted_events = await extract_events_from_text(text_content, title)
-                
-                # Store extracted events in database
-                stored_events = []
-                for event_data in extracted_events:
-                    # Add document metadata
-                    event_data.update({
-                        'document_id': result["document_id"],
-                        'document_path': str(temp_file_path.name)  # Store relative path
-                    })
-                    
-                    # Store in admin events table (college events)
-                    event_id = event_db.store_admin_event(event_data)
-                    if event_id:
-                        stored_events.append({
-                            'event_id': event_id,
-                            'document_title': event_data.get('document_title'),
-                            'event_date': event_data.get('event_date'),
-                            'event_time': event_data.get('event_time'),
-                            'location': event_data.get('location')
-                        })
-            
-            
+        # An identical file is already stored as a college event together with its events
+        if result.get("duplicate"):
             return {
-                "message": "College event document uploaded and processed successfully",
+                "message": result["message"],
                 "document_id": result["document_id"],
                 "chunk_count": result["chunk_count"],
                 "text_length": result["text_length"],
-                "event_type": event_type,
+                "event_type": result["event_type"],
                 "storage_location": "college_events/vector_database",
-                "extracted_events": len(stored_events),
-                "events": stored_events
+                "duplicate": True,
+                "extracted_events": 0,
+                "events": []
             }
-            
-        finally:
-            # Clean up temporary file
-            if temp_file_path.exists():
-                temp_file_path.unlink()
         
+        
+        return {
+            "message": "College event document uploaded and processed successfully",
+            "document_id": result["document_id"],
+            "chunk_count": result["chunk_count"],
+            "text_length": result["text_length"],
+            "event_type": event_type,
+            "storage_location": "college_events/vector_database",
+            "extracted_events": len(stored_events),
+            "events": stored_events
+        }
+
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up temporary file on error
-        if 'temp_file_path' in locals() and temp_file_path.exists():
-            temp_file_path.unlink()
+        await discard_failed_upload("college_event", document_id, stored_path)
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 @app.post("/api/documents/chat", response_model=ChatResponse)
@@ -356,7 +400,8 @@ async def chat_with_documents(query_data: ChatQuery):
         default_department = "Computer Science" if query_data.role != "admin" else "admin"
         
         # Get relevant chunks from vector database
-        relevant_chunks = vector_db.query_documents(
+        relevant_chunks = await asyncio.to_thread(
+            vector_db.query_documents,
             query=query_data.query,
             user_id=user_id_str,
             role=query_data.role,
@@ -365,7 +410,7 @@ async def chat_with_documents(query_data: ChatQuery):
         )
         
         # Generate response using OpenAI
-        result = vector_db.generate_response(
+        result = await vector_db.generate_response(
             query=query_data.query,
             context_chunks=relevant_chunks
         )
@@ -375,7 +420,9 @@ async def chat_with_documents(query_data: ChatQuery):
             sources_count=result["sources_count"],
             source_documents=result["source_documents"],
             search_context=result.get("search_context", {}),
-            context_breakdown=result.get("context_breakdown", {})
+            context_breakdown=result.get("context_breakdown", {}),
+            usage=result.get("usage"),
+            degraded=result.get("degraded", False)
         )
         
     except Exception as e:
@@ -386,7 +433,8 @@ async def chat_with_context(query_data: ContextChatQuery):
     """Enhanced chat with documents using context-aware similarity search"""
     try:
         # Get relevant chunks from vector database with context
-        relevant_chunks = vector_db.query_documents(
+        relevant_chunks = await asyncio.to_thread(
+            vector_db.query_documents,
             query=query_data.query,
             user_id=query_data.user_id,
             role=query_data.role,
@@ -404,7 +452,7 @@ async def chat_with_context(query_data: ContextChatQuery):
         }
         
         # Generate response using OpenAI with context
-        result = vector_db.generate_response(
+        result = await vector_db.generate_response(
             query=query_data.query,
             context_chunks=relevant_chunks,
             search_context=search_context
@@ -415,7 +463,9 @@ async def chat_with_context(query_data: ContextChatQuery):
             sources_count=result["sources_count"],
             source_documents=result["source_documents"],
             search_context=result.get("search_context", {}),
-            context_breakdown=result.get("context_breakdown", {})
+            context_breakdown=result.get("context_breakdown", {}),
+            usage=result.get("usage"),
+            degraded=result.get("degraded", False)
         )
         
     except Exception as e:
@@ -439,7 +489,8 @@ async def chat_with_college_events(query_data: CollegeEventQuery):
     
     try:
         # Get relevant chunks from college events vector database
-        relevant_chunks = vector_db.query_college_events(
+        relevant_chunks = await asyncio.to_thread(
+            vector_db.query_college_events,
             query=query,
             top_k=5,
             department_filter=filter_department
@@ -454,7 +505,7 @@ async def chat_with_college_events(query_data: CollegeEventQuery):
         }
         
         # Generate response using OpenAI with context
-        result = vector_db.generate_response(
+        result = await vector_db.generate_response(
             query=query,
             context_chunks=relevant_chunks,
             search_context=search_context
@@ -465,7 +516,9 @@ async def chat_with_college_events(query_data: CollegeEventQuery):
             sources_count=result["sources_count"],
             source_documents=result["source_documents"],
             search_context=result.get("search_context", {}),
-            context_breakdown=result.get("context_breakdown", {})
+            context_breakdown=result.get("context_breakdown", {}),
+            usage=result.get("usage"),
+            degraded=result.get("degraded", False)
         )
         
     except Exception as e:
@@ -524,11 +577,70 @@ async def get_user_documents(user_id: str, role: str, department: str = "Compute
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching documents: {str(e)}")
 
+@app.delete("/api/college-events/delete/{document_id}")
+async def delete_college_event_document(document_id: str, user_id: str, role: str):
+    """Delete a college event document, its vectors and the events extracted from it"""
+    try:
+        allowed_roles = ["admin", "teacher", "department", "department_admin"]
+        if role.lower().strip() not in allowed_roles:
+            raise HTTPException(status_code=403, detail=f"Only admin, teacher, and department users can delete college event documents. Your role: '{role}'")
+
+        entry = await asyncio.to_thread(vector_db.get_catalog_entry, document_id)
+        if not entry or entry["scope"] != "college_event":
+            raise HTTPException(status_code=404, detail="College event document not found or already deleted")
+
+        if not await asyncio.to_thread(vector_db.delete_document, document_id, user_id, role):
+            raise HTTPException(status_code=404, detail="College event document not found or already deleted")
+
+        deleted_events = await asyncio.to_thread(event_db.delete_events_by_document, document_id)
+
+        return {
+            "success": True,
+            "message": "College event document deleted successfully",
+            "deleted_events": deleted_events
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting college event document: {str(e)}")
+
+@app.delete("/api/department-events/delete/{department}/{document_id}")
+async def delete_department_event_document(department: str, document_id: str, user_id: str, role: str):
+    """Delete a department event document, its vectors and the events extracted from it"""
+    try:
+        if role not in ["admin", "teacher", "department", "DEPARTMENT_ADMIN"]:
+            raise HTTPException(status_code=403, detail="Only admin, teacher, and department users can delete department event documents")
+
+        entry = await asyncio.to_thread(vector_db.get_catalog_entry, document_id)
+        if not entry or entry["scope"] != "department_event":
+            raise HTTPException(status_code=404, detail="Department event document not found or already deleted")
+
+        if not await asyncio.to_thread(vector_db.delete_document, document_id, user_id, role, department):
+            raise HTTPException(status_code=404, detail="Department event document not found or already deleted")
+
+        deleted_events = await asyncio.to_thread(event_db.delete_events_by_document, document_id, entry["department"])
+
+        return {
+            "success": True,
+            "message": f"Department event document deleted successfully from {department}",
+            "deleted_events": deleted_events
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting department event document: {str(e)}")
+
 @app.delete("/api/documents/delete/{document_id}")
 async def delete_document(document_id: str, user_id: str, role: str, department: str = "Computer Science"):
     """Delete a document and its vector database files"""
     try:
-        success = vector_db.delete_document(document_id, user_id, role, department)
+        entry = await asyncio.to_thread(vector_db.get_catalog_entry, document_id)
+        if not entry or entry["scope"] != "document":
+            raise HTTPException(status_code=404, detail="Document not found or already deleted")
+        
+        success = await asyncio.to_thread(vector_db.delete_document, document_id, user_id, role, department)
         
         if success:
             return {
@@ -545,11 +657,39 @@ async def delete_document(document_id: str, user_id: str, role: str, department:
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint - reports 503 until startup (and warm-up) has finished"""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "starting",
+                "message": "API is starting up",
+                "vector_db": "initialized" if vector_db else "not_initialized"
+            }
+        )
+    
+    event_db_available = event_db.available if event_db else False
     return {
-        "status": "healthy",
-        "message": "API is running normally",
-        "vector_db": "initialized"
+        "status": "healthy" if event_db_available else "degraded",
+        "message": "API is running normally" if event_db_available else "Event database is unavailable",
+        "vector_db": "initialized",
+        "event_db": "connected" if event_db_available else "unavailable",
+        "warmup": app.state.warmup
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Runtime metrics for connection pools, caches, the LLM gateway and query embedding batches"""
+    return {
+        "db_pool": event_db.pool.metrics() if event_db else None,
+        "notification_cache": notification_cache.metrics(),
+        "notification_digest": digest_scheduler.metrics() if digest_scheduler else None,
+        "notification_stream": notification_hub.metrics(),
+        "extraction_cache": extraction_cache.metrics(),
+        "college_knowledge": college_knowledge.metrics() if college_knowledge else None,
+        "openai": client_settings(),
+        "llm_gateway": llm_gateway.metrics(),
+        "embedding_batcher": vector_db.query_embedder.metrics() if vector_db else None
     }
 
 # Simplified stats endpoint
@@ -708,6 +848,7 @@ async def upload_document_subject(
     subject: str = Form(...)
 ):
     """Upload and process document for a specific subject"""
+    document_id = stored_path = None
     try:
         # Validate user role - teachers, admins, and department users can upload subject documents
         allowed_roles = ["admin", "teacher", "department", "department_admin"]
@@ -728,47 +869,34 @@ async def upload_document_subject(
                 detail=f"File type {file_extension} not allowed. Allowed types: {list(ALLOWED_EXTENSIONS)}"
             )
         
-        # Check file size
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
-        
-        # Create subject-specific path for storage
-        subject_path = f"{department}_{subject}".replace(" ", "_").lower()
-        temp_file_path = UPLOAD_DIR / f"temp_{user_id}_{role}_{subject_path}_{file.filename}"
-        
-        with open(temp_file_path, "wb") as f:
-            f.write(contents)
+        # Stream the file straight to the subject's storage folder, enforcing the size limit on the way
+        filename = Path(file.filename).name
+        document_id, stored_path = vector_db.get_upload_path(
+            "document", filename, user_id=user_id, role=role, department=department, subject=subject
+        )
+        _, content_hash = await save_upload_file(file, stored_path)
         
-        try:
-            # Process document using our vector database with subject metadata
-            result = vector_db.process_document(
-                file_path=str(temp_file_path),
-                user_id=user_id,  # Already string now
-                role=role,
-                department=department,
-                filename=file.filename,
-                title=title,
-                subject=subject
-            )
-            
-            return {
-                "success": True,
-                "message": f"Document uploaded and processed successfully for {subject}",
-                "data": result
-            }
-            
-        finally:
-            # Clean up temporary file
-            if temp_file_path.exists():
-                temp_file_path.unlink()
+        # Process document using our vector database with subject metadata
+        result, _ = await ingestion_pipeline.ingest(
+            "document", stored_path, filename, title,
+            user_id=user_id,  # Already string now
+            role=role,
+            department=department,
+            subject=subject,
+            document_id=document_id,
+            content_hash=content_hash
+        )
         
+        return {
+            "success": True,
+            "message": f"Document uploaded and processed successfully for {subject}",
+            "data": result
+        }
+
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up temporary file on error
-        if 'temp_file_path' in locals() and temp_file_path.exists():
-            temp_file_path.unlink()
+        await discard_failed_upload("document", document_id, stored_path)
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 # Subject Documents Chat Endpoint
@@ -796,7 +924,8 @@ async def chat_with_subject_documents(query_data: ContextChatQuery):
         print(f"Subject documents chat request: {query} for subject: {subject} in department: {department}")
         
         # Get relevant chunks from subject documents vector database
-        relevant_chunks = vector_db.query_documents(
+        relevant_chunks = await asyncio.to_thread(
+            vector_db.query_documents,
             query=query,
             user_id=user_id,
             role=role,
@@ -816,23 +945,29 @@ async def chat_with_subject_documents(query_data: ContextChatQuery):
             "user_role": role
         }
         
+        usage = None
+        degraded = False
         if not relevant_chunks:
             response_text = f"I don't have any specific information about '{query}' in the {subject} subject documents for {department} department. Please contact your department or upload relevant course materials for this subject."
         else:
             # Generate response using OpenAI with context
-            result = vector_db.generate_response(
+            result = await vector_db.generate_response(
                 query=query,
                 context_chunks=relevant_chunks,
                 search_context=search_context
             )
             response_text = result["response"]
+            usage = result.get("usage")
+            degraded = result.get("degraded", False)
             search_context["source_documents"] = result.get("source_documents", [])
         
         return ChatResponse(
             response=response_text,
             sources_count=len(relevant_chunks),
             source_documents=relevant_chunks,
-            search_context=search_context
+            search_context=search_context,
+            usage=usage,
+            degraded=degraded
         )
         
     except HTTPException:
@@ -867,7 +1002,7 @@ async def get_subject_documents(department: str, subject: str):
                 "uploadDate": doc.get("upload_date", ""),
                 "uploadedBy": doc.get("uploaded_by", ""),
                 "fileSize": doc.get("file_size", 0),
-                "fileUrl": f"/uploads/subject_documents/{department.replace(' ', '')}/{subject.replace(' ', '_')}/{doc.get('filename', '')}"
+                "fileUrl": f"/uploads/subject_documents/{department.replace(' ', '')}/{subject.replace(' ', '_')}/{doc.get('document_id', '')}_{doc.get('filename', '')}"
             }
             transformed_docs.append(transformed_doc)
         
@@ -931,6 +1066,7 @@ async def upload_department_event(
     description: str = Form(None)  # Optional description
 ):
     """Upload and process department event document"""
+    document_id = stored_path = None
     try:
         # Validate user role - only department users can upload to their department
         if role not in ["admin", "teacher", "department", "DEPARTMENT_ADMIN"]:
@@ -947,79 +1083,36 @@ async def upload_department_event(
                 detail=f"File type {file_extension} not allowed. Allowed types: {list(ALLOWED_EXTENSIONS)}"
             )
         
-        # Check file size
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
-        
-        # Save uploaded file temporarily
-        temp_file_path = UPLOAD_DIR / f"temp_dept_{user_id}_{role}_{file.filename}"
+        # Stream the file straight to the department's storage folder, enforcing the size limit on the way
+        filename = Path(file.filename).name
+        document_id, stored_path = vector_db.get_upload_path("department_event", filename, department=department)
+        _, content_hash = await save_upload_file(file, stored_path)
+        
+        # Form fields, when provided, describe the event instead of AI extraction
+        manual_event = None
+        if event_date or event_time or location:
+            manual_event = {
+                'document_title': title,
+                'related_information': description or title,
+                'event_date': event_date,
+                'event_time': event_time,
+                'location': location
+            }
         
-        with open(temp_file_path, "wb") as f:
-            f.write(contents)
+        # Index the document and store its events in the department events table
+        result, stored_events = await ingestion_pipeline.ingest(
+            "department_event", stored_path, filename, title,
+            user_id=user_id,
+            role=role,
+            department=department,
+            event_type=event_type,
+            document_id=document_id,
+            content_hash=content_hash,
+            manual_event=manual_event
+        )
         
-        try:
-            # Process document using our vector database
-            result = vector_db.process_department_event_document(
-                file_path=str(temp_file_path),
-                user_id=user_id,
-                role=role,
-                title=title,
-                event_type=event_type,
-                department=department
-            )
-            
-            # Extract text content for AI processing
-            text_content = vector_db.extract_text_from_document(str(temp_file_path))
-            
-            # Create event data from form inputs or AI extraction
-            if event_date or event_time or location:
-                # Use form data when provided
-                event_data = {
-                    'document_title': title,
-                    'related_information': description or title,
-                    'event_date': event_date,
-                    'event_time': event_time,
-                    'location': location,
-                    'document_id': result["document_id"],
-                    'document_path': str(temp_file_path.name)
-                }
-                
-                # Store in department events table
-                event_id = event_db.store_department_event(department, event_data)
-                stored_events = []
-                if event_id:
-                    stored_events.append({
-                        'event_id': event_id,
-                        'document_title': event_data.get('document_title'),
-                        'event_date': event_data.get('event_date'),
-                        'event_time': event_data.get('event_time'),
-                        'location': event_data.get('location')
-                    })
-            else:
-                # Fall back to AI extraction for events from document content
-                extracted_events = await extract_events_from_text(text_content, title)
-                
-                # Store extracted events in database
-                stored_events = []
-                for event_data in extracted_events:
-                    # Add document metadata
-                    event_data.update({
-                        'document_id': result["document_id"],
-                        'document_path': str(temp_file_path.name)  # Store relative path
-                    })
-                    
-                    # Store in department events table
-                    event_id = event_db.store_department_event(department, event_data)
-                    if event_id:
-                        stored_events.append({
-                            'event_id': event_id,
-                            'document_title': event_data.get('document_title'),
-                            'event_date': event_data.get('event_date'),
-                            'event_time': event_data.get('event_time'),
-                            'location': event_data.get('location')
-                        })
-            
+        # An identical file is already stored as this department's event together with its events
+        if result.get("duplicate"):
             return {
                 "success": True,
                 "document_id": result["document_id"],
@@ -1028,21 +1121,27 @@ async def upload_department_event(
                 "department": department,
                 "event_type": event_type,
                 "storage_location": f"{department}_events/vector_database",
-                "extracted_events": len(stored_events),
-                "events": stored_events
+                "duplicate": True,
+                "extracted_events": 0,
+                "events": []
             }
-            
-        finally:
-            # Clean up temporary file
-            if temp_file_path.exists():
-                temp_file_path.unlink()
-                
+        
+        return {
+            "success": True,
+            "document_id": result["document_id"],
+            "message": result["message"],
+            "chunks_created": result["chunks_count"],
+            "department": department,
+            "event_type": event_type,
+            "storage_location": f"{department}_events/vector_database",
+            "extracted_events": len(stored_events),
+            "events": stored_events
+        }
+
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up temporary file in case of error
-        if 'temp_file_path' in locals() and temp_file_path.exists():
-            temp_file_path.unlink()
+        await discard_failed_upload("department_event", document_id, stored_path, department)
         raise HTTPException(status_code=500, detail=f"Upload processing failed: {str(e)}")
 
 @app.post("/api/department-events/chat", response_model=ChatResponse)
@@ -1057,7 +1156,8 @@ async def chat_with_department_events(query_data: DepartmentEventQuery):
         print(f"Department events chat request: {query} for department: {department}")
         
         # Get relevant chunks from department events vector database
-        relevant_chunks = vector_db.query_department_events(
+        relevant_chunks = await asyncio.to_thread(
+            vector_db.query_department_events,
             query=query,
             department=department,
             top_k=5
@@ -1072,14 +1172,17 @@ async def chat_with_department_events(query_data: DepartmentEventQuery):
             "user_role": role
         }
         
+        usage = None
+        degraded = False
         if not relevant_chunks:
             response_text = f"I don't have any specific information about '{query}' in {department} department events. Please contact your department administration for more details about {department} department activities and events."
         else:
-            # Build context from relevant chunks
+            # Build context from as many relevant chunks as fit in the context token budget
             context_parts = []
             source_docs = []
+            packed_chunks = pack_context(relevant_chunks, text_key='content', overhead_tokens=20)
             
-            for chunk in relevant_chunks:
+            for chunk in packed_chunks:
                 context_parts.append(f"From {chunk['title']} ({chunk['event_type']}): {chunk['content']}")
                 source_docs.append({
                     "title": chunk['title'],
@@ -1101,24 +1204,31 @@ User Question: {query}
 Please provide a helpful and informative response based on the {department} department event information above. If the information doesn't fully answer the question, acknowledge what you can provide and suggest contacting the {department} department administration for additional details."""
 
             # Get response from OpenAI
-            from openai import OpenAI
-            openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
-                temperature=0.7
-            )
-            
-            response_text = response.choices[0].message.content
+            try:
+                response = await llm_gateway.chat(
+                    model=CHAT_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=500,
+                    temperature=0.7
+                )
+                response_text = response.choices[0].message.content
+                usage = usage_from_response(response)
+            except Exception as e:
+                # Model unavailable: answer with the most relevant event passages
+                print(f"Department events chat answering extractively: {str(e)}")
+                response_text = (f"The AI assistant is temporarily unavailable. From the {department} department event documents:\n\n"
+                                 + extractive_answer(query, packed_chunks, text_key='content'))
+                degraded = True
             search_context["source_documents"] = source_docs
+            search_context["context_tokens"] = sum(chunk['tokens'] for chunk in packed_chunks)
         
         return ChatResponse(
             response=response_text,
             sources_count=len(relevant_chunks),
             source_documents=relevant_chunks,
-            search_context=search_context
+            search_context=search_context,
+            usage=usage,
+            degraded=degraded
         )
         
     except Exception as e:
@@ -1136,11 +1246,12 @@ async def get_department_events(department: str):
         for doc in documents:
             # Get the stored filename (with UUID prefix) for department events
             original_filename = doc.get("filename", "")
-            document_id = doc.get("document_id", "")
+            # Department event metadata keeps the document id under "id"
+            document_id = doc.get("id") or doc.get("document_id", "")
             stored_filename = f"{document_id}_{original_filename}" if document_id else original_filename
             
             transformed_event = {
-                "id": doc.get("document_id", ""),
+                "id": document_id,
                 "title": doc.get("title", ""),
                 "description": doc.get("title", ""),  # Using title as description if not available
                 "eventType": doc.get("event_type", "general"),  # Transform snake_case to camelCase
@@ -1229,69 +1340,96 @@ async def get_department(department_id: int):
     
     return departments[department_id]
 
+# Stored events endpoints (cursor-paginated, newest event date first)
+MAX_EVENTS_PAGE_SIZE = 200
+
+async def list_stored_events(department: Optional[str], start_date: Optional[date], end_date: Optional[date],
+                             location: Optional[str], cursor: Optional[str], limit: int):
+    """Fetch one page of stored events for the college or a department"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    try:
+        page = await asyncio.to_thread(
+            event_db.list_events,
+            department=department,
+            start_date=str(start_date) if start_date else None,
+            end_date=str(end_date) if end_date else None,
+            location=location,
+            cursor=cursor,
+            limit=max(1, min(limit, MAX_EVENTS_PAGE_SIZE))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error listing stored events: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching events: {str(e)}")
+
+    return {
+        'success': True,
+        'count': len(page['events']),
+        'events': page['events'],
+        'next_cursor': page['next_cursor']
+    }
+
+@app.get("/api/events/college")
+async def list_college_events(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                              location: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50):
+    """Page through college-wide events, optionally limited to a date range (e.g. a calendar month) or location"""
+    return await list_stored_events(None, start_date, end_date, location, cursor, limit)
+
+@app.get("/api/events/department/{department}")
+async def list_department_events(department: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                 location: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50):
+    """Page through a department's events, optionally limited to a date range or location"""
+    return await list_stored_events(department, start_date, end_date, location, cursor, limit)
+
+@app.get("/api/events/search")
+async def search_stored_events(q: str, scope: Optional[str] = None, department: Optional[str] = None,
+                               start_date: Optional[date] = None, end_date: Optional[date] = None, limit: int = 20):
+    """Full-text search over stored events, ranked by relevance and optionally limited to a scope, department or date range"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+    if scope and scope not in ("college", "department"):
+        raise HTTPException(status_code=400, detail="scope must be 'college' or 'department'")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    try:
+        events = await asyncio.to_thread(
+            event_db.search_events,
+            q.strip(),
+            scope=scope,
+            department=department,
+            start_date=str(start_date) if start_date else None,
+            end_date=str(end_date) if end_date else None,
+            limit=max(1, min(limit, MAX_EVENTS_PAGE_SIZE))
+        )
+    except Exception as e:
+        print(f"Error searching stored events: {e}")
+        raise HTTPException(status_code=500, detail=f"Error searching events: {str(e)}")
+
+    return {
+        'success': True,
+        'query': q.strip(),
+        'count': len(events),
+        'events': events
+    }
+
 # Event Notifications Endpoints
 @app.get("/api/notifications/events/upcoming")
 async def get_upcoming_events_notifications(days_ahead: int = 2, department: str = None):
     """Get upcoming events (today + 2 days) as notifications with department filtering for admins"""
     try:
-        upcoming_events = event_db.get_upcoming_events(days_ahead=days_ahead)
-        
-        # Format notifications
-        notifications = []
-        
-        # Add college events notifications
-        college_events = upcoming_events.get('college_events', [])
-        if not department or department == 'all' or department == 'college':
-            for event in college_events:
-                notifications.append({
-                    'id': f"college_event_{event['id']}",
-                    'type': 'college_event',
-                    'title': event['document_title'] or 'College Event',
-                    'message': event['related_information'][:200] + '...' if len(event.get('related_information', '')) > 200 else event.get('related_information', 'Event notification'),
-                    'event_date': event['event_date'],
-                    'event_time': event['event_time'],
-                    'location': event['location'],
-                    'document_path': event.get('document_path'),
-                    'document_id': event['document_id'],
-                    'created_at': event['created_at'],
-                    'priority': 'high' if event['event_date'] == str(datetime.now().date()) else 'medium'
-                })
-        
-        # Add department events notifications
-        department_events = upcoming_events.get('department_events', {})
-        
-        for dept_name, events in department_events.items():
-            # Apply department filter if specified
-            if department and department != 'all' and department != 'college' and department != dept_name:
-                continue
-                
-            for event in events:
-                notifications.append({
-                    'id': f"dept_event_{event['id']}",
-                    'type': 'department_event',
-                    'department': dept_name,
-                    'title': event['document_title'] or f'{dept_name} Event',
-                    'message': event['related_information'][:200] + '...' if len(event.get('related_information', '')) > 200 else event.get('related_information', 'Event notification'),
-                    'event_date': event['event_date'],
-                    'event_time': event['event_time'],
-                    'location': event['location'],
-                    'document_path': event.get('document_path'),
-                    'document_id': event['document_id'],
-                    'created_at': event['created_at'],
-                    'priority': 'high' if event['event_date'] == str(datetime.now().date()) else 'medium'
-                })
+        digest = digest_scheduler.current() if digest_scheduler else None
+        if digest is not None and days_ahead <= digest.days_ahead:
+            return digest.upcoming_notifications(days_ahead, department)
         
-        # Sort by date and time
-        notifications.sort(key=lambda x: (x['event_date'] or '9999-12-31', x['event_time'] or '23:59'))
+        def build():
+            upcoming_events = event_db.get_upcoming_events(days_ahead=days_ahead)
+            return build_upcoming_notifications(upcoming_events, department)
         
-        return {
-            'success': True,
-            'total_notifications': len(notifications),
-            'today_events': len([n for n in notifications if n['event_date'] == str(datetime.now().date())]),
-            'upcoming_events': len([n for n in notifications if n['event_date'] > str(datetime.now().date())]),
-            'notifications': notifications,
-            'filtered_by_department': department if department and department != 'all' else None
-        }
+        return await notification_cache.get_or_build(("upcoming", days_ahead, department), build)
         
     except Exception as e:
         print(f"Error getting upcoming events notifications: {e}")
@@ -1301,58 +1439,53 @@ async def get_upcoming_events_notifications(days_ahead: int = 2, department: str
 async def get_today_events_notifications():
     """Get today's events as notifications"""
     try:
-        upcoming_events = event_db.get_upcoming_events(days_ahead=0)  # Only today
-        
-        notifications = []
-        today_str = str(datetime.now().date())
-        
-        # Filter only today's events
-        for event in upcoming_events.get('college_events', []):
-            if event['event_date'] == today_str:
-                notifications.append({
-                    'id': f"college_event_{event['id']}",
-                    'type': 'college_event',
-                    'title': event['document_title'] or 'College Event Today',
-                    'message': f"Event today: {event['related_information'][:150]}..." if len(event.get('related_information', '')) > 150 else event.get('related_information', 'Event happening today'),
-                    'event_date': event['event_date'],
-                    'event_time': event['event_time'],
-                    'location': event['location'],
-                    'document_path': event.get('document_path'),
-                    'document_id': event['document_id'],
-                    'priority': 'urgent'
-                })
+        digest = digest_scheduler.current() if digest_scheduler else None
+        if digest is not None:
+            return digest.today
         
-        for department, events in upcoming_events.get('department_events', {}).items():
-            for event in events:
-                if event['event_date'] == today_str:
-                    notifications.append({
-                        'id': f"dept_event_{event['id']}",
-                        'type': 'department_event',
-                        'department': department,
-                        'title': event['document_title'] or f'{department} Event Today',
-                        'message': f"Event today: {event['related_information'][:150]}..." if len(event.get('related_information', '')) > 150 else event.get('related_information', 'Event happening today'),
-                        'event_date': event['event_date'],
-                        'event_time': event['event_time'],
-                        'location': event['location'],
-                        'document_path': event.get('document_path'),
-                        'document_id': event['document_id'],
-                        'priority': 'urgent'
-                    })
-        
-        # Sort by time
-        notifications.sort(key=lambda x: x['event_time'] or '23:59')
+        def build():
+            upcoming_events = event_db.get_upcoming_events(days_ahead=0)  # Only today
+            return build_today_notifications(upcoming_events)
         
-        return {
-            'success': True,
-            'date': today_str,
-            'total_events_today': len(notifications),
-            'notifications': notifications
-        }
+        return await notification_cache.get_or_build(("today",), build)
         
     except Exception as e:
         print(f"Error getting today's events notifications: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching today's notifications: {str(e)}")
 
+@app.get("/api/notifications/events/stream")
+async def stream_event_notifications(request: Request, department: str = None):
+    """Server-sent event stream of college-wide events and, if given, one department's events
+
+    Clients receive a snapshot of the upcoming window on connect, then an update whenever
+    events are stored or deleted, or enter the window at midnight.
+    """
+    subscription = notification_hub.subscribe(department)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=NOTIFICATION_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if message is None:
+                    break
+                yield format_sse(message)
+        finally:
+            notification_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Helper function to format chat responses
 def format_chat_response(response: str) -> str:
     """Format the AI response for better readability in chat interface"""
@@ -1385,97 +1518,22 @@ class CollegeInfoChatQuery(BaseModel):
     user_id: Optional[str] = "anonymous"
     session_id: Optional[str] = None
 
+@app.post("/api/college-info/reload")
+async def reload_college_info():
+    """Re-read the college knowledge file (it is also picked up automatically when it changes)"""
+    try:
+        result = await asyncio.to_thread(college_knowledge.load)
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading college information: {str(e)}")
+
 @app.post("/api/college-info/chat")
 async def college_info_chat(query_data: CollegeInfoChatQuery):
     """College information chatbot for the homepage - answers questions about MCE Hassan"""
     try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        # College context information
-        college_context = """
-        Malnad College of Engineering - Hassan 
-        
-        Malnad College of Engineering was established in the year 1960, during the second 5 year plan, as a joint venture of Government of India, Government of Karnataka and the Malnad Technical Education Society, Hassan.
-        
-        Leadership and Faculty:
-        - Principal (Chairman): Dr. H.J Amarendra serves as the Principal of MCE, Hassan.
-        - Director: Dr. Pradeep S is the Director of MCE, Hassan.
-        
-        Experts/Academicians from outside the college:
-        - Dr. H N Ramesh, Principal cum Director at The Oxford College of Engineering, Bengaluru
-        - Dr. H B Balakrishna, Principal at Global Academy of Technology, Bengaluru
-        - Mrs. Girija Kolagada, VP of Engineering at Progress Software (Chef Infra BU), Bengaluru
-        - Mr. Kiran N G, AI Consultant and Mentor from Bengaluru
-        
-        VTU Nominees:
-        - Dr. M S Ganesh Prasad, Academic Senate Member at VTU and Principal at Sai Vidya Institute of Technology, Bengaluru
-        - Dr. Naveen Prakash G V, Academic Senate Member at VTU, Chairperson of BOS in Mechanical Engineering at VTU, and HoD of Mechanical Engineering at VVCE, Mysuru
-        - Dr. T C Thanuja, Academic Senate Member at VTU and Professor of Electronics & Communication Engineering at VTU PG Centre, Muddenahalli
-        
-        Professor Emeritus: Dr. M T Venuraj serves as Professor Emeritus in Civil Engineering at MCE.
-        
-        Internal Members:
-        - Dr. H.J Amarendra as Dean (Planning & Development)
-        - Dr. Nanditha B.R. as Member Secretary & Dean (AA)
-        - Dr. A.A. Prasanna as Dean (Exams) and HoD of Physics
-        - Dr. Indira Bahaddur as Dean (SA)
-        - Dr. Madhu P as Dean (Research)
-        - Dr. Geetha Kiran A as Dean (CA) and CEO of ME-RIISE Foundation
-        - Dr. Raju S P as Associate Dean (P&D)
-        - Dr. Ramesh M as Associate Dean (AA)
-        - Dr. Murthy Mahadeva Naik.G as Associate Dean (Exams)
-        - Dr. Shivashankar B S as Associate Dean (SA)
-        - Dr. Yashas Gowda T.G as Associate Dean (Research)
-        - Dr. Mohana Lakshmi J as Associate Dean (CA)
-        
-        Heads of Departments:
-        - Dr. H S Narashiman for Civil Engineering
-        - Dr. Ezhil Vannan S for Mechanical Engineering
-        - Dr. S. Rajanna for E&E Engineering
-        - Dr. Padmaja Devi G for E&C Engineering
-        - Dr. J. Chandrika for CS & Engineering
-        - Dr. N E Ramesh for E&I Engineering
-        - Dr. Ananda Babu J for IS & Engineering
-        - Dr. Arjun B C for CS&E (AI&ML)
-        - Dr. Ramesh B for CS & BS
-        - Mrs. Margaret R E for MCA
-        - Dr. Kalavathi G.K. for First Year & Department of Mathematics
-        - Dr. Pradeep Kumar C B for Department of Chemistry
-        
-        Training & Placement Officer: Dr. Jeevan T P
-        
-        Programs Offered:
-        
-        UG Programs: The college offers nine undergraduate programs including Computer Science & Engineering, Computer Science & Engineering (Artificial Intelligence & Machine Learning), Computer Science and Business Systems, Robotics & Artificial Intelligence, Electronics & Communication Engineering, VLSI Design & Technology, Electrical & Electronics Engineering, Civil Engineering, and Mechanical Engineering.
-        
-        PG Programs: Five postgraduate programs are available: Digital Electronics & Communication Systems in the Electronics & Communication Engineering department, Computer Aided Design of Structures in Civil Engineering, Power & Energy System in Electrical & Electronics Engineering, Artificial Intelligence & Data Science in Information Science & Engineering, and MCA in Master of Computer Applications.
-        
-        Research Programs: The college offers Ph.D and M.Sc. Engineering by research programs.
-        
-        Student Enrollment and Placement Process:
-        Student enrollment for placement begins at the start of the fifth semester. A comprehensive database of enrolled students is maintained to facilitate hiring programs. Following enrollment, department-wise orientation sessions are conducted to highlight the significance of placements and related training. For the academic year 2024-25, till date 351 students have been successfully placed in reputed companies.
-        
-        Training and Skill Development Initiatives:
-        - An introductory session on career growth, planning, and available opportunities is conducted to the first year students.
-        - A mandatory credit course in Professional English is introduced in the first year, followed by training in communication and soft skills in subsequent years.
-        - A three-day "FEEL Employable" program is conducted in collaboration with CLHRD, Mangalore to enhance students' soft skills.
-        - A two-week intensive aptitude and soft skills training is organized after the sixth-semester exams, conducted by expert trainers. This program is also a mandatory credit course.
-        - A specialized crash course in C and C++ is provided to students from non-circuit branches to meet software industry requirements.
-        
-        Computer Science Department:
-        The Department of Computer Science & Engineering is headed by Dr. Chandrika.J and can be contacted at cse@mcehassan.ac.in. The department's vision is to become a prominent department of Computer Science & Engineering producing competent professionals with research and innovation skills, inculcating moral values and societal responsibility. The mission includes imparting world class engineering education to produce technically competent engineers, providing facilities and expertise in advanced computer technology to promote research, enhancing industry readiness and entrepreneurial abilities through innovative skills, and nurturing ethical values and social responsibilities.
-        
-        Department of Civil Engineering:
-        The Department of Civil Engineering is headed by Dr. H. S. Narashimhan and can be contacted at ce@mcehassan.ac.in. The department's vision is to be a Centre of Excellence in industry-oriented teaching, training, research, professional ethics, social responsibility, and continuing education for practicing engineers through sponsored research and consultancy services. The mission includes improvising the curriculum to include contents pertaining to the situational experience of a variety of sites and developing a sense of social responsibility and enhancing the research orientation of students through internship programs, enhancing sponsored research and consultancy works to achieve effective industry-institute-interaction and conducting a Continuing Education Programme for practicing engineers, and inculcating professional ethics through quality and modern construction practices.
-        
-        Clubs Available in MCE:
-        The college has various clubs including Eco Club, Leo Club, Literary Club, Rotaract Club, Devops Club, Spicmacay, Science Association, Technical Club, FOSS Club, and IUCEE EWB CHAPTER.
-        
-        Malnad College of Engineering Hassan Library:
-        The library staff includes Mr. D R Shankar as In-charge Librarian (contact: 9740595772), Smt. H. S Bharathi as F.D.A (contact: 7975895644), Mr. K.V Shivarak as F.D.A (contact: 7795735201), Mr. H. S Prathap as S.D.A (contact: 9986025588), and Mr. M.K Padmaraju as S.D.A (contact: 8453972117).
-        """
+        # Only the sections of the college knowledge base relevant to this question
+        sections = await asyncio.to_thread(college_knowledge.search, query_data.query)
+        college_context = "\n\n".join(f"{section['title']}:\n{section['body']}" for section in sections)
         
         # Create system prompt with college context
         system_prompt = f"""
@@ -1503,17 +1561,27 @@ async def college_info_chat(query_data: CollegeInfoChatQuery):
         """
         
         # Generate response using OpenAI
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query_data.query}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        ai_response = response.choices[0].message.content
+        degraded = False
+        try:
+            response = await llm_gateway.chat(
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query_data.query}
+                ],
+                temperature=0.7,
+                max_tokens=500
+            )
+            ai_response = response.choices[0].message.content
+        except Exception as e:
+            if not sections:
+                raise
+            # Model unavailable: answer with the matching sections of the knowledge base
+            print(f"College info chat answering from the knowledge base: {str(e)}")
+            passages = [{"text": section["body"], "title": section["title"]} for section in sections]
+            ai_response = ("Here is what I found about MCE Hassan:\n\n"
+                           + extractive_answer(query_data.query, passages, max_sentences=5))
+            degraded = True
         
         # Format the response for better readability
         formatted_response = format_chat_response(ai_response)
@@ -1522,7 +1590,8 @@ async def college_info_chat(query_data: CollegeInfoChatQuery):
             "success": True,
             "response": formatted_response,
             "query": query_data.query,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "degraded": degraded
         }
         
     except Exception as e:
@@ -1544,10 +1613,6 @@ class SimpleChatQuery(BaseModel):
 async def simple_ai_chat(query_data: SimpleChatQuery):
     """Simple AI chatbot that responds differently based on user role"""
     try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
         query = query_data.query
         role = query_data.role.lower()
         department = query_data.department or "your department"
@@ -1585,8 +1650,8 @@ async def simple_ai_chat(query_data: SimpleChatQuery):
             system_prompt = """You are a helpful AI assistant for college staff. Provide professional, informative, and supportive responses appropriate for an educational environment."""
         
         # Generate response
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await llm_gateway.chat(
+            model=CHAT_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": query}
@@ -1611,80 +1676,90 @@ async def simple_ai_chat(query_data: SimpleChatQuery):
         raise HTTPException(status_code=500, detail=f"AI chat error: {str(e)}")
 
 # File serving endpoints
+# Stored file names start with the document id, so a URL always names the same bytes
+UPLOAD_CACHE_MAX_AGE = int(os.getenv("UPLOAD_CACHE_MAX_AGE", 86400))
+UPLOAD_URL_SCOPES = {
+    "college_events": "college_event",
+    "department_events": "department_event",
+    "subject_documents": "document"
+}
+
+def _resolve_upload(path: str) -> Optional[tuple]:
+    """(stored file, original filename) for an /uploads URL, or None.
+
+    URLs end in <document_id>_<filename>, which is a single catalog lookup. Older URLs
+    without the id are matched against the catalog entries of their scope by filename.
+    """
+    parts = path.split("/")
+    stored_name = parts[-1]
+
+    document_id, _, filename = stored_name.partition("_")
+    entry = vector_db.get_catalog_entry(document_id) if filename else None
+    if entry and entry.get("file_path") and entry.get("filename") == filename:
+        file_path = Path(entry["file_path"])
+        return (file_path, filename) if file_path.is_file() else None
+
+    # Legacy URL: college_events/<name>, department_events/<Dept>/<name>, subject_documents/<Dept>/<Subject>/<name>
+    scope = UPLOAD_URL_SCOPES.get(parts[0])
+    if scope is None:
+        return None
+    for entry in vector_db.find_documents_by_filename(stored_name, scope):
+        department = (entry.get("department") or "").replace(" ", "")
+        subject = (entry.get("subject") or "").replace(" ", "_")
+        if scope == "department_event" and (len(parts) < 3 or parts[1] != department):
+            continue
+        if scope == "document" and (len(parts) < 4 or parts[1] != department or parts[2] != subject):
+            continue
+        file_path = Path(entry["file_path"]) if entry.get("file_path") else None
+        if file_path and file_path.is_file():
+            return file_path, stored_name
+    return None
+
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Whether the client's cached copy (If-None-Match / If-Modified-Since) is current"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
 @app.get("/uploads/{path:path}")
-async def serve_uploaded_file(path: str):
-    """Serve uploaded files from the storage directory"""
+async def serve_uploaded_file(path: str, request: Request):
+    """Serve an uploaded file with its content type, cache validators and Range support"""
     try:
-        # Handle different path patterns:
-        # - college_events/filename.pdf
-        # - department_events/DepartmentName/filename.pdf
-        # - subject_documents/DepartmentName/SubjectName/filename.pdf
-        
-        if "/" in path:
-            parts = path.split("/")
-            
-            if parts[0] == "subject_documents" and len(parts) >= 4:
-                # For subject documents: subject_documents/DepartmentName/SubjectName/filename.pdf
-                folder = parts[0]  # subject_documents
-                department = parts[1]  # DepartmentName
-                subject = parts[2]  # SubjectName
-                filename = "/".join(parts[3:])  # Handle nested paths in filename
-                
-                # Check in storage/uploads/subject_documents/DepartmentName/SubjectName/ directory
-                storage_path = Path("storage") / "uploads" / folder / department / subject
-                
-            elif parts[0] == "department_events" and len(parts) >= 3:
-                # For department events: department_events/DepartmentName/filename.pdf
-                folder = parts[0]  # department_events
-                department = parts[1]  # DepartmentName
-                filename = "/".join(parts[2:])  # Handle nested paths in filename
-                
-                # Check in storage/uploads/department_events/DepartmentName/ directory
-                storage_path = Path("storage") / "uploads" / folder / department
-                
-            elif len(parts) >= 2:
-                # For college events: college_events/filename.pdf
-                folder = parts[0]  # college_events
-                filename = "/".join(parts[1:])  # Handle nested paths in filename
-                
-                # Check in storage/uploads/folder/ directory
-                storage_path = Path("storage") / "uploads" / folder
-            else:
-                # Fallback for single part paths
-                storage_path = Path("storage") / "uploads"
-                filename = path
-                
-            if storage_path.exists():
-                # Look for files that end with the requested filename (to handle UUID prefixes)
-                for file in storage_path.glob(f"*{filename}"):
-                    if file.is_file():
-                        return FileResponse(
-                            path=str(file),
-                            filename=filename,  # Use original filename without UUID
-                            media_type='application/octet-stream'
-                        )
-                
-                # Also try exact filename match
-                exact_file = storage_path / filename
-                if exact_file.exists() and exact_file.is_file():
-                    return FileResponse(
-                        path=str(exact_file),
-                        filename=filename,
-                        media_type='application/octet-stream'
-                    )
-        
-        # Fallback: try direct path in storage
-        fallback_path = Path("storage") / path
-        if fallback_path.exists() and fallback_path.is_file():
-            print(f"Found file via fallback path: {fallback_path}")
-            return FileResponse(
-                path=str(fallback_path),
-                filename=fallback_path.name,
-                media_type='application/octet-stream'
-            )
+        resolved = await asyncio.to_thread(_resolve_upload, path)
+        if resolved is None:
+            print(f"File not found for path: {path}")
+            raise HTTPException(status_code=404, detail=f"File not found: {path}")
+        
+        file_path, filename = resolved
+        stat_result = file_path.stat()
+        etag = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "Cache-Control": f"private, max-age={UPLOAD_CACHE_MAX_AGE}"
+        }
         
-        print(f"File not found for path: {path}")
-        raise HTTPException(status_code=404, detail=f"File not found: {path}")
+        if _is_not_modified(request, etag, stat_result.st_mtime):
+            return Response(status_code=304, headers=headers)
+        
+        # FileResponse answers Range requests (206) itself; inline so the PDF viewer can open it
+        return FileResponse(
+            path=str(file_path),
+            filename=filename,
+            media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            headers=headers,
+            stat_result=stat_result,
+            content_disposition_type="inline"
+        )
         
     except HTTPException:
         raise
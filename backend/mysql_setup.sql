@@ -9,9 +9,16 @@ COLLATE utf8mb4_unicode_ci;
 -- Use the database
 USE ai_eventmanager_events;
 
--- Create admin events table (for college-wide events)
-CREATE TABLE IF NOT EXISTS admin_events (
+-- Create events table (college-wide and department events in one table)
+-- Keep in sync with Step 1 of mysql_unified_events_migration.sql
+-- College events: scope = 'college', department = ''
+-- Department events: scope = 'department', department = display name,
+--                    department_key = lowercase name with spaces/hyphens replaced by '_'
+CREATE TABLE IF NOT EXISTS events (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    scope VARCHAR(20) NOT NULL,
+    department VARCHAR(255) NOT NULL DEFAULT '',
+    department_key VARCHAR(255) NOT NULL DEFAULT '',
     document_id VARCHAR(255) NOT NULL,
     document_title VARCHAR(500),
     event_date DATE,
@@ -19,59 +26,16 @@ CREATE TABLE IF NOT EXISTS admin_events (
     event_time TIME NULL,
     location VARCHAR(500) NULL,
     document_path VARCHAR(1000) NULL,
+    legacy_table VARCHAR(255) NULL,
+    legacy_id INT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_document_id (document_id),
-    INDEX idx_event_date (event_date)
-) ENGINE=InnoDB;
-
--- Example department tables - each department gets its own table
--- Computer Science Events
-CREATE TABLE IF NOT EXISTS computer_science_events (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    document_id VARCHAR(255) NOT NULL,
-    document_title VARCHAR(500),
-    event_date DATE,
-    related_information TEXT,
-    event_time TIME NULL,
-    location VARCHAR(500) NULL,
-    document_path VARCHAR(1000) NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_document_id (document_id),
-    INDEX idx_event_date (event_date)
-) ENGINE=InnoDB;
-
--- Mechanical Engineering Events
-CREATE TABLE IF NOT EXISTS mechanical_events (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    document_id VARCHAR(255) NOT NULL,
-    document_title VARCHAR(500),
-    event_date DATE,
-    related_information TEXT,
-    event_time TIME NULL,
-    location VARCHAR(500) NULL,
-    document_path VARCHAR(1000) NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_document_id (document_id),
-    INDEX idx_event_date (event_date)
-) ENGINE=InnoDB;
-
--- Electronics & Communication Events
-CREATE TABLE IF NOT EXISTS electronics_events (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    document_id VARCHAR(255) NOT NULL,
-    document_title VARCHAR(500),
-    event_date DATE,
-    related_information TEXT,
-    event_time TIME NULL,
-    location VARCHAR(500) NULL,
-    document_path VARCHAR(1000) NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_document_id (document_id),
-    INDEX idx_event_date (event_date)
+    INDEX idx_event_date (event_date, event_time),
+    INDEX idx_scope_department_date (scope, department_key, event_date, event_time),
+    INDEX idx_scope_department_date_id (scope, department_key, event_date, id),
+    FULLTEXT INDEX ft_event_text (document_title, related_information, location),
+    UNIQUE KEY uq_legacy_row (legacy_table, legacy_id)
 ) ENGINE=InnoDB;
 
 -- Show created tables
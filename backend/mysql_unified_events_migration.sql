@@ -0,0 +1,117 @@
+-- AI Event Manager - Unified Events Table Migration
+-- Moves events from admin_events and every per-department <dept>_events table into the single events table.
+-- The backend runs the same migration automatically at startup (_migrate_legacy_tables in
+-- event_backends.py); this script is for running it by hand before starting the new backend.
+-- Each legacy table is migrated once and recorded in event_migrations, exactly as the startup
+-- migration does, so running this script and then starting the backend does not copy rows twice.
+
+USE ai_eventmanager_events;
+
+-- Step 1: Create the unified events table (keep in sync with mysql_setup.sql)
+CREATE TABLE IF NOT EXISTS events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    scope VARCHAR(20) NOT NULL,
+    department VARCHAR(255) NOT NULL DEFAULT '',
+    department_key VARCHAR(255) NOT NULL DEFAULT '',
+    document_id VARCHAR(255) NOT NULL,
+    document_title VARCHAR(500),
+    event_date DATE,
+    related_information TEXT,
+    event_time TIME NULL,
+    location VARCHAR(500) NULL,
+    document_path VARCHAR(1000) NULL,
+    legacy_table VARCHAR(255) NULL,
+    legacy_id INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_document_id (document_id),
+    INDEX idx_event_date (event_date, event_time),
+    INDEX idx_scope_department_date (scope, department_key, event_date, event_time),
+    INDEX idx_scope_department_date_id (scope, department_key, event_date, id),
+    FULLTEXT INDEX ft_event_text (document_title, related_information, location),
+    UNIQUE KEY uq_legacy_row (legacy_table, legacy_id)
+) ENGINE=InnoDB;
+
+-- Legacy tables already migrated (shared with the startup migration)
+CREATE TABLE IF NOT EXISTS event_migrations (
+    legacy_table VARCHAR(255) PRIMARY KEY,
+    migrated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- Step 2: Migrate every table returned by SHOW TABLES LIKE '%\_events' that is not migrated yet
+-- admin_events    -> scope 'college', empty department
+-- <dept>_events   -> scope 'department', department_key <dept>, and the department name its
+--                    events already use, else the title-cased key
+--                    (computer_science_events -> 'Computer Science', 'computer_science')
+-- The backend renames migrated events to the name a user first uploads the department's events under
+DROP PROCEDURE IF EXISTS migrate_legacy_event_tables;
+
+DELIMITER //
+CREATE PROCEDURE migrate_legacy_event_tables()
+BEGIN
+    DECLARE done INT DEFAULT FALSE;
+    DECLARE legacy VARCHAR(255);
+    DECLARE rest VARCHAR(255);
+    DECLARE word VARCHAR(255);
+    DECLARE legacy_tables CURSOR FOR
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name LIKE '%\_events'
+          AND table_name NOT IN (SELECT legacy_table FROM event_migrations);
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET done = TRUE;
+
+    OPEN legacy_tables;
+    migrate_loop: LOOP
+        FETCH legacy_tables INTO legacy;
+        IF done THEN
+            LEAVE migrate_loop;
+        END IF;
+
+        IF legacy = 'admin_events' THEN
+            SET @scope = 'college', @department = '', @department_key = '';
+        ELSE
+            SET @scope = 'department';
+            SET @department_key = LEFT(legacy, CHAR_LENGTH(legacy) - CHAR_LENGTH('_events'));
+            -- Keep the name the backend already stores this department's events under, if any
+            SET @department = (SELECT department FROM events
+                               WHERE scope = 'department' AND department_key = @department_key
+                                 AND legacy_table IS NULL
+                               LIMIT 1);
+            IF @department IS NULL THEN
+                SET @department = '', rest = @department_key;
+                WHILE rest <> '' DO
+                    SET word = SUBSTRING_INDEX(rest, '_', 1);
+                    SET rest = IF(LOCATE('_', rest) > 0, SUBSTRING(rest, LOCATE('_', rest) + 1), '');
+                    SET @department = CONCAT_WS(' ', NULLIF(@department, ''),
+                                                CONCAT(UPPER(LEFT(word, 1)), LOWER(SUBSTRING(word, 2))));
+                END WHILE;
+            END IF;
+        END IF;
+
+        SET @legacy_table = legacy;
+        SET @migrate_sql = CONCAT(
+            'INSERT IGNORE INTO events (scope, department, department_key, document_id, document_title, event_date, ',
+            'related_information, event_time, location, document_path, legacy_table, legacy_id, created_at, updated_at) ',
+            'SELECT ?, ?, ?, document_id, document_title, event_date, related_information, event_time, location, ',
+            'document_path, ?, id, created_at, updated_at FROM `', REPLACE(legacy, '`', '``'), '`'
+        );
+        PREPARE migrate_stmt FROM @migrate_sql;
+        EXECUTE migrate_stmt USING @scope, @department, @department_key, @legacy_table;
+        DEALLOCATE PREPARE migrate_stmt;
+
+        INSERT INTO event_migrations (legacy_table) VALUES (legacy);
+    END LOOP;
+    CLOSE legacy_tables;
+END //
+DELIMITER ;
+
+CALL migrate_legacy_event_tables();
+DROP PROCEDURE migrate_legacy_event_tables;
+
+-- Verify
+SELECT scope, department, department_key, COUNT(*) AS events FROM events GROUP BY scope, department, department_key;
+SELECT legacy_table, migrated_at FROM event_migrations ORDER BY legacy_table;
+DESCRIBE events;
+
+-- Step 3: Drop the old tables once the migrated data has been verified
+-- This lists one DROP statement per migrated table; review and run them by hand
+SELECT CONCAT('DROP TABLE IF EXISTS `', legacy_table, '`;') AS cleanup FROM event_migrations;
@@ -0,0 +1,551 @@
+"""
+Event Notifications
+Builds notification payloads from upcoming events, materializes daily digests,
+caches ad-hoc payloads per request shape and pushes new events to subscribed clients
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from event_database import department_key
+
+# Seconds a cached notification payload is served before it is rebuilt from the database
+NOTIFICATION_CACHE_TTL = float(os.getenv("NOTIFICATION_CACHE_TTL", 30))
+
+# Digest window materialized by the scheduler, and the window the endpoints use by default
+NOTIFICATION_DIGEST_DAYS_AHEAD = int(os.getenv("NOTIFICATION_DIGEST_DAYS_AHEAD", 7))
+NOTIFICATION_DEFAULT_DAYS_AHEAD = 2
+NOTIFICATION_DIGEST_RETRY_SECONDS = float(os.getenv("NOTIFICATION_DIGEST_RETRY_SECONDS", 60))
+# Longest a digest is served without confirming the events table is unchanged; other worker
+# processes' inserts and deletes are picked up within this window
+NOTIFICATION_DIGEST_REFRESH_SECONDS = float(
+    os.getenv("NOTIFICATION_DIGEST_REFRESH_SECONDS", NOTIFICATION_CACHE_TTL)
+)
+
+# Push stream settings: window pushed to subscribers, per-client buffer and keep-alive interval
+NOTIFICATION_STREAM_DAYS_AHEAD = int(os.getenv("NOTIFICATION_STREAM_DAYS_AHEAD", 2))
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", 100))
+NOTIFICATION_HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_HEARTBEAT_SECONDS", 15))
+
+
+def _truncate(text: Optional[str], limit: int, prefix: str = "", default: str = "Event notification") -> str:
+    """Shorten event descriptions for notification messages"""
+    text = text or ""
+    if len(text) > limit:
+        return f"{prefix}{text[:limit]}..."
+    return text or default
+
+
+def build_upcoming_notifications(upcoming_events: Dict[str, Any], department: Optional[str] = None,
+                                 today_str: Optional[str] = None) -> Dict[str, Any]:
+    """Format upcoming events as notifications, optionally filtered to one department"""
+    today_str = today_str or str(datetime.now().date())
+    notifications = []
+
+    # Add college events notifications
+    college_events = upcoming_events.get('college_events', [])
+    if not department or department == 'all' or department == 'college':
+        for event in college_events:
+            notifications.append({
+                'id': f"college_event_{event['id']}",
+                'type': 'college_event',
+                'title': event['document_title'] or 'College Event',
+                'message': _truncate(event.get('related_information'), 200),
+                'event_date': event['event_date'],
+                'event_time': event['event_time'],
+                'location': event['location'],
+                'document_path': event.get('document_path'),
+                'document_id': event['document_id'],
+                'created_at': event['created_at'],
+                'priority': 'high' if event['event_date'] == today_str else 'medium'
+            })
+
+    # Add department events notifications
+    department_events = upcoming_events.get('department_events', {})
+
+    for dept_name, events in department_events.items():
+        # Apply department filter if specified
+        if department and department != 'all' and department != 'college' and department != dept_name:
+            continue
+        
+        for event in events:
+            notifications.append({
+                'id': f"dept_event_{event['id']}",
+                'type': 'department_event',
+                'department': dept_name,
+                'title': event['document_title'] or f'{dept_name} Event',
+                'message': _truncate(event.get('related_information'), 200),
+                'event_date': event['event_date'],
+                'event_time': event['event_time'],
+                'location': event['location'],
+                'document_path': event.get('document_path'),
+                'document_id': event['document_id'],
+                'created_at': event['created_at'],
+                'priority': 'high' if event['event_date'] == today_str else 'medium'
+            })
+
+    # Sort by date and time
+    notifications.sort(key=lambda x: (x['event_date'] or '9999-12-31', x['event_time'] or '23:59'))
+
+    return {
+        'success': True,
+        'total_notifications': len(notifications),
+        'today_events': len([n for n in notifications if n['event_date'] == today_str]),
+        'upcoming_events': len([n for n in notifications if n['event_date'] > today_str]),
+        'notifications': notifications,
+        'filtered_by_department': department if department and department != 'all' else None
+    }
+
+
+def build_today_notifications(upcoming_events: Dict[str, Any], today_str: Optional[str] = None) -> Dict[str, Any]:
+    """Format today's events as urgent notifications"""
+    today_str = today_str or str(datetime.now().date())
+    notifications = []
+
+    # Filter only today's events
+    for event in upcoming_events.get('college_events', []):
+        if event['event_date'] == today_str:
+            notifications.append({
+                'id': f"college_event_{event['id']}",
+                'type': 'college_event',
+                'title': event['document_title'] or 'College Event Today',
+                'message': _truncate(event.get('related_information'), 150, "Event today: ", 'Event happening today'),
+                'event_date': event['event_date'],
+                'event_time': event['event_time'],
+                'location': event['location'],
+                'document_path': event.get('document_path'),
+                'document_id': event['document_id'],
+                'priority': 'urgent'
+            })
+
+    for department, events in upcoming_events.get('department_events', {}).items():
+        for event in events:
+            if event['event_date'] == today_str:
+                notifications.append({
+                    'id': f"dept_event_{event['id']}",
+                    'type': 'department_event',
+                    'department': department,
+                    'title': event['document_title'] or f'{department} Event Today',
+                    'message': _truncate(event.get('related_information'), 150, "Event today: ", 'Event happening today'),
+                    'event_date': event['event_date'],
+                    'event_time': event['event_time'],
+                    'location': event['location'],
+                    'document_path': event.get('document_path'),
+                    'document_id': event['document_id'],
+                    'priority': 'urgent'
+                })
+
+    # Sort by time
+    notifications.sort(key=lambda x: x['event_time'] or '23:59')
+
+    return {
+        'success': True,
+        'date': today_str,
+        'total_events_today': len(notifications),
+        'notifications': notifications
+    }
+
+
+class NotificationCache:
+    def __init__(self, ttl: float = NOTIFICATION_CACHE_TTL):
+        """In-process cache of notification payloads.
+        
+        Entries are keyed by the request shape plus today's date, so they roll over at
+        midnight; invalidate() clears everything when events are stored or deleted.
+        """
+        self.ttl = ttl
+        self._entries: Dict[Hashable, tuple] = {}  # key -> (payload, expires_at, generation)
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._date = None
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self, change: Optional[Dict[str, Any]] = None):
+        """Drop all cached payloads (usable directly as an EventDatabase change listener)"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    async def get_or_build(self, key: Hashable, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the cached payload for key, building it in a worker thread on a miss.
+        
+        Concurrent misses for the same key share a single build.
+        """
+        today = str(datetime.now().date())
+        full_key = (today, key)
+        
+        with self._lock:
+            if self._date != today:
+                # Date rolled over: yesterday's "today" and "upcoming" windows are stale
+                self._entries.clear()
+                self._date = today
+            entry = self._entries.get(full_key)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+        
+        in_flight = self._in_flight.get(full_key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[full_key] = future
+        try:
+            payload = await asyncio.to_thread(build)
+            with self._lock:
+                # Skip storing a payload built from data that was invalidated meanwhile
+                if generation == self._generation:
+                    self._entries[full_key] = (payload, time.monotonic() + self.ttl, generation)
+            future.set_result(payload)
+            return payload
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve the exception so asyncio does not warn when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(full_key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache hit/miss counters"""
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations
+            }
+
+
+class NotificationDigest:
+    def __init__(self, date_str: str, days_ahead: int, upcoming_events: Dict[str, Any],
+                 default_days_ahead: int = NOTIFICATION_DEFAULT_DAYS_AHEAD):
+        """Immutable snapshot of the notification window for one date.
+        
+        The "today" digest and the default window for college-wide, all-department and
+        each department's view are built up front; other windows are derived on demand.
+        """
+        self.date = date_str
+        self.days_ahead = days_ahead
+        self.generated_at = datetime.now().isoformat()
+        self._upcoming_events = upcoming_events
+        self.departments = sorted(upcoming_events.get('department_events', {}).keys())
+        
+        self.today = build_today_notifications(upcoming_events, date_str)
+        self._upcoming_digests: Dict[tuple, Dict[str, Any]] = {}
+        if default_days_ahead <= days_ahead:
+            for department in [None, 'college'] + self.departments:
+                self.upcoming_notifications(default_days_ahead, department)
+
+    def upcoming_notifications(self, days_ahead: int, department: Optional[str] = None) -> Dict[str, Any]:
+        """Notifications from today to days_ahead (at most the digest window) for one view"""
+        days_ahead = min(days_ahead, self.days_ahead)
+        department = None if department == 'all' else department
+        key = (days_ahead, department)
+        
+        payload = self._upcoming_digests.get(key)
+        if payload is None:
+            payload = build_upcoming_notifications(self._window(days_ahead), department, self.date)
+            # Only memoize views that exist so arbitrary department names can't grow the digest
+            if department in (None, 'college') or department in self.departments:
+                self._upcoming_digests[key] = payload
+        return payload
+
+    def _window(self, days_ahead: int) -> Dict[str, Any]:
+        if days_ahead >= self.days_ahead:
+            return self._upcoming_events
+        
+        end_str = str(datetime.strptime(self.date, "%Y-%m-%d").date() + timedelta(days=days_ahead))
+        in_window = lambda events: [e for e in events if e['event_date'] and e['event_date'] <= end_str]
+        
+        department_events = {}
+        for department, events in self._upcoming_events.get('department_events', {}).items():
+            events = in_window(events)
+            if events:
+                department_events[department] = events
+        
+        return {
+            'college_events': in_window(self._upcoming_events.get('college_events', [])),
+            'department_events': department_events
+        }
+
+
+class DigestScheduler:
+    def __init__(self, fetch_upcoming: Callable[..., Dict[str, Any]],
+                 fetch_version: Optional[Callable[[], Any]] = None,
+                 days_ahead: int = NOTIFICATION_DIGEST_DAYS_AHEAD,
+                 refresh_seconds: float = NOTIFICATION_DIGEST_REFRESH_SECONDS):
+        """Background task that rebuilds the notification digest at midnight and after each ingest.
+        
+        Event changes in this process only wake the task, so a burst of inserts costs a single
+        query. Changes made by other worker processes are found by polling fetch_version (a
+        cheap fingerprint of the events table) every half refresh_seconds; without it the
+        digest is simply rebuilt that often. A digest not confirmed within refresh_seconds is
+        not served.
+        """
+        self._fetch_upcoming = fetch_upcoming
+        self._fetch_version = fetch_version
+        self.days_ahead = days_ahead
+        self.refresh_seconds = refresh_seconds
+        self.digest: Optional[NotificationDigest] = None
+        self._version = None
+        self._verified_at = 0.0
+        self._listeners: List[Callable[[NotificationDigest], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.rebuilds = 0
+        self.version_checks = 0
+        self.failures = 0
+        self.last_build_ms = 0.0
+
+    def add_listener(self, listener: Callable[[NotificationDigest], None]):
+        """Register a callback run on the event loop with every new digest"""
+        self._listeners.append(listener)
+
+    def current(self) -> Optional[NotificationDigest]:
+        """The digest for today, or None before the first build, until the post-midnight rebuild
+        or when it has not been confirmed fresh within refresh_seconds"""
+        digest = self.digest
+        if digest is None or digest.date != str(datetime.now().date()):
+            return None
+        if time.monotonic() - self._verified_at > self.refresh_seconds:
+            return None
+        return digest
+
+    def start(self):
+        """Start the scheduler task on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the scheduler task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify_change(self, change: Optional[Dict[str, Any]] = None):
+        """Schedule a rebuild - thread-safe, usable directly as an EventDatabase change listener"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _read_version(self):
+        if self._fetch_version is None:
+            return None
+        try:
+            return await asyncio.to_thread(self._fetch_version)
+        except Exception as e:
+            print(f"Error reading events change version: {e}")
+            return None
+
+    async def refresh(self, force: bool = False):
+        """Rebuild when forced, on a new date or when the events table changed in any process;
+        otherwise only mark the current digest as confirmed fresh"""
+        version = await self._read_version()
+        digest = self.digest
+        if (force or version is None or version != self._version
+                or digest is None or digest.date != str(datetime.now().date())):
+            await self.rebuild(version)
+        else:
+            self.version_checks += 1
+            self._verified_at = time.monotonic()
+
+    async def rebuild(self, version=None):
+        """Query the window once and swap in a new digest (version: the table fingerprint read
+        before the query, so changes made during the build trigger another one)"""
+        started = time.monotonic()
+        today_str = str(datetime.now().date())
+        upcoming = await asyncio.to_thread(self._fetch_upcoming, days_ahead=self.days_ahead)
+        digest = await asyncio.to_thread(NotificationDigest, today_str, self.days_ahead, upcoming)
+        
+        self.digest = digest
+        self._version = version
+        self._verified_at = started
+        self.rebuilds += 1
+        self.last_build_ms = round((time.monotonic() - started) * 1000, 2)
+        
+        for listener in self._listeners:
+            try:
+                listener(digest)
+            except Exception as e:
+                print(f"Error in notification digest listener: {e}")
+
+    async def _run(self):
+        force = True
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refresh(force)
+                failed = False
+            except Exception as e:
+                self.failures += 1
+                failed = True
+                print(f"Error rebuilding notification digest: {e}")
+            
+            # Sleep until something changes here, the next freshness check or the date rolls over
+            # (retry sooner after a failure)
+            now = datetime.now()
+            next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            timeout = min((next_midnight - now).total_seconds() + 1, self.refresh_seconds / 2)
+            if failed:
+                timeout = min(timeout, NOTIFICATION_DIGEST_RETRY_SECONDS)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                force = True
+            except asyncio.TimeoutError:
+                force = False
+
+    def metrics(self) -> Dict[str, Any]:
+        """Digest freshness and rebuild counters"""
+        digest = self.digest
+        return {
+            "date": digest.date if digest else None,
+            "generated_at": digest.generated_at if digest else None,
+            "days_ahead": self.days_ahead,
+            "refresh_seconds": self.refresh_seconds,
+            "age_seconds": round(time.monotonic() - self._verified_at, 1) if digest else None,
+            "rebuilds": self.rebuilds,
+            "version_checks": self.version_checks,
+            "failures": self.failures,
+            "last_build_ms": self.last_build_ms
+        }
+
+
+class Subscription:
+    def __init__(self, department: Optional[str], queue_size: int):
+        """A connected client listening for college-wide events and, optionally, one department's events"""
+        self.department = department
+        self.department_key = department_key(department) if department and department != 'all' else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, notification: Dict[str, Any]) -> bool:
+        """Whether a notification is relevant to this subscriber"""
+        if self.department_key is None or notification['type'] == 'college_event':
+            return True
+        if self.department_key == 'college':
+            return False
+        return department_key(notification.get('department') or '') == self.department_key
+
+
+class NotificationHub:
+    def __init__(self, days_ahead: int = NOTIFICATION_STREAM_DAYS_AHEAD,
+                 queue_size: int = NOTIFICATION_STREAM_QUEUE_SIZE):
+        """Fan out event notifications to connected clients.
+        
+        Fed by DigestScheduler: every new digest is diffed against the previous one and
+        only the notifications that entered or left the window are pushed.
+        """
+        self.days_ahead = days_ahead
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._current: Optional[Dict[str, Dict[str, Any]]] = None  # notification id -> notification
+        self._date: Optional[str] = None
+        
+        # Metrics
+        self.updates = 0
+        self.messages_sent = 0
+        self.dropped_subscribers = 0
+
+    def close(self):
+        """End every open stream"""
+        for subscription in list(self._subscribers):
+            self._close_subscription(subscription)
+
+    def subscribe(self, department: Optional[str] = None) -> Subscription:
+        """Register a client; it first receives a snapshot of the current window"""
+        subscription = Subscription(department, self.queue_size)
+        self._subscribers.add(subscription)
+        if self._current is not None:
+            subscription.queue.put_nowait({
+                'type': 'snapshot',
+                'date': self._date,
+                'notifications': [n for n in self._current.values() if subscription.wants(n)]
+            })
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Forget a disconnected client"""
+        self._subscribers.discard(subscription)
+
+    def publish_digest(self, digest: "NotificationDigest"):
+        """Push what changed since the previous digest to every interested subscriber"""
+        notifications = digest.upcoming_notifications(self.days_ahead)['notifications']
+        self.updates += 1
+        
+        previous, self._current = self._current, {n['id']: n for n in notifications}
+        self._date = digest.date
+        if previous is None:
+            # First digest: clients that connected before it still get their snapshot
+            for subscription in list(self._subscribers):
+                self._publish(subscription, {
+                    'type': 'snapshot',
+                    'date': digest.date,
+                    'notifications': [n for n in notifications if subscription.wants(n)]
+                })
+            return
+        
+        added = [n for n in notifications if n['id'] not in previous]
+        removed = [n for notification_id, n in previous.items() if notification_id not in self._current]
+        if not added and not removed:
+            return
+        
+        for subscription in list(self._subscribers):
+            subscription_added = [n for n in added if subscription.wants(n)]
+            subscription_removed = [n['id'] for n in removed if subscription.wants(n)]
+            if subscription_added or subscription_removed:
+                self._publish(subscription, {
+                    'type': 'update',
+                    'date': digest.date,
+                    'notifications': subscription_added,
+                    'removed': subscription_removed
+                })
+
+    def _publish(self, subscription: Subscription, message: Dict[str, Any]):
+        try:
+            subscription.queue.put_nowait(message)
+            self.messages_sent += 1
+        except asyncio.QueueFull:
+            # A client that stopped reading is disconnected rather than buffered without bound
+            self.dropped_subscribers += 1
+            self._close_subscription(subscription)
+
+    def _close_subscription(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Subscriber and producer counters"""
+        return {
+            "subscribers": len(self._subscribers),
+            "updates": self.updates,
+            "messages_sent": self.messages_sent,
+            "dropped_subscribers": self.dropped_subscribers
+        }
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    """Encode a hub message as a server-sent event"""
+    return f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
@@ -0,0 +1,129 @@
+"""
+OpenAI Clients
+One process-wide sync and async OpenAI client over pooled keep-alive HTTP connections,
+with the base URL, timeouts and model names taken from the environment so an
+OpenAI-compatible stand-in can be pointed at for local runs and benchmarks
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict
+
+import httpx
+
+# Upstream endpoint (None: api.openai.com) and models of each kind of call
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-3.5-turbo")
+EVENT_EXTRACTION_MODEL = os.getenv("OPENAI_EXTRACTION_MODEL", "gpt-4o-mini")
+EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
+
+# Default request timeout (the LLM gateway sets one per attempt) and connect timeout
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 30))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5))
+
+# Connection pool shared by all requests of the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 60))
+
+_lock = threading.Lock()
+_sync_client = None
+_async_client = None
+_async_loop = None
+
+
+def request_timeout(timeout: float = OPENAI_TIMEOUT) -> httpx.Timeout:
+    """httpx timeout of one request, with connecting capped separately"""
+    return httpx.Timeout(timeout, connect=min(timeout, OPENAI_CONNECT_TIMEOUT))
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+    )
+
+
+def _api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is required")
+    return api_key
+
+
+def get_openai_client():
+    """Shared blocking client (embeddings and other calls made from worker threads)"""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            from openai import OpenAI
+            _sync_client = OpenAI(
+                api_key=_api_key(),
+                base_url=OPENAI_BASE_URL,
+                timeout=request_timeout(),
+                http_client=httpx.Client(limits=_limits(), timeout=request_timeout())
+            )
+        return _sync_client
+
+
+def _retire_async_client(client, loop):
+    """Close a client bound to another event loop on that loop, where its connections live.
+
+    A loop that is already closed can no longer run the close; the client is just dropped and
+    its sockets are released when it is garbage collected.
+    """
+    if client is None or loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(client.close(), loop)
+    except RuntimeError as e:
+        print(f"Could not close OpenAI client of a previous event loop: {e}")
+
+
+def get_async_openai_client():
+    """Shared async client of the running event loop (its connections belong to that loop)"""
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if _async_client is None or _async_loop is not loop:
+            # Close the previous loop's client instead of leaking its connection pool
+            _retire_async_client(_async_client, _async_loop)
+            from openai import AsyncOpenAI
+            _async_client = AsyncOpenAI(
+                api_key=_api_key(),
+                base_url=OPENAI_BASE_URL,
+                timeout=request_timeout(),
+                http_client=httpx.AsyncClient(limits=_limits(), timeout=request_timeout())
+            )
+            _async_loop = loop
+        return _async_client
+
+
+async def close_openai_clients():
+    """Close the pooled connections (application shutdown)"""
+    global _sync_client, _async_client, _async_loop
+    with _lock:
+        sync_client, async_client, async_loop = _sync_client, _async_client, _async_loop
+        _sync_client = _async_client = _async_loop = None
+    if async_client is not None:
+        if async_loop is asyncio.get_running_loop():
+            await async_client.close()
+        else:
+            _retire_async_client(async_client, async_loop)
+    if sync_client is not None:
+        sync_client.close()
+
+
+def client_settings() -> Dict[str, Any]:
+    """Endpoint, models and pool limits in use"""
+    return {
+        "base_url": OPENAI_BASE_URL or "https://api.openai.com/v1",
+        "chat_model": CHAT_MODEL,
+        "extraction_model": EVENT_EXTRACTION_MODEL,
+        "embedding_model": EMBEDDING_MODEL,
+        "timeout_seconds": OPENAI_TIMEOUT,
+        "max_connections": OPENAI_MAX_CONNECTIONS,
+        "max_keepalive_connections": OPENAI_MAX_KEEPALIVE_CONNECTIONS
+    }
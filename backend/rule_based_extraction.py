@@ -0,0 +1,186 @@
+"""
+Rule-Based Event Extraction
+Deterministic date, time and venue extraction for circulars and notices, used before (or
+instead of) the LLM. Handles the day-first date formats common in Indian documents.
+"""
+
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+MONTH_PATTERN = (r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?"
+                 r"|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)")
+
+# 12/03/2025, 12-03-2025, 12.03.25 (day first)
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})[/\-.](\d{1,2})[/\-.](\d{4}|\d{2})\b")
+# 2025-03-12
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+# 12th March 2025, 12 Mar, 2025, 12-Mar-2025
+DAY_MONTH_DATE = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?[\s\-]*(?:of\s+)?{MONTH_PATTERN}\.?,?[\s\-]*(\d{{4}})\b", re.I)
+# March 12, 2025 / March 12th 2025
+MONTH_DAY_DATE = re.compile(rf"\b{MONTH_PATTERN}\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b", re.I)
+
+# 10:30 AM, 10.30 a.m., 10 AM
+TIME_12H = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*([ap])\.?\s*m\b\.?", re.I)
+# 14:30, 14:30 hrs
+TIME_24H = re.compile(r"\b([01]?\d|2[0-3])[:.]([0-5]\d)\s*(?:hrs?|hours)?\b", re.I)
+
+VENUE_KEYWORDS = (r"Hall|Auditorium|Lab(?:oratory)?|Room|Ground|Block|Campus|Cent(?:re|er)|Library"
+                  r"|Amphitheat(?:re|er)|Theat(?:re|er)|Stadium|Court|Building|Quadrangle|Lawn|Canteen")
+# "Venue: Main Auditorium"
+LABELLED_VENUE = re.compile(r"\b(?:venue|location|place)\s*[:\-–]\s*([^\n;]+?)(?:[.;]\s|[.;]?$|\n)", re.I)
+# "in the Seminar Hall", "at Room 204"
+PREPOSITION_VENUE = re.compile(
+    rf"\b(?:in|at)\s+(?:the\s+)?((?:[A-Za-z0-9][\w&'\-]*\s+){{0,4}}(?:{VENUE_KEYWORDS})(?:\s+(?:No\.?\s*)?\d+[A-Z]?)?)\b"
+)
+
+# Lines that carry a document date rather than an event date
+ISSUE_DATE_LINE = re.compile(r"\b(dated|date of issue|issued on|ref(?:erence)?\s*(?:no)?\.?|circular\s+no)\b", re.I)
+EVENT_KEYWORDS = re.compile(
+    r"\b(seminar|workshop|fest|festival|competition|contest|meeting|exam(?:ination)?s?|lecture|webinar"
+    r"|hackathon|celebration|ceremony|orientation|drive|talk|session|conference|symposium|tournament"
+    r"|event|programme|program|deadline|registration|function|inauguration|quiz|visit)\b", re.I
+)
+
+# Weights of the evidence found for an event; the sum is its confidence
+DATE_WEIGHT = 0.55
+TIME_WEIGHT = 0.2
+VENUE_WEIGHT = 0.2
+KEYWORD_WEIGHT = 0.05
+
+def _to_date(year: int, month: int, day: int) -> Optional[date]:
+    if year < 100:
+        year += 2000
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def find_dates(text: str) -> List[Tuple[int, int, date]]:
+    """All unambiguous dates in text as (start, end, date), in order of appearance"""
+    found = []
+
+    for match in NUMERIC_DATE.finditer(text):
+        first, second, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        # Day first unless that is impossible (e.g. 03/25/2025)
+        parsed = _to_date(year, second, first) or _to_date(year, first, second)
+        if parsed:
+            found.append((match.start(), match.end(), parsed))
+
+    for match in ISO_DATE.finditer(text):
+        parsed = _to_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if parsed:
+            found.append((match.start(), match.end(), parsed))
+
+    for match in DAY_MONTH_DATE.finditer(text):
+        parsed = _to_date(int(match.group(3)), MONTHS[match.group(2)[:3].lower()], int(match.group(1)))
+        if parsed:
+            found.append((match.start(), match.end(), parsed))
+
+    for match in MONTH_DAY_DATE.finditer(text):
+        parsed = _to_date(int(match.group(3)), MONTHS[match.group(1)[:3].lower()], int(match.group(2)))
+        if parsed:
+            found.append((match.start(), match.end(), parsed))
+
+    # Keep the longest match where patterns overlap
+    found.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+    result = []
+    for start, end, parsed in found:
+        if result and start < result[-1][1]:
+            continue
+        result.append((start, end, parsed))
+    return result
+
+def find_time(text: str) -> Optional[str]:
+    """First time of day in text as HH:MM (24h)"""
+    match = TIME_12H.search(text)
+    if match:
+        hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+        if 1 <= hours <= 12 and minutes < 60:
+            if match.group(3).lower() == 'p' and hours != 12:
+                hours += 12
+            elif match.group(3).lower() == 'a' and hours == 12:
+                hours = 0
+            return f"{hours:02d}:{minutes:02d}"
+
+    match = TIME_24H.search(text)
+    if match:
+        return f"{int(match.group(1)):02d}:{match.group(2)}"
+    return None
+
+def find_venue(text: str) -> Optional[str]:
+    """Venue named in text, preferring an explicit "Venue:" label"""
+    match = LABELLED_VENUE.search(text)
+    if match:
+        venue = match.group(1).strip(" .,-–")
+        if venue:
+            return venue[:200]
+
+    match = PREPOSITION_VENUE.search(text)
+    if match:
+        return match.group(1).strip()
+    return None
+
+def extract_events_locally(text: str, document_title: str) -> Tuple[List[dict], float]:
+    """Extract ExtractedEvent-shaped records from text without any network call.
+
+    Every line with a date becomes one event; time and venue are taken from that line and
+    the following one. Returns the events and the document's confidence (the lowest event
+    confidence, 0.0 when nothing was found) so callers can decide whether to escalate.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+
+    events = []
+    confidences = []
+    seen = set()
+
+    for index, line in enumerate(lines):
+        if ISSUE_DATE_LINE.search(line):
+            continue
+        
+        dates = find_dates(line)
+        if not dates:
+            continue
+        
+        # Context: this line plus the next one when it does not start another dated entry
+        context = line
+        if index + 1 < len(lines) and not find_dates(lines[index + 1]):
+            context = f"{line} {lines[index + 1]}"
+        
+        # Blank out dates so "12.03.2025" is not read as the time 12:03
+        time_text = context
+        for start, end, _ in find_dates(context):
+            time_text = time_text[:start] + " " * (end - start) + time_text[end:]
+        
+        event_date = dates[0][2].isoformat()
+        event_time = find_time(time_text)
+        location = find_venue(context)
+        
+        key = (event_date, event_time, (location or "").lower())
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        confidence = DATE_WEIGHT
+        if event_time:
+            confidence += TIME_WEIGHT
+        if location:
+            confidence += VENUE_WEIGHT
+        if EVENT_KEYWORDS.search(context):
+            confidence += KEYWORD_WEIGHT
+        
+        events.append({
+            "document_title": document_title,
+            "event_date": event_date,
+            "event_time": event_time,
+            "location": location,
+            "related_information": context[:500]
+        })
+        confidences.append(round(min(confidence, 1.0), 2))
+
+    return events, (min(confidences) if confidences else 0.0)
@@ -0,0 +1,42 @@
+"""
+Test configuration
+The backend modules import each other by plain module name, so the backend directory is put
+on sys.path the same way running main.py from it does
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import event_database  # noqa: E402
+from event_backends import SQLiteBackend  # noqa: E402
+from event_database import EventDatabase  # noqa: E402
+
+
+@pytest.fixture
+def event_db(tmp_path, monkeypatch):
+    """Event database on a fresh SQLite file"""
+    monkeypatch.setattr(event_database, "create_event_backend",
+                        lambda: SQLiteBackend(str(tmp_path / "events.sqlite3")))
+    db = EventDatabase()
+    assert db.init_database()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def vector_db(tmp_path, monkeypatch):
+    """Vector database storing under tmp_path, with random embeddings instead of API calls"""
+    import numpy as np
+    from vector import VectorDatabase
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.chdir(tmp_path)
+    db = VectorDatabase()
+    rng = np.random.default_rng(0)
+    monkeypatch.setattr(db, "create_embeddings",
+                        lambda chunks: rng.random((len(chunks), 8), dtype=np.float32))
+    return db
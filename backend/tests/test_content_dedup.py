@@ -0,0 +1,57 @@
+"""Content-hash deduplication of uploaded documents"""
+
+import hashlib
+
+import numpy as np
+import pytest
+
+TEXT = b"Syllabus: data structures, graphs and dynamic programming. " * 40
+CONTENT_HASH = hashlib.sha256(TEXT).hexdigest()
+
+
+def _process_document(vector_db, department="Computer Science", subject=None, title="Syllabus"):
+    document_id, stored_path = vector_db.get_upload_path(
+        "document", "syllabus.txt", "teacher", "teacher", department, subject
+    )
+    stored_path.write_bytes(TEXT)
+    return vector_db.process_document(
+        file_path=str(stored_path), user_id="teacher", role="teacher", department=department,
+        filename="syllabus.txt", title=title, subject=subject,
+        document_id=document_id, content_hash=CONTENT_HASH
+    ), stored_path
+
+
+def test_same_scope_upload_returns_stored_document(vector_db):
+    first, _ = _process_document(vector_db)
+
+    second, stored_path = _process_document(vector_db, title="Syllabus 2025")
+
+    assert second["duplicate"] and second["document_id"] == first["document_id"]
+    assert not stored_path.exists()
+    assert vector_db.get_catalog_entry(first["document_id"])["aliases"] == ["Syllabus 2025"]
+    assert [entry["document_id"] for entry in vector_db.find_documents_by_hash(CONTENT_HASH)] == [
+        first["document_id"]
+    ]
+
+
+def test_other_scope_reuses_stored_vectors(vector_db, monkeypatch):
+    first, _ = _process_document(vector_db)
+    chunks, embeddings, text_length = vector_db.load_reusable_vectors(CONTENT_HASH)
+
+    def no_embedding(chunks):
+        pytest.fail("stored vectors should be reused")
+    monkeypatch.setattr(vector_db, "create_embeddings", no_embedding)
+    second, _ = _process_document(vector_db, subject="Algorithms")
+
+    assert not second.get("duplicate") and second["document_id"] != first["document_id"]
+    assert second["chunk_count"] == len(chunks)
+    assert second["text_length"] == text_length
+    assert np.allclose(vector_db.load_reusable_vectors(CONTENT_HASH)[1], embeddings)
+    assert len(vector_db.find_documents_by_hash(CONTENT_HASH)) == 2
+
+
+def test_unknown_hash_has_nothing_to_reuse(vector_db):
+    _process_document(vector_db)
+
+    assert vector_db.load_reusable_vectors(hashlib.sha256(b"other").hexdigest()) is None
+    assert vector_db.find_documents_by_hash(None) == []
@@ -0,0 +1,91 @@
+"""Batching and de-duplication of concurrent query embeddings"""
+
+import threading
+import time
+
+import numpy as np
+
+from embedding_batcher import EmbeddingBatcher
+
+
+def _embed_concurrently(batcher: EmbeddingBatcher, texts):
+    results = [None] * len(texts)
+    errors = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def query(index: int, text: str):
+        start.wait()
+        try:
+            results[index] = batcher.embed(text)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=query, args=item) for item in enumerate(texts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results, errors
+
+
+def test_concurrent_queries_share_one_call_and_identical_texts_are_embedded_once():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return np.array([[len(text), index] for index, text in enumerate(texts)], dtype="float32")
+
+    # A long wait so every query joins the first batch; it closes as soon as the batch is full
+    batcher = EmbeddingBatcher(embed, max_batch_size=6, max_wait_ms=2000)
+    texts = ["exam dates", "fest venue", "exam dates", "library hours", "exam dates", "fest venue"]
+    results, errors = _embed_concurrently(batcher, texts)
+
+    assert errors == [None] * len(texts)
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["exam dates", "fest venue", "library hours"]
+    for text, vector in zip(texts, results):
+        assert vector[0] == len(text)
+        assert calls[0][int(vector[1])] == text
+
+    metrics = batcher.metrics()
+    assert (metrics["queries"], metrics["batches"], metrics["deduplicated"]) == (6, 1, 3)
+
+
+def test_batches_are_capped_at_the_maximum_size():
+    calls = []
+
+    def embed(texts):
+        calls.append(len(texts))
+        return np.zeros((len(texts), 2), dtype="float32")
+
+    batcher = EmbeddingBatcher(embed, max_batch_size=4, max_wait_ms=50)
+    _, errors = _embed_concurrently(batcher, [f"query {index}" for index in range(10)])
+
+    assert errors == [None] * 10
+    assert sum(calls) == 10
+    assert max(calls) <= 4
+
+
+def test_embedding_error_reaches_every_caller_in_the_batch():
+    def embed(texts):
+        raise RuntimeError("upstream down")
+
+    batcher = EmbeddingBatcher(embed, max_batch_size=3, max_wait_ms=2000)
+    _, errors = _embed_concurrently(batcher, ["a", "b", "a"])
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    # The worker survives a failed batch
+    batcher.embed_batch = lambda texts: np.ones((len(texts), 2), dtype="float32")
+    batcher.max_wait = 0
+    assert batcher.embed("c").tolist() == [1.0, 1.0]
+
+
+def test_lone_query_waits_at_most_the_batching_window():
+    batcher = EmbeddingBatcher(lambda texts: np.ones((len(texts), 3)), max_batch_size=64, max_wait_ms=20)
+
+    started = time.monotonic()
+    vector = batcher.embed("only")
+
+    assert time.monotonic() - started < 1
+    assert vector.dtype == np.float32
+    assert batcher.metrics()["batches"] == 1
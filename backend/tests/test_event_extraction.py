@@ -0,0 +1,77 @@
+"""Windowing of long documents and merging of the per-window extraction results"""
+
+from event_extraction import CHARS_PER_TOKEN, merge_events, split_into_windows
+
+
+def _paragraphs(count: int) -> list:
+    return [f"Paragraph {index}: " + "word " * 40 for index in range(count)]
+
+
+def test_short_text_is_one_window():
+    windows = split_into_windows("  Annual sports meet on 12 March.  ", max_tokens=100)
+
+    assert windows == ["Annual sports meet on 12 March."]
+
+
+def test_empty_text_has_no_windows():
+    assert split_into_windows("   \n\n ") == []
+
+
+def test_windows_respect_the_size_limit_and_cover_the_text():
+    paragraphs = _paragraphs(30)
+    text = "\n\n".join(paragraphs)
+    windows = split_into_windows(text, max_tokens=200, overlap_tokens=20)
+
+    assert len(windows) > 1
+    assert all(len(window) <= 200 * CHARS_PER_TOKEN for window in windows)
+    for paragraph in paragraphs:
+        assert any(paragraph.strip() in window for window in windows)
+
+
+def test_windows_break_at_paragraphs_and_overlap():
+    text = "\n\n".join(_paragraphs(30))
+    windows = split_into_windows(text, max_tokens=200, overlap_tokens=20)
+
+    # Every window but the first starts inside the previous one (the overlap)
+    for previous, window in zip(windows, windows[1:]):
+        assert window[:40] in previous
+    # Cuts fall on the paragraph break, not in the middle of a paragraph
+    for window in windows[:-1]:
+        assert window.endswith("word")
+
+
+def test_text_without_breaks_is_still_split():
+    text = "".join(chr(ord("a") + index % 26) for index in range(5000))
+    windows = split_into_windows(text, max_tokens=100, overlap_tokens=10)
+
+    assert len(windows) > 1
+    assert all(len(window) <= 100 * CHARS_PER_TOKEN and window in text for window in windows)
+    assert text.startswith(windows[0]) and text.endswith(windows[-1])
+
+
+def test_merge_keeps_one_entry_per_event_with_the_fuller_description():
+    first = {"document_title": "Tech Fest", "event_date": "2025-03-12", "event_time": "09:30",
+             "location": "Main Auditorium", "related_information": "Tech Fest"}
+    repeated = {"document_title": "tech  fest", "event_date": "2025-03-12", "event_time": "09:30:00",
+                "location": "main auditorium", "related_information": "Tech Fest with robotics and coding contests"}
+    other = {"document_title": "Alumni Meet", "event_date": "2025-04-02", "event_time": None,
+             "location": None, "related_information": "Alumni Meet"}
+
+    merged = merge_events([[first], [repeated, other]])
+
+    assert [event["document_title"] for event in merged] == ["Tech Fest", "Alumni Meet"]
+    assert merged[0]["related_information"] == "Tech Fest with robotics and coding contests"
+
+
+def test_merge_keeps_events_that_differ_in_date_time_or_location():
+    base = {"document_title": "Workshop", "event_date": "2025-03-12", "event_time": "10:00",
+            "location": "Lab 1", "related_information": "Workshop"}
+    variants = [
+        dict(base),
+        dict(base, event_date="2025-03-13"),
+        dict(base, event_time="14:00"),
+        dict(base, location="Lab 2")
+    ]
+
+    assert len(merge_events([variants])) == 4
+    assert merge_events([]) == []
@@ -0,0 +1,80 @@
+"""Keyset pagination cursors of stored events"""
+
+import base64
+import json
+
+import pytest
+
+from event_database import EventDatabase
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("event_date", ["2025-03-12", None])
+def test_cursor_round_trip(event_date):
+    cursor = EventDatabase.encode_cursor({"id": 42, "event_date": event_date, "document_title": "Fest"})
+
+    assert "=" not in cursor
+    assert EventDatabase.decode_cursor(cursor) == (event_date, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    _cursor({"event_date": "2025-03-12", "id": 1}),
+    _cursor(["2025-03-12"]),
+    _cursor(["2025-13-40", 1]),
+    _cursor(["2025-03-12", "one"]),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode()
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        EventDatabase.decode_cursor(cursor)
+
+
+def test_pages_cover_every_event_once_in_order(event_db):
+    dates = ["2025-03-12", "2025-03-12", None, "2025-01-05",
+             "2025-03-12", None, "2025-06-30", "2025-01-05"]
+    event_db.store_admin_events([
+        {"document_id": "doc-1", "document_title": f"Event {index}", "event_date": event_date,
+         "related_information": "details"}
+        for index, event_date in enumerate(dates)
+    ])
+    event_db.store_department_event("Computer Science", {
+        "document_id": "doc-2", "document_title": "Department event", "event_date": "2025-03-12"
+    })
+
+    pages = []
+    cursor = None
+    while True:
+        page = event_db.list_events(cursor=cursor, limit=3)
+        pages.append(page["events"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    events = [event for page in pages for event in page]
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert len({event["id"] for event in events}) == len(dates)
+    # Newest date first, ties by id descending, events without a date last
+    dated = [event for event in events if event["event_date"]]
+    assert dated == sorted(dated, key=lambda event: (event["event_date"], event["id"]), reverse=True)
+    assert [event["event_date"] for event in events[-2:]] == [None, None]
+    assert events[-2]["id"] > events[-1]["id"]
+
+
+def test_date_filters_apply_across_pages(event_db):
+    event_db.store_admin_events([
+        {"document_id": "doc-1", "document_title": f"Event {day}", "event_date": f"2025-03-{day:02d}"}
+        for day in range(1, 11)
+    ])
+
+    window = {"start_date": "2025-03-03", "end_date": "2025-03-08"}
+    first = event_db.list_events(limit=4, **window)
+    second = event_db.list_events(cursor=first["next_cursor"], limit=4, **window)
+
+    assert [event["event_date"] for event in first["events"] + second["events"]] == [
+        f"2025-03-{day:02d}" for day in range(8, 2, -1)
+    ]
+    assert second["next_cursor"] is None
@@ -0,0 +1,62 @@
+"""Full-text search over stored events"""
+
+import pytest
+
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like"])
+def search_db(request, event_db):
+    event_db.backend.fulltext = request.param
+    event_db.store_admin_events([
+        {"document_id": "doc-1", "document_title": "Robotics hackathon", "event_date": "2025-03-12",
+         "related_information": "Build a robot in 24 hours, hackathon prizes", "location": "Main Hall"},
+        {"document_id": "doc-1", "document_title": "Annual sports day", "event_date": "2025-04-02",
+         "related_information": "Athletics and football", "location": "Stadium"}
+    ])
+    event_db.store_department_events("Computer Science", [
+        {"document_id": "doc-2", "document_title": "Coding hackathon", "event_date": "2025-05-20",
+         "related_information": "Algorithms contest", "location": "Lab 3"}
+    ])
+    return event_db
+
+
+def _titles(events):
+    return [event["document_title"] for event in events]
+
+
+def test_matches_titles_details_and_locations(search_db):
+    assert sorted(_titles(search_db.search_events("hackathon"))) == ["Coding hackathon", "Robotics hackathon"]
+    assert _titles(search_db.search_events("football")) == ["Annual sports day"]
+    assert _titles(search_db.search_events("stadium")) == ["Annual sports day"]
+    assert search_db.search_events("chess") == []
+
+
+def test_best_match_first(search_db):
+    if not search_db.backend.fulltext:
+        pytest.skip("LIKE matching is not ranked")
+    assert _titles(search_db.search_events("robot hackathon")) == ["Robotics hackathon", "Coding hackathon"]
+
+
+def test_filters_by_scope_department_and_date(search_db):
+    assert _titles(search_db.search_events("hackathon", scope="college")) == ["Robotics hackathon"]
+    assert _titles(search_db.search_events("hackathon", department="computer science")) == ["Coding hackathon"]
+    assert _titles(search_db.search_events("hackathon", start_date="2025-04-01")) == ["Coding hackathon"]
+    assert _titles(search_db.search_events("hackathon", end_date="2025-04-01")) == ["Robotics hackathon"]
+
+
+@pytest.mark.parametrize("query", ['"', '  ', 'hackathon" OR', 'NEAR(hackathon', 'title:*'])
+def test_query_syntax_is_not_interpreted(search_db, query, capsys):
+    search_db.search_events(query)
+
+    assert "Error searching events" not in capsys.readouterr().out
+
+
+def test_quoted_words_still_match(search_db):
+    assert sorted(_titles(search_db.search_events('hackathon NEAR(chess'))) == [
+        "Coding hackathon", "Robotics hackathon"
+    ]
+
+
+def test_deleted_events_are_not_found(search_db):
+    search_db.delete_events_by_document("doc-2", "Computer Science")
+
+    assert _titles(search_db.search_events("hackathon")) == ["Robotics hackathon"]
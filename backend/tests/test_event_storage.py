@@ -0,0 +1,30 @@
+"""Storing events in the unified events table"""
+
+
+def _event(document_id, title, event_date="2030-01-02"):
+    return {"document_id": document_id, "document_title": title, "event_date": event_date,
+            "related_information": "details"}
+
+
+def _migrated_event(event_db, department, key):
+    conn = event_db.get_connection()
+    cursor = event_db.backend.cursor(conn)
+    cursor.execute('''
+        INSERT INTO events (scope, department, department_key, document_id, event_date,
+                            legacy_table, legacy_id)
+        VALUES ('department', %s, %s, 'legacy', '2030-01-01', %s, 1)
+    ''', (department, key, f"{key}_events"))
+    conn.commit()
+    conn.close()
+
+
+def test_migrated_events_take_the_uploaded_department_name(event_db):
+    _migrated_event(event_db, "Cse", "cse")
+    assert event_db.get_all_departments() == ["Cse"]
+
+    event_db.store_department_events("CSE", [_event("doc-1", "Hackathon")])
+    event_db.store_department_events("cse", [_event("doc-2", "Workshop")])
+
+    assert event_db.get_all_departments() == ["CSE"]
+    assert {event["department"] for event in event_db.get_department_events("cse")} == {"CSE"}
+
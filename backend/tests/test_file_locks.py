@@ -0,0 +1,90 @@
+"""Storage write locks and atomic pickle writes"""
+
+import multiprocessing
+import pickle
+import threading
+import time
+
+import pytest
+
+import file_locks
+from file_locks import atomic_pickle_dump, scope_lock
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_locks, "LOCK_DIR", tmp_path / "locks")
+    return tmp_path / "locks"
+
+
+def test_atomic_dump_replaces_file(tmp_path):
+    path = tmp_path / "catalog.pkl"
+    atomic_pickle_dump({"a": 1}, path)
+    atomic_pickle_dump({"b": 2}, path)
+
+    with open(path, "rb") as f:
+        assert pickle.load(f) == {"b": 2}
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == ["catalog.pkl"]
+
+
+def test_failed_dump_keeps_previous_file(tmp_path):
+    path = tmp_path / "catalog.pkl"
+    atomic_pickle_dump({"a": 1}, path)
+
+    with pytest.raises(Exception):
+        atomic_pickle_dump({"unpicklable": lambda: None}, path)
+
+    with open(path, "rb") as f:
+        assert pickle.load(f) == {"a": 1}
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == ["catalog.pkl"]
+
+
+def test_lock_is_reentrant_in_one_thread():
+    with scope_lock("catalog"):
+        with scope_lock("catalog"):
+            pass
+        with scope_lock("other"):
+            pass
+
+
+def _increment(path, times):
+    for _ in range(times):
+        with scope_lock("counter"):
+            value = int(path.read_text())
+            time.sleep(0.001)
+            path.write_text(str(value + 1))
+
+
+def test_lock_serializes_threads(tmp_path):
+    counter = tmp_path / "counter"
+    counter.write_text("0")
+
+    threads = [threading.Thread(target=_increment, args=(counter, 20)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.read_text() == "80"
+
+
+def _increment_in_process(lock_dir, path, times):
+    file_locks.LOCK_DIR = lock_dir
+    _increment(path, times)
+
+
+@pytest.mark.skipif(file_locks.fcntl is None or "fork" not in multiprocessing.get_all_start_methods(),
+                    reason="needs fork and flock")
+def test_lock_serializes_processes(tmp_path, lock_dir):
+    counter = tmp_path / "counter"
+    counter.write_text("0")
+    context = multiprocessing.get_context("fork")
+
+    processes = [context.Process(target=_increment_in_process, args=(lock_dir, counter, 20)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+
+    assert [process.exitcode for process in processes] == [0, 0, 0]
+    assert counter.read_text() == "60"
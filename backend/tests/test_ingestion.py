@@ -0,0 +1,86 @@
+"""Ingestion of uploaded event documents"""
+
+import asyncio
+import hashlib
+
+import pytest
+
+from ingestion import IngestionPipeline
+
+TEXT = b"Tech fest on 12/03/2025 in the Main Hall. " * 40
+EVENT = {"document_title": "Tech fest", "event_date": "2025-03-12", "related_information": "Main Hall"}
+
+
+@pytest.fixture
+def pipeline(vector_db, event_db):
+    return IngestionPipeline(vector_db, event_db)
+
+
+def _upload(vector_db, filename="fest.txt", content=TEXT):
+    document_id, stored_path = vector_db.get_upload_path("college_event", filename)
+    stored_path.write_bytes(content)
+    return document_id, stored_path, hashlib.sha256(content).hexdigest()
+
+
+def _ingest(pipeline, document_id, stored_path, content_hash):
+    return asyncio.run(pipeline.ingest(
+        "college_event", stored_path, "fest.txt", "Tech fest", "admin", "admin",
+        document_id=document_id, content_hash=content_hash, manual_event=dict(EVENT)
+    ))
+
+
+def test_stores_document_and_events(pipeline, vector_db, event_db):
+    document_id, stored_path, content_hash = _upload(vector_db)
+
+    result, stored_events = _ingest(pipeline, document_id, stored_path, content_hash)
+
+    assert result["document_id"] == document_id
+    assert [event["document_title"] for event in stored_events] == ["Tech fest"]
+    assert vector_db.get_catalog_entry(document_id)["complete"] is True
+    assert vector_db.find_duplicate(content_hash, vector_db.get_scope_vector_path("college_event"))
+
+
+def test_failed_event_store_removes_indexed_document(pipeline, vector_db, event_db, monkeypatch):
+    def fail(events):
+        raise event_db.backend.Error("database is gone")
+    monkeypatch.setattr(event_db, "store_admin_events", fail)
+    document_id, stored_path, content_hash = _upload(vector_db)
+
+    with pytest.raises(event_db.backend.Error):
+        _ingest(pipeline, document_id, stored_path, content_hash)
+
+    vector_path = vector_db.get_scope_vector_path("college_event")
+    assert vector_db.get_catalog_entry(document_id) is None
+    assert not stored_path.exists()
+    assert not list(vector_path.glob(f"*_{document_id}.pkl"))
+    assert vector_db.find_duplicate(content_hash, vector_path) is None
+
+
+def test_identical_upload_is_a_duplicate(pipeline, vector_db, event_db):
+    first = _upload(vector_db)
+    _ingest(pipeline, *first)
+    second = _upload(vector_db)
+
+    result, stored_events = _ingest(pipeline, *second)
+
+    assert result["duplicate"] and result["document_id"] == first[0]
+    assert stored_events == []
+    assert not second[1].exists()
+    assert len(event_db.list_events()["events"]) == 1
+
+
+def test_interrupted_upload_is_not_reused_as_duplicate(pipeline, vector_db, event_db):
+    # Indexed but its events never stored, as left by a crash between the two stages
+    document_id, stored_path, content_hash = _upload(vector_db)
+    vector_db.process_college_event_document(
+        file_path=str(stored_path), user_id="admin", role="admin", filename="fest.txt",
+        title="Tech fest", document_id=document_id, content_hash=content_hash, awaiting_events=True
+    )
+    assert vector_db.get_catalog_entry(document_id)["complete"] is False
+
+    retry = _upload(vector_db)
+    result, stored_events = _ingest(pipeline, *retry)
+
+    assert not result.get("duplicate")
+    assert result["document_id"] == retry[0]
+    assert len(stored_events) == 1
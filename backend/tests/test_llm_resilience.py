@@ -0,0 +1,120 @@
+"""Circuit breaker state machine and the retry policy around upstream calls"""
+
+import pytest
+
+import llm_resilience
+from llm_resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy
+
+
+def _open(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def _expire(breaker: CircuitBreaker):
+    """Pretend the reset period has passed since the circuit opened"""
+    breaker.opened_at -= breaker.reset_seconds
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("gpt", failure_threshold=3, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.metrics()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("gpt", failure_threshold=3, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 1
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = CircuitBreaker("gpt", failure_threshold=2, reset_seconds=60)
+    _open(breaker)
+    _expire(breaker)
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the probe goes upstream until it has an outcome
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    assert breaker.metrics()["transitions"] == {
+        "closed->open": 1, "open->half_open": 1, "half_open->closed": 1
+    }
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("gpt", failure_threshold=2, reset_seconds=60)
+    _open(breaker)
+    _expire(breaker)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker("gpt", failure_threshold=1, reset_seconds=60)
+    _open(breaker)
+    _expire(breaker)
+
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_policy_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "retry_delay", lambda attempt, error=None: 0)
+    policy = ResiliencePolicy(max_retries=2, timeout=5, deadline=30)
+    outcomes = [TimeoutError("slow"), ConnectionError("reset"), "answer"]
+
+    def invoke(timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call("gpt", invoke) == "answer"
+    metrics = policy.metrics()
+    assert (metrics["attempts"], metrics["retries"], metrics["timeouts"]) == (3, 2, 1)
+    assert metrics["circuits"]["gpt"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_policy_does_not_retry_or_trip_on_a_bad_request(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "retry_delay", lambda attempt, error=None: 0)
+    policy = ResiliencePolicy(max_retries=3)
+    calls = []
+
+    def invoke(timeout):
+        calls.append(timeout)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        policy.call("gpt", invoke)
+    assert len(calls) == 1
+    assert policy.breaker("gpt").failures == 0
+
+
+def test_policy_fails_fast_while_the_circuit_is_open():
+    policy = ResiliencePolicy()
+    _open(policy.breaker("gpt"))
+
+    with pytest.raises(CircuitOpenError):
+        policy.call("gpt", lambda timeout: pytest.fail("upstream called with the circuit open"))
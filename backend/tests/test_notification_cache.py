@@ -0,0 +1,92 @@
+"""Caching of notification payloads"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import notifications
+from notifications import NotificationCache
+
+
+class _Clock(datetime):
+    current = datetime(2025, 3, 12, 23, 59)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(notifications, "datetime", _Clock)
+    _Clock.current = datetime(2025, 3, 12, 23, 59)
+    return _Clock
+
+
+def _builder(payloads):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return payloads[len(calls) - 1]
+    return build, calls
+
+
+def test_serves_cached_payload_until_invalidated(clock):
+    cache = NotificationCache(ttl=60)
+    build, calls = _builder([{"n": 1}, {"n": 2}])
+
+    async def run():
+        first = await cache.get_or_build("today", build)
+        second = await cache.get_or_build("today", build)
+        cache.invalidate({"action": "stored"})
+        third = await cache.get_or_build("today", build)
+        return first, second, third
+
+    assert asyncio.run(run()) == ({"n": 1}, {"n": 1}, {"n": 2})
+    assert len(calls) == 2
+    assert cache.metrics()["hits"] == 1 and cache.metrics()["invalidations"] == 1
+
+
+def test_date_rollover_rebuilds_payload(clock):
+    cache = NotificationCache(ttl=3600)
+    build, calls = _builder([{"date": "2025-03-12"}, {"date": "2025-03-13"}])
+
+    async def run():
+        before = await cache.get_or_build("today", build)
+        clock.current = datetime(2025, 3, 13, 0, 1)
+        after = await cache.get_or_build("today", build)
+        return before, after
+
+    assert asyncio.run(run()) == ({"date": "2025-03-12"}, {"date": "2025-03-13"})
+    assert len(calls) == 2
+    assert cache.metrics()["entries"] == 1
+
+
+def test_concurrent_misses_share_one_build(clock):
+    cache = NotificationCache(ttl=60)
+    build, calls = _builder([{"n": 1}])
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_build("upcoming", build) for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"n": 1}] * 5
+    assert len(calls) == 1
+
+
+def test_payload_built_before_invalidation_is_not_cached(clock):
+    cache = NotificationCache(ttl=60)
+    payloads = iter([{"n": 1}, {"n": 2}])
+
+    def build():
+        payload = next(payloads)
+        if payload["n"] == 1:
+            # Events change while the first payload is being built
+            cache.invalidate()
+        return payload
+
+    async def run():
+        return await cache.get_or_build("today", build), await cache.get_or_build("today", build)
+
+    assert asyncio.run(run()) == ({"n": 1}, {"n": 2})
@@ -0,0 +1,40 @@
+"""Local rule-based event extraction used before the LLM"""
+
+from event_extraction import LOCAL_EXTRACTION_MIN_CONFIDENCE
+from rule_based_extraction import extract_events_locally
+
+NOTICE = """Circular No. 45 dated 01/03/2025
+The annual Tech Fest will be held on 12th March 2025 at 10:30 AM.
+Venue: Main Auditorium.
+Alumni meet on 2025-04-02 in the Seminar Hall.
+"""
+
+
+def test_events_take_time_and_venue_from_their_lines():
+    events, confidence = extract_events_locally(NOTICE, "Notice")
+
+    assert [(event["event_date"], event["event_time"], event["location"]) for event in events] == [
+        ("2025-03-12", "10:30", "Main Auditorium"),
+        ("2025-04-02", None, "Seminar Hall")
+    ]
+    assert all(event["document_title"] == "Notice" for event in events)
+    # The circular's issue date is not an event
+    assert "2025-03-01" not in {event["event_date"] for event in events}
+    assert confidence >= LOCAL_EXTRACTION_MIN_CONFIDENCE
+
+
+def test_numeric_dates_are_day_first():
+    events, _ = extract_events_locally("Sports day on 05/02/2025", "Sports")
+
+    assert events[0]["event_date"] == "2025-02-05"
+
+
+def test_date_without_time_or_venue_is_not_confident_enough_to_skip_the_llm():
+    events, confidence = extract_events_locally("Sports day on 05/02/2025", "Sports")
+
+    assert len(events) == 1
+    assert confidence < LOCAL_EXTRACTION_MIN_CONFIDENCE
+
+
+def test_text_without_dates_has_no_events():
+    assert extract_events_locally("No dates in this text at all.", "Memo") == ([], 0.0)
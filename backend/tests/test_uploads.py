@@ -0,0 +1,72 @@
+"""Serving uploaded files from /uploads"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+CONTENT = b"%PDF-1.4 event brochure"
+
+
+@pytest.fixture
+def client(vector_db, monkeypatch):
+    monkeypatch.setattr(main, "vector_db", vector_db)
+    return TestClient(main.app)
+
+
+def _register(vector_db, filename="brochure.pdf"):
+    document_id, stored_path = vector_db.get_upload_path("college_event", filename)
+    stored_path.write_bytes(CONTENT)
+    vector_db._register_document(document_id, "college_event", vector_db.get_scope_vector_path("college_event"),
+                                 stored_path, title="Brochure", filename=filename)
+    return document_id, stored_path
+
+
+def test_resolves_upload_by_document_id(vector_db, monkeypatch):
+    monkeypatch.setattr(main, "vector_db", vector_db)
+    document_id, stored_path = _register(vector_db)
+
+    assert main._resolve_upload(f"college_events/{document_id}_brochure.pdf") == (stored_path, "brochure.pdf")
+    # The id must belong to a document with that filename
+    assert main._resolve_upload(f"college_events/{document_id}_other.pdf") is None
+    stored_path.unlink()
+    assert main._resolve_upload(f"college_events/{document_id}_brochure.pdf") is None
+
+
+def test_resolves_legacy_url_by_filename(vector_db, monkeypatch):
+    monkeypatch.setattr(main, "vector_db", vector_db)
+    _, stored_path = _register(vector_db, "schedule.pdf")
+
+    assert main._resolve_upload("college_events/schedule.pdf") == (stored_path, "schedule.pdf")
+    assert main._resolve_upload("subject_documents/CS/DS/schedule.pdf") is None
+    assert main._resolve_upload("unknown/schedule.pdf") is None
+
+
+def test_serves_file_with_cache_validators(client, vector_db):
+    document_id, _ = _register(vector_db)
+    url = f"/uploads/college_events/{document_id}_brochure.pdf"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-type"] == "application/pdf"
+    etag = response.headers["etag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+    not_modified = client.get(url, headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert not_modified.status_code == 304 and not_modified.headers["etag"] == etag
+
+
+def test_serves_byte_ranges(client, vector_db):
+    document_id, _ = _register(vector_db)
+
+    response = client.get(f"/uploads/college_events/{document_id}_brochure.pdf", headers={"Range": "bytes=0-3"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[:4]
+
+
+def test_unknown_upload_is_404(client):
+    assert client.get("/uploads/college_events/missing.pdf").status_code == 404
@@ -1,28 +1,31 @@
 import os
 import pickle
 import logging
+import threading
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from datetime import datetime
 
-import faiss
 import numpy as np
-from openai import OpenAI
-from docx import Document as DocxDocument
-import PyPDF2
+
+from context_packing import extractive_answer, pack_context, usage_from_response
+from embedding_batcher import EmbeddingBatcher
+from file_locks import atomic_pickle_dump, scope_lock
+from llm_gateway import llm_gateway
+from openai_clients import CHAT_MODEL, EMBEDDING_MODEL, get_openai_client
 
 logger = logging.getLogger(__name__)
 
 class VectorDatabase:
     def __init__(self):
         """Initialize the Vector Database with OpenAI embedding and simple text splitter"""
-        # Initialize OpenAI client
+        # Process-wide OpenAI client (pooled connections, configured endpoint)
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        self.openai_client = OpenAI(api_key=api_key)
+        self.openai_client = get_openai_client()
         
         self.base_storage_path = Path("storage")
         self.base_storage_path.mkdir(exist_ok=True)
@@ -31,6 +34,18 @@ class VectorDatabase:
         self.chunk_size = 1000
         self.chunk_overlap = 200
 
+        # Document catalog (document_id -> location) and loaded vector artifacts per scope folder.
+        # The catalog dict is never modified in place (updates swap in a new one), so readers can
+        # iterate it without locking; the hash index is tagged with the catalog it was built from
+        self._catalog = None
+        self._catalog_mtime = None
+        self._hash_index = None
+        self._hash_index_lock = threading.Lock()
+        self._scope_cache = {}
+        
+        # Query embeddings of concurrent chat requests share one embeddings call
+        self.query_embedder = EmbeddingBatcher(lambda texts: self.create_embeddings(texts))
+
     def _get_user_storage_path(self, user_id: str, role: str, department: str) -> Path:
         """Get storage path for department - all users in same department share the same folder"""
         # Create folder structure: storage/department/
@@ -55,12 +70,436 @@ class VectorDatabase:
         
         return {
             'uploads': uploads_path,
-            'vector_db': vector_db_path, 
+            'vector_db': vector_db_path,
             'indexes': indexes_path
         }
 
+    def _get_document_storage_path(self, user_id: str, role: str, department: str, subject: str = None) -> Path:
+        """Folder for a department document, or its subject subfolder"""
+        storage_path = self._get_user_storage_path(user_id, role, department)
+        if subject:
+            storage_path = storage_path / subject.replace(" ", "_").replace("/", "_")
+            storage_path.mkdir(parents=True, exist_ok=True)
+        return storage_path
+
+    def get_upload_path(self, scope: str, filename: str, user_id: str = None, role: str = None,
+                        department: str = None, subject: str = None) -> Tuple[str, Path]:
+        """Allocate a document id and the final location of its uploaded file.
+        
+        Uploads are streamed straight to this path and then processed in place by the
+        matching process_* method (called with the same document_id).
+        """
+        document_id = str(uuid.uuid4())
+        if scope == "college_event":
+            upload_dir = self._get_college_event_storage_path()['uploads']
+        elif scope == "department_event":
+            upload_dir = self._get_department_event_storage_path(department)['uploads']
+        else:
+            upload_dir = self._get_document_storage_path(user_id, role, department, subject)
+        return document_id, upload_dir / f"{document_id}_{filename}"
+
+    def get_scope_vector_path(self, scope: str, user_id: str = None, role: str = None,
+                              department: str = None, subject: str = None) -> Path:
+        """Vector folder that documents of this scope are indexed in"""
+        if scope == "college_event":
+            return self._get_college_event_storage_path()['vector_db']
+        if scope == "department_event":
+            return self._get_department_event_storage_path(department)['vector_db']
+        return self._get_document_storage_path(user_id, role, department, subject)
+
+    @staticmethod
+    def _store_upload(file_path: str, target_path: Path):
+        """Copy the uploaded file into storage unless it was already streamed there"""
+        if Path(file_path).resolve() != target_path.resolve():
+            import shutil
+            shutil.copy2(file_path, target_path)
+
+    # Document Catalog Methods
+    def _get_catalog_path(self) -> Path:
+        """Get path of the document catalog that maps document ids to their storage locations"""
+        return self.base_storage_path / "document_catalog.pkl"
+
+    def _load_catalog(self) -> Dict[str, Dict[str, Any]]:
+        """Load the document catalog, rebuilding it from stored metadata the first time"""
+        catalog_path = self._get_catalog_path()
+
+        if not catalog_path.exists():
+            with scope_lock("document_catalog"):
+                # Another worker may have built it while we waited for the lock
+                if not catalog_path.exists():
+                    self._catalog = self._rebuild_catalog()
+                    self._save_catalog()
+                    return self._catalog
+        
+        # Reload when another worker has written the catalog since we last read it; every
+        # save replaces the file, so the inode changes even within the mtime resolution
+        stat = catalog_path.stat()
+        version = (stat.st_mtime_ns, stat.st_ino)
+        if self._catalog is None or version != self._catalog_mtime:
+            with open(catalog_path, 'rb') as f:
+                self._catalog = pickle.load(f)
+            self._catalog_mtime = version
+
+        return self._catalog
+
+    def _update_catalog(self, update: Callable[[Dict[str, Dict[str, Any]]], None]):
+        """Apply update to a copy of the catalog under the catalog lock, then swap it in and save it"""
+        with scope_lock("document_catalog"):
+            catalog = dict(self._load_catalog())
+            update(catalog)
+            self._catalog = catalog
+            self._save_catalog()
+
+    def _save_catalog(self):
+        """Persist the in-memory document catalog (callers hold the document_catalog lock)"""
+        catalog_path = self._get_catalog_path()
+        atomic_pickle_dump(self._catalog, catalog_path)
+        stat = catalog_path.stat()
+        self._catalog_mtime = (stat.st_mtime_ns, stat.st_ino)
+
+    def _rebuild_catalog(self) -> Dict[str, Dict[str, Any]]:
+        """Build catalog entries for documents stored before the catalog existed"""
+        catalog = {}
+
+        # College event documents
+        college_paths = self._get_college_event_storage_path()
+        for metadata_file in college_paths['vector_db'].glob("metadata_*.pkl"):
+            try:
+                with open(metadata_file, 'rb') as f:
+                    metadata = pickle.load(f)
+                document_id = metadata_file.stem.replace("metadata_", "")
+                stored_files = list(college_paths['uploads'].glob(f"{document_id}_*"))
+                catalog[document_id] = {
+                    "document_id": document_id,
+                    "scope": "college_event",
+                    "department": None,
+                    "subject": None,
+                    "title": metadata.get("title"),
+                    "filename": metadata.get("filename"),
+                    "vector_db_path": str(college_paths['vector_db']),
+                    "file_path": str(stored_files[0]) if stored_files else None,
+                    "content_hash": metadata.get("content_hash")
+                }
+            except Exception as e:
+                logger.warning(f"Error cataloguing college event {metadata_file}: {str(e)}")
+
+        # Department event documents
+        department_events_root = self.base_storage_path / "vector_db" / "department_events"
+        if department_events_root.exists():
+            for department_path in department_events_root.iterdir():
+                if not department_path.is_dir():
+                    continue
+                uploads_path = self.base_storage_path / "uploads" / "department_events" / department_path.name
+                for metadata_file in department_path.glob("metadata_*.pkl"):
+                    try:
+                        with open(metadata_file, 'rb') as f:
+                            metadata = pickle.load(f)
+                        document_id = metadata_file.stem.replace("metadata_", "")
+                        stored_files = list(uploads_path.glob(f"{document_id}_*")) if uploads_path.exists() else []
+                        catalog[document_id] = {
+                            "document_id": document_id,
+                            "scope": "department_event",
+                            "department": metadata.get("department", department_path.name),
+                            "subject": None,
+                            "title": metadata.get("title"),
+                            "filename": metadata.get("filename"),
+                            "vector_db_path": str(department_path),
+                            "file_path": str(stored_files[0]) if stored_files else None,
+                            "content_hash": metadata.get("content_hash")
+                        }
+                    except Exception as e:
+                        logger.warning(f"Error cataloguing department event {metadata_file}: {str(e)}")
+
+        # Department and subject documents (storage/<Department>/[<Subject>/])
+        reserved_folders = {"uploads", "vector_db", "indexes", "extraction_cache", "locks"}
+        for department_path in self.base_storage_path.iterdir():
+            if not department_path.is_dir() or department_path.name in reserved_folders:
+                continue
+            search_paths = [department_path] + [item for item in department_path.iterdir() if item.is_dir()]
+            for search_path in search_paths:
+                for metadata_file in search_path.glob("metadata_*.pkl"):
+                    try:
+                        with open(metadata_file, 'rb') as f:
+                            metadata = pickle.load(f)
+                        document_id = metadata_file.stem.replace("metadata_", "")
+                        stored_files = list(search_path.glob(f"{document_id}_*"))
+                        catalog[document_id] = {
+                            "document_id": document_id,
+                            "scope": "document",
+                            "department": metadata.get("department", department_path.name),
+                            "subject": metadata.get("subject"),
+                            "title": metadata.get("title"),
+                            "filename": metadata.get("filename"),
+                            "vector_db_path": str(search_path),
+                            "file_path": str(stored_files[0]) if stored_files else None,
+                            "content_hash": metadata.get("content_hash")
+                        }
+                    except Exception as e:
+                        logger.warning(f"Error cataloguing document {metadata_file}: {str(e)}")
+
+        logger.info(f"Document catalog rebuilt with {len(catalog)} documents")
+        return catalog
+
+    def _register_document(self, document_id: str, scope: str, vector_db_path: Path, file_path: Path,
+                           title: str, filename: str, department: str = None, subject: str = None,
+                           content_hash: str = None, complete: bool = True):
+        """Add a processed document to the catalog.
+        
+        A document the catalog doesn't know can't be found for dedup, download or delete, so on
+        failure the vector artifacts and master index entry written for it are removed and the
+        error is raised to fail the upload. complete is False for an event document whose events
+        are still to be stored; it is not reused as a duplicate until mark_document_complete.
+        """
+        entry = {
+            "document_id": document_id,
+            "scope": scope,
+            "department": department,
+            "subject": subject,
+            "title": title,
+            "filename": filename,
+            "vector_db_path": str(vector_db_path),
+            "file_path": str(file_path),
+            "content_hash": content_hash,
+            "complete": complete
+        }
+        try:
+            self._update_catalog(lambda catalog: catalog.__setitem__(document_id, entry))
+            self._invalidate_scope(Path(vector_db_path))
+        except Exception as e:
+            logger.error(f"Error registering document {document_id} in catalog: {str(e)}")
+            for artifact in ("faiss_index", "chunks", "metadata"):
+                (Path(vector_db_path) / f"{artifact}_{document_id}.pkl").unlink(missing_ok=True)
+            self._evict_document(Path(vector_db_path), document_id)
+            self._remove_from_master_indexes(entry)
+            raise
+
+    def mark_document_complete(self, document_id: str):
+        """Record that every stage of a document's upload (including its events) has finished"""
+        def mark(catalog):
+            current = catalog.get(document_id)
+            if current is None:
+                raise KeyError(f"Document {document_id} is not in the catalog")
+            catalog[document_id] = {**current, "complete": True}
+        self._update_catalog(mark)
+
+    def get_catalog_entry(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Look up where a document is stored"""
+        return self._load_catalog().get(document_id)
+
+    def find_documents_by_filename(self, filename: str, scope: str = None) -> List[Dict[str, Any]]:
+        """Catalog entries with this original filename (for links that predate document ids in URLs)"""
+        return [
+            entry for entry in self._load_catalog().values()
+            if entry.get("filename") == filename and (scope is None or entry.get("scope") == scope)
+        ]
+
+    # Content-Addressed Deduplication
+    def find_documents_by_hash(self, content_hash: str) -> List[Dict[str, Any]]:
+        """Catalog entries of every stored document whose uploaded file has this content hash"""
+        if not content_hash:
+            return []
+        
+        catalog = self._load_catalog()
+        with self._hash_index_lock:
+            if self._hash_index is None or self._hash_index[0] is not catalog:
+                hash_index = {}
+                for entry in catalog.values():
+                    if entry.get("content_hash"):
+                        hash_index.setdefault(entry["content_hash"], []).append(entry["document_id"])
+                self._hash_index = (catalog, hash_index)
+            hash_index = self._hash_index[1]
+        
+        return [catalog[document_id] for document_id in hash_index.get(content_hash, [])
+                if document_id in catalog]
+
+    def find_duplicate(self, content_hash: str, vector_db_path: Path) -> Optional[Dict[str, Any]]:
+        """Catalog entry of the same file already stored in this scope's vector folder.
+        
+        Only a document whose upload completed counts: one left without its events or its stored
+        file by an interrupted upload is ingested again rather than returned with nothing in it.
+        Entries catalogued before uploads were tracked have no flag and count as complete.
+        """
+        for entry in self.find_documents_by_hash(content_hash):
+            if (Path(entry["vector_db_path"]) == vector_db_path
+                    and entry.get("complete", True)
+                    and entry.get("file_path") and Path(entry["file_path"]).exists()
+                    and (vector_db_path / f"faiss_index_{entry['document_id']}.pkl").exists()):
+                return entry
+        return None
+
+    def _reuse_duplicate(self, entry: Dict[str, Any], file_path: str, target_path: Path,
+                         title: str) -> Dict[str, Any]:
+        """Handle an upload identical to a document already stored in the same scope.
+        
+        The copy just streamed into storage is removed, a new title is kept as an alias of
+        the existing document, and the existing document's metadata is returned.
+        """
+        existing_file = Path(entry["file_path"]) if entry.get("file_path") else None
+        if Path(file_path).resolve() == target_path.resolve() and (
+                existing_file is None or existing_file.resolve() != target_path.resolve()):
+            target_path.unlink(missing_ok=True)
+        
+        if title and title != entry.get("title") and title not in entry.get("aliases", []):
+            def add_alias(catalog):
+                current = catalog.get(entry["document_id"])
+                if current is not None and title not in current.get("aliases", []):
+                    catalog[entry["document_id"]] = {**current, "aliases": current.get("aliases", []) + [title]}
+            self._update_catalog(add_alias)
+        
+        metadata_file = Path(entry["vector_db_path"]) / f"metadata_{entry['document_id']}.pkl"
+        with open(metadata_file, 'rb') as f:
+            metadata = pickle.load(f)
+        
+        logger.info(f"Upload of '{title}' is identical to stored document {entry['document_id']}")
+        return metadata
+
+    def load_reusable_vectors(self, content_hash: str) -> Optional[Tuple[List[str], np.ndarray, int]]:
+        """Chunks, embeddings and text length of the same file already processed in another scope"""
+        for entry in self.find_documents_by_hash(content_hash):
+            vector_db_path = Path(entry["vector_db_path"])
+            document_id = entry["document_id"]
+            try:
+                with open(vector_db_path / f"faiss_index_{document_id}.pkl", 'rb') as f:
+                    index = pickle.load(f)
+                with open(vector_db_path / f"chunks_{document_id}.pkl", 'rb') as f:
+                    chunks = pickle.load(f)
+                with open(vector_db_path / f"metadata_{document_id}.pkl", 'rb') as f:
+                    metadata = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Cannot reuse vectors of document {document_id}: {str(e)}")
+                continue
+            
+            if not chunks or index.ntotal != len(chunks):
+                continue
+            
+            # Flat indexes store the raw vectors, so they can be read back instead of re-embedded
+            embeddings = index.reconstruct_n(0, index.ntotal)
+            text_length = metadata.get("text_length") or sum(len(chunk) for chunk in chunks)
+            logger.info(f"Reusing chunks and vectors of identical document {document_id}")
+            return chunks, embeddings, text_length
+        
+        return None
+
+    def _chunk_and_embed(self, file_path: str, content_hash: str = None) -> Tuple[List[str], np.ndarray, int]:
+        """Chunks, embeddings and text length of a stored upload.
+        
+        When the same file was already processed in another scope its chunks and vectors are
+        reused, so no text extraction or embedding call is made.
+        """
+        reused = self.load_reusable_vectors(content_hash)
+        if reused:
+            return reused
+        
+        # Extract text from document
+        full_text = self.extract_text_from_document(file_path)
+        chunks = self.chunk_text(full_text)
+        
+        # Create embeddings
+        embeddings = self.create_embeddings(chunks)
+        return chunks, embeddings, len(full_text)
+
+    def chunk_text(self, full_text: str) -> List[str]:
+        """Split extracted document text into chunks, rejecting documents without text"""
+        if not full_text.strip():
+            raise ValueError("No text content found in the document")
+        
+        # Split into chunks using our simple text splitter
+        chunks = self._split_text(full_text)
+        
+        if not chunks:
+            raise ValueError("No chunks created from the document")
+        return chunks
+
+    # Loaded Vector Artifacts
+    def _load_scope_documents(self, vector_db_path: Path) -> Dict[str, tuple]:
+        """Get (faiss index, chunks, metadata) for every document in a vector folder.
+
+        Artifacts are kept in memory and only re-read for documents added since the folder was
+        last scanned. The folder is rescanned when its mtime or the catalog changes (every
+        document added or deleted by any worker rewrites the catalog, so a change within one
+        mtime tick is not missed) and after this process saves or deletes a document in it.
+        The returned dict is never modified afterwards, so callers can iterate it without a lock.
+        """
+        key = str(vector_db_path)
+        if not vector_db_path.exists():
+            self._scope_cache.pop(key, None)
+            return {}
+
+        self._load_catalog()
+        version = (vector_db_path.stat().st_mtime_ns, self._catalog_mtime)
+        cached = self._scope_cache.get(key)
+        if cached and cached['version'] == version:
+            return cached['documents']
+
+        previous = cached['documents'] if cached else {}
+        documents = {}
+        for faiss_file in vector_db_path.glob("faiss_index_*.pkl"):
+            document_id = faiss_file.stem.replace("faiss_index_", "")
+            if document_id in previous:
+                documents[document_id] = previous[document_id]
+                continue
+
+            chunks_file = vector_db_path / f"chunks_{document_id}.pkl"
+            metadata_file = vector_db_path / f"metadata_{document_id}.pkl"
+            if not chunks_file.exists() or not metadata_file.exists():
+                logger.warning(f"Missing files for document {document_id} in {vector_db_path}")
+                continue
+
+            try:
+                with open(faiss_file, 'rb') as f:
+                    index = pickle.load(f)
+                with open(chunks_file, 'rb') as f:
+                    chunks = pickle.load(f)
+                with open(metadata_file, 'rb') as f:
+                    metadata = pickle.load(f)
+                documents[document_id] = (index, chunks, metadata)
+            except Exception as e:
+                logger.warning(f"Error loading document {document_id} from {vector_db_path}: {str(e)}")
+                continue
+
+        self._scope_cache[key] = {'version': version, 'documents': documents}
+        return documents
+
+    def _invalidate_scope(self, vector_db_path: Path, evict: str = None):
+        """Make the next lookup rescan a vector folder, dropping document evict from its cache.
+        
+        The cached dict may be being iterated by a query, so a new one is swapped in.
+        """
+        key = str(vector_db_path)
+        cached = self._scope_cache.get(key)
+        if cached:
+            documents = {document_id: artifacts for document_id, artifacts in cached['documents'].items()
+                         if document_id != evict}
+            self._scope_cache[key] = {'version': None, 'documents': documents}
+
+    def _evict_document(self, vector_db_path: Path, document_id: str):
+        """Drop a document's loaded artifacts from the in-memory scope cache"""
+        self._invalidate_scope(vector_db_path, evict=document_id)
+
+    def warm_up(self, max_scopes: int = 3) -> Dict[str, Any]:
+        """Load the catalog and the vector folders holding the most documents into memory"""
+        catalog = self._load_catalog()
+
+        scope_sizes = {}
+        for entry in catalog.values():
+            scope_sizes[entry["vector_db_path"]] = scope_sizes.get(entry["vector_db_path"], 0) + 1
+
+        hottest_scopes = sorted(scope_sizes, key=scope_sizes.get, reverse=True)[:max_scopes]
+        loaded_documents = 0
+        for vector_db_path in hottest_scopes:
+            loaded_documents += len(self._load_scope_documents(Path(vector_db_path)))
+
+        logger.info(f"Warm-up loaded {loaded_documents} documents from {len(hottest_scopes)} scopes")
+        return {
+            "catalog_documents": len(catalog),
+            "scopes_loaded": hottest_scopes,
+            "documents_loaded": loaded_documents
+        }
+
     def _extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
+        import PyPDF2
+        
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
@@ -74,6 +513,8 @@ class VectorDatabase:
 
     def _extract_text_from_docx(self, file_path: str) -> str:
         """Extract text from DOCX file"""
+        from docx import Document as DocxDocument
+        
         try:
             doc = DocxDocument(file_path)
             text = ""
@@ -160,9 +601,9 @@ class VectorDatabase:
             if not chunks:
                 return np.array([])
             
-            # Use OpenAI's text-embedding-ada-002 model (cheapest embedding model)
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
+            # Configured embedding model (text-embedding-ada-002 by default)
+            response = llm_gateway.embed_blocking(
+                model=EMBEDDING_MODEL,
                 input=chunks
             )
             
@@ -179,6 +620,8 @@ class VectorDatabase:
     def save_vector_database(self, embeddings: np.ndarray, chunks: List[str], 
                            storage_path: Path, document_id: str, document_metadata: Dict[str, Any] = None) -> tuple:
         """Save FAISS index and chunks to user-specific folder with enhanced metadata"""
+        import faiss
+        
         try:
             # Create FAISS index
             dimension = embeddings.shape[1]
@@ -187,13 +630,11 @@ class VectorDatabase:
             
             # Save FAISS index
             faiss_path = storage_path / f"faiss_index_{document_id}.pkl"
-            with open(faiss_path, 'wb') as f:
-                pickle.dump(index, f)
+            atomic_pickle_dump(index, faiss_path)
             
             # Save chunks
             chunks_path = storage_path / f"chunks_{document_id}.pkl"
-            with open(chunks_path, 'wb') as f:
-                pickle.dump(chunks, f)
+            atomic_pickle_dump(chunks, chunks_path)
             
             # Enhanced metadata combining basic info with document metadata
             metadata = {
@@ -210,8 +651,7 @@ class VectorDatabase:
                 metadata.update(document_metadata)
             
             metadata_path = storage_path / f"metadata_{document_id}.pkl"
-            with open(metadata_path, 'wb') as f:
-                pickle.dump(metadata, f)
+            atomic_pickle_dump(metadata, metadata_path)
                 
             logger.info(f"Vector database saved to {storage_path}")
             return str(faiss_path), str(chunks_path), str(metadata_path)
@@ -225,28 +665,28 @@ class VectorDatabase:
         try:
             index_path = self.base_storage_path / "document_index.pkl"
             
-            # Load existing index or create new one
-            if index_path.exists():
-                with open(index_path, 'rb') as f:
-                    doc_index = pickle.load(f)
-            else:
-                doc_index = {"departments": {}}
-            
-            # Ensure department exists
-            if department not in doc_index["departments"]:
-                doc_index["departments"][department] = {"general": [], "subjects": {}}
-            
-            # Add document to appropriate category
-            if subject:
-                if subject not in doc_index["departments"][department]["subjects"]:
-                    doc_index["departments"][department]["subjects"][subject] = []
-                doc_index["departments"][department]["subjects"][subject].append(document_metadata)
-            else:
-                doc_index["departments"][department]["general"].append(document_metadata)
-            
-            # Save updated index
-            with open(index_path, 'wb') as f:
-                pickle.dump(doc_index, f)
+            with scope_lock("document_index"):
+                # Load existing index or create new one
+                if index_path.exists():
+                    with open(index_path, 'rb') as f:
+                        doc_index = pickle.load(f)
+                else:
+                    doc_index = {"departments": {}}
+                
+                # Ensure department exists
+                if department not in doc_index["departments"]:
+                    doc_index["departments"][department] = {"general": [], "subjects": {}}
+                
+                # Add document to appropriate category
+                if subject:
+                    if subject not in doc_index["departments"][department]["subjects"]:
+                        doc_index["departments"][department]["subjects"][subject] = []
+                    doc_index["departments"][department]["subjects"][subject].append(document_metadata)
+                else:
+                    doc_index["departments"][department]["general"].append(document_metadata)
+                
+                # Save updated index
+                atomic_pickle_dump(doc_index, index_path)
                 
             logger.info(f"Document index updated for {department}/{subject or 'general'}")
             
@@ -259,25 +699,25 @@ class VectorDatabase:
             storage_paths = self._get_college_event_storage_path()
             index_path = storage_paths['indexes'] / "college_events_index.pkl"
             
-            # Load existing index or create new one
-            if index_path.exists():
-                with open(index_path, 'rb') as f:
-                    events_index = pickle.load(f)
-            else:
-                events_index = {"events": [], "event_types": {}}
-            
-            # Add document to events list
-            events_index["events"].append(document_metadata)
-            
-            # Organize by event type
-            event_type = document_metadata.get("event_type", "general")
-            if event_type not in events_index["event_types"]:
-                events_index["event_types"][event_type] = []
-            events_index["event_types"][event_type].append(document_metadata)
-            
-            # Save updated index
-            with open(index_path, 'wb') as f:
-                pickle.dump(events_index, f)
+            with scope_lock("college_events_index"):
+                # Load existing index or create new one
+                if index_path.exists():
+                    with open(index_path, 'rb') as f:
+                        events_index = pickle.load(f)
+                else:
+                    events_index = {"events": [], "event_types": {}}
+                
+                # Add document to events list
+                events_index["events"].append(document_metadata)
+                
+                # Organize by event type
+                event_type = document_metadata.get("event_type", "general")
+                if event_type not in events_index["event_types"]:
+                    events_index["event_types"][event_type] = []
+                events_index["event_types"][event_type].append(document_metadata)
+                
+                # Save updated index
+                atomic_pickle_dump(events_index, index_path)
                 
             logger.info(f"College events index updated for {event_type}")
             
@@ -313,11 +753,38 @@ class VectorDatabase:
             return {"departments": {}}
 
     def process_college_event_document(self, file_path: str, user_id: str, role: str,
-                                      filename: str, title: str, event_type: str = "general") -> Dict[str, Any]:
-        """Process uploaded college event document and create vector database"""
+                                      filename: str, title: str, event_type: str = "general",
+                                      document_id: str = None, content_hash: str = None,
+                                      prepared: Tuple[List[str], np.ndarray, int] = None,
+                                      awaiting_events: bool = False) -> Dict[str, Any]:
+        """Process uploaded college event document and create vector database.
+        
+        prepared is an optional (chunks, embeddings, text length) already produced by the
+        ingestion pipeline; without it the document is extracted and embedded here. With
+        awaiting_events the document is catalogued as incomplete until its events are stored.
+        """
         try:
-            document_id = str(uuid.uuid4())
+            document_id = document_id or str(uuid.uuid4())
             storage_paths = self._get_college_event_storage_path()
+            user_file_path = storage_paths['uploads'] / f"{document_id}_{filename}"
+            
+            # The same file uploaded again as a college event returns the stored document
+            duplicate = self.find_duplicate(content_hash, storage_paths['vector_db'])
+            if duplicate:
+                existing = self._reuse_duplicate(duplicate, file_path, user_file_path, title)
+                return {
+                    "document_id": duplicate["document_id"],
+                    "chunk_count": existing.get("chunk_count", 0),
+                    "faiss_path": existing.get("faiss_path"),
+                    "chunks_path": existing.get("chunks_path"),
+                    "metadata_path": str(storage_paths['vector_db'] / f"metadata_{duplicate['document_id']}.pkl"),
+                    "user_file_path": duplicate.get("file_path"),
+                    "text_length": existing.get("text_length", 0),
+                    "event_type": existing.get("event_type", event_type),
+                    "storage_type": "college_event",
+                    "duplicate": True,
+                    "message": "Identical college event document already exists"
+                }
             
             # Create enhanced metadata for college events
             document_metadata = {
@@ -330,31 +797,19 @@ class VectorDatabase:
                 "upload_date": datetime.now().isoformat(),
                 "file_type": Path(filename).suffix.lower(),
                 "storage_type": "college_event",
-                "accessible_to": "all_users"
+                "accessible_to": "all_users",
+                "content_hash": content_hash
             }
             
-            # Copy file to college events upload storage location
-            user_file_path = storage_paths['uploads'] / f"{document_id}_{filename}"
-            import shutil
-            shutil.copy2(file_path, user_file_path)
+            # Copy file to college events upload storage location (no-op when streamed there)
+            self._store_upload(file_path, user_file_path)
             
             # Store the correct relative path for frontend access
             document_metadata["file_path"] = f"storage/uploads/college_events/{document_id}_{filename}"
             
-            # Extract text from document
-            full_text = self.extract_text_from_document(str(user_file_path))
-            
-            if not full_text.strip():
-                raise ValueError("No text content found in the document")
-            
-            # Split into chunks using our simple text splitter
-            chunks = self._split_text(full_text)
-            
-            if not chunks:
-                raise ValueError("No chunks created from the document")
-            
-            # Create embeddings
-            embeddings = self.create_embeddings(chunks)
+            # Chunks and embeddings (reused when the same file is stored in another scope)
+            chunks, embeddings, text_length = prepared or self._chunk_and_embed(str(user_file_path), content_hash)
+            document_metadata["text_length"] = text_length
             
             # Save vector database in the vector_database subfolder
             faiss_path, chunks_path, metadata_path = self.save_vector_database(
@@ -363,6 +818,9 @@ class VectorDatabase:
             
             # Update college events index
             self._update_college_events_index(document_metadata)
+            self._register_document(document_id, "college_event", storage_paths['vector_db'], user_file_path,
+                                    title=title, filename=filename, content_hash=content_hash,
+                                    complete=not awaiting_events)
             
             return {
                 "document_id": document_id,
@@ -371,7 +829,7 @@ class VectorDatabase:
                 "chunks_path": chunks_path,
                 "metadata_path": metadata_path,
                 "user_file_path": str(user_file_path),
-                "text_length": len(full_text),
+                "text_length": text_length,
                 "event_type": event_type,
                 "storage_type": "college_event",
                 "message": "College event document processed successfully"
@@ -382,11 +840,37 @@ class VectorDatabase:
             raise
 
     def process_document(self, file_path: str, user_id: str, role: str, department: str,
-                        filename: str, title: str, subject: str = None) -> Dict[str, Any]:
-        """Process uploaded document and create vector database with enhanced organization"""
+                        filename: str, title: str, subject: str = None,
+                        document_id: str = None, content_hash: str = None,
+                        prepared: Tuple[List[str], np.ndarray, int] = None) -> Dict[str, Any]:
+        """Process uploaded document and create vector database with enhanced organization.
+        
+        prepared is an optional (chunks, embeddings, text length) already produced by the
+        ingestion pipeline; without it the document is extracted and embedded here.
+        """
         try:
-            document_id = str(uuid.uuid4())
-            storage_path = self._get_user_storage_path(user_id, role, department)
+            document_id = document_id or str(uuid.uuid4())
+            storage_path = self._get_document_storage_path(user_id, role, department, subject)
+            user_file_path = storage_path / f"{document_id}_{filename}"
+            
+            # The same file uploaded again to this department/subject returns the stored document
+            duplicate = self.find_duplicate(content_hash, storage_path)
+            if duplicate:
+                existing = self._reuse_duplicate(duplicate, file_path, user_file_path, title)
+                return {
+                    "document_id": duplicate["document_id"],
+                    "chunk_count": existing.get("chunk_count", 0),
+                    "faiss_path": existing.get("faiss_path"),
+                    "chunks_path": existing.get("chunks_path"),
+                    "metadata_path": str(storage_path / f"metadata_{duplicate['document_id']}.pkl"),
+                    "user_file_path": duplicate.get("file_path"),
+                    "text_length": existing.get("text_length", 0),
+                    "department": department,
+                    "subject": subject,
+                    "storage_type": existing.get("storage_type"),
+                    "duplicate": True,
+                    "message": "Identical document already exists"
+                }
             
             # Create enhanced metadata
             document_metadata = {
@@ -398,37 +882,23 @@ class VectorDatabase:
                 "department": department,
                 "subject": subject,
                 "upload_date": datetime.now().isoformat(),
-                "file_type": Path(filename).suffix.lower()
+                "file_type": Path(filename).suffix.lower(),
+                "content_hash": content_hash
             }
             
             # If subject is provided, use subject-specific storage
             if subject:
-                storage_path = storage_path / subject.replace(" ", "_").replace("/", "_")
-                storage_path.mkdir(parents=True, exist_ok=True)
                 document_metadata["storage_type"] = "subject_specific"
                 document_metadata["subject_path"] = str(storage_path)
             else:
                 document_metadata["storage_type"] = "general"
             
-            # Copy file to appropriate storage location
-            user_file_path = storage_path / f"{document_id}_{filename}"
-            import shutil
-            shutil.copy2(file_path, user_file_path)
+            # Copy file to appropriate storage location (no-op when streamed there)
+            self._store_upload(file_path, user_file_path)
             
-            # Extract text from document
-            full_text = self.extract_text_from_document(str(user_file_path))
-            
-            if not full_text.strip():
-                raise ValueError("No text content found in the document")
-            
-            # Split into chunks using our simple text splitter
-            chunks = self._split_text(full_text)
-            
-            if not chunks:
-                raise ValueError("No chunks created from the document")
-            
-            # Create embeddings
-            embeddings = self.create_embeddings(chunks)
+            # Chunks and embeddings (reused when the same file is stored in another scope)
+            chunks, embeddings, text_length = prepared or self._chunk_and_embed(str(user_file_path), content_hash)
+            document_metadata["text_length"] = text_length
             
             # Save vector database with enhanced metadata
             faiss_path, chunks_path, metadata_path = self.save_vector_database(
@@ -437,6 +907,9 @@ class VectorDatabase:
             
             # Update document index for easy retrieval
             self._update_document_index(department, subject, document_metadata)
+            self._register_document(document_id, "document", storage_path, user_file_path,
+                                    title=title, filename=filename, department=department, subject=subject,
+                                    content_hash=content_hash)
             
             return {
                 "document_id": document_id,
@@ -445,7 +918,7 @@ class VectorDatabase:
                 "chunks_path": chunks_path,
                 "metadata_path": metadata_path,
                 "user_file_path": str(user_file_path),
-                "text_length": len(full_text),
+                "text_length": text_length,
                 "department": department,
                 "subject": subject,
                 "storage_type": document_metadata["storage_type"],
@@ -460,12 +933,8 @@ class VectorDatabase:
                        subject: str = None, top_k: int = 5, search_scope: str = "all") -> List[Dict[str, Any]]:
         """Enhanced query with context-aware searching"""
         try:
-            # Create query embedding using OpenAI
-            query_response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=[query]
-            )
-            query_embedding = np.array([query_response.data[0].embedding])
+            # Query embedding, batched with concurrent chat queries
+            query_embedding = np.array([self.query_embedder.embed(query)])
             
             all_results = []
             search_paths = []
@@ -500,57 +969,40 @@ class VectorDatabase:
                 if not search_path.exists():
                     continue
                     
-                for faiss_file in search_path.glob("faiss_index_*.pkl"):
-                    document_id = faiss_file.stem.replace("faiss_index_", "")
-                    chunks_file = search_path / f"chunks_{document_id}.pkl"
-                    metadata_file = search_path / f"metadata_{document_id}.pkl"
-                    
-                    if chunks_file.exists() and metadata_file.exists():
-                        try:
-                            # Load FAISS index
-                            with open(faiss_file, 'rb') as f:
-                                index = pickle.load(f)
-                            
-                            # Load chunks
-                            with open(chunks_file, 'rb') as f:
-                                chunks = pickle.load(f)
-                            
-                            # Load metadata
-                            with open(metadata_file, 'rb') as f:
-                                metadata = pickle.load(f)
-                            
-                            # Skip if subject filter doesn't match
-                            if search_scope == "subject" and subject:
-                                if metadata.get("subject") != subject:
-                                    continue
+                for document_id, (index, chunks, metadata) in self._load_scope_documents(search_path).items():
+                    try:
+                        # Skip if subject filter doesn't match
+                        if search_scope == "subject" and subject:
+                            if metadata.get("subject") != subject:
+                                continue
+                        
+                        # Search for similar chunks
+                        k = min(top_k, len(chunks))
+                        if k > 0:
+                            distances, indices = index.search(
+                                query_embedding.astype('float32'), k
+                            )
                             
-                            # Search for similar chunks
-                            k = min(top_k, len(chunks))
-                            if k > 0:
-                                distances, indices = index.search(
-                                    query_embedding.astype('float32'), k
-                                )
-                                
-                                # Collect results with scores and enhanced metadata
-                                for i, idx in enumerate(indices[0]):
-                                    if idx < len(chunks) and distances[0][i] < 2.0:  # Similarity threshold
-                                        result = {
-                                            'text': chunks[idx],
-                                            'score': float(distances[0][i]),
-                                            'document_id': document_id,
-                                            'chunk_index': int(idx),
-                                            'metadata': metadata,
-                                            'department': metadata.get('department', department),
-                                            'subject': metadata.get('subject'),
-                                            'title': metadata.get('title', 'Unknown'),
-                                            'filename': metadata.get('filename', 'Unknown'),
-                                            'storage_type': metadata.get('storage_type', 'general'),
-                                            'context_path': str(search_path.relative_to(self.base_storage_path))
-                                        }
-                                        all_results.append(result)
-                        except Exception as e:
-                            logger.warning(f"Error processing document {document_id}: {str(e)}")
-                            continue
+                            # Collect results with scores and enhanced metadata
+                            for i, idx in enumerate(indices[0]):
+                                if idx < len(chunks) and distances[0][i] < 2.0:  # Similarity threshold
+                                    result = {
+                                        'text': chunks[idx],
+                                        'score': float(distances[0][i]),
+                                        'document_id': document_id,
+                                        'chunk_index': int(idx),
+                                        'metadata': metadata,
+                                        'department': metadata.get('department', department),
+                                        'subject': metadata.get('subject'),
+                                        'title': metadata.get('title', 'Unknown'),
+                                        'filename': metadata.get('filename', 'Unknown'),
+                                        'storage_type': metadata.get('storage_type', 'general'),
+                                        'context_path': str(search_path.relative_to(self.base_storage_path))
+                                    }
+                                    all_results.append(result)
+                    except Exception as e:
+                        logger.warning(f"Error processing document {document_id}: {str(e)}")
+                        continue
             
             # Sort by similarity score (lower is better) and return top results
             all_results.sort(key=lambda x: x['score'])
@@ -563,12 +1015,8 @@ class VectorDatabase:
     def query_college_events(self, query: str, top_k: int = 5, department_filter: str = None) -> List[Dict[str, Any]]:
         """Query college event documents - accessible to all users"""
         try:
-            # Create query embedding using OpenAI
-            query_response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=[query]
-            )
-            query_embedding = np.array([query_response.data[0].embedding])
+            # Query embedding, batched with concurrent chat queries
+            query_embedding = np.array([self.query_embedder.embed(query)])
             
             all_results = []
             storage_paths = self._get_college_event_storage_path()
@@ -576,74 +1024,57 @@ class VectorDatabase:
             
             # Search through all college event documents
             if vector_db_path.exists():
-                for faiss_file in vector_db_path.glob("faiss_index_*.pkl"):
-                    document_id = faiss_file.stem.replace("faiss_index_", "")
-                    chunks_file = vector_db_path / f"chunks_{document_id}.pkl"
-                    metadata_file = vector_db_path / f"metadata_{document_id}.pkl"
-                    
-                    if chunks_file.exists() and metadata_file.exists():
-                        try:
-                            # Load FAISS index
-                            with open(faiss_file, 'rb') as f:
-                                index = pickle.load(f)
-                            
-                            # Load chunks
-                            with open(chunks_file, 'rb') as f:
-                                chunks = pickle.load(f)
-                            
-                            # Load metadata
-                            with open(metadata_file, 'rb') as f:
-                                metadata = pickle.load(f)
+                for document_id, (index, chunks, metadata) in self._load_scope_documents(vector_db_path).items():
+                    try:
+                        # Search for similar chunks
+                        k = min(top_k, len(chunks))
+                        if k > 0:
+                            distances, indices = index.search(
+                                query_embedding.astype('float32'), k
+                            )
                             
-                            # Search for similar chunks
-                            k = min(top_k, len(chunks))
-                            if k > 0:
-                                distances, indices = index.search(
-                                    query_embedding.astype('float32'), k
-                                )
-                                
-                                # Collect results with scores and metadata
-                                for i, idx in enumerate(indices[0]):
-                                    if idx < len(chunks) and distances[0][i] < 2.0:  # Similarity threshold
-                                        result = {
-                                            'text': chunks[idx],
-                                            'score': float(distances[0][i]),
-                                            'document_id': document_id,
-                                            'chunk_index': int(idx),
-                                            'metadata': metadata,
-                                            'title': metadata.get('title', 'Unknown'),
-                                            'filename': metadata.get('filename', 'Unknown'),
-                                            'event_type': metadata.get('event_type', 'general'),
-                                            'upload_date': metadata.get('upload_date'),
-                                            'storage_type': 'college_event'
-                                        }
+                            # Collect results with scores and metadata
+                            for i, idx in enumerate(indices[0]):
+                                if idx < len(chunks) and distances[0][i] < 2.0:  # Similarity threshold
+                                    result = {
+                                        'text': chunks[idx],
+                                        'score': float(distances[0][i]),
+                                        'document_id': document_id,
+                                        'chunk_index': int(idx),
+                                        'metadata': metadata,
+                                        'title': metadata.get('title', 'Unknown'),
+                                        'filename': metadata.get('filename', 'Unknown'),
+                                        'event_type': metadata.get('event_type', 'general'),
+                                        'upload_date': metadata.get('upload_date'),
+                                        'storage_type': 'college_event'
+                                    }
+                                    
+                                    # Apply department filter if specified
+                                    if department_filter:
+                                        # Check if the event/document is related to the specified department
+                                        # Look in metadata, title, event_type, or text content
+                                        dept_keywords = [department_filter.lower()]
+                                        if department_filter.lower() == "computer science":
+                                            dept_keywords.extend(["cse", "cs", "computing", "software", "programming"])
+                                        elif department_filter.lower() == "mechanical engineering":
+                                            dept_keywords.extend(["mech", "mechanical", "engineering"])
+                                        elif department_filter.lower() == "electrical engineering":  
+                                            dept_keywords.extend(["eee", "electrical", "electronics"])
                                         
-                                        # Apply department filter if specified
-                                        if department_filter:
-                                            # Check if the event/document is related to the specified department
-                                            # Look in metadata, title, event_type, or text content
-                                            dept_keywords = [department_filter.lower()]
-                                            if department_filter.lower() == "computer science":
-                                                dept_keywords.extend(["cse", "cs", "computing", "software", "programming"])
-                                            elif department_filter.lower() == "mechanical engineering":
-                                                dept_keywords.extend(["mech", "mechanical", "engineering"])
-                                            elif department_filter.lower() == "electrical engineering":  
-                                                dept_keywords.extend(["eee", "electrical", "electronics"])
-                                            
-                                            content_to_check = (
-                                                result['title'].lower() + " " + 
-                                                result['event_type'].lower() + " " + 
-                                                result['text'].lower() + " " +
-                                                str(metadata.get('department', '')).lower()
-                                            )
-                                            
-                                            if not any(keyword in content_to_check for keyword in dept_keywords):
-                                                continue  # Skip this result if it doesn't match the department filter
+                                        content_to_check = (
+                                            result['title'].lower() + " " + 
+                                            result['event_type'].lower() + " " + 
+                                            result['text'].lower() + " " +
+                                            str(metadata.get('department', '')).lower()
+                                        )
                                         
-                                        all_results.append(result)
-                        except Exception as e:
-                            logger.warning(f"Error processing college event document {document_id}: {str(e)}")
-                            continue
+                                        if not any(keyword in content_to_check for keyword in dept_keywords):
+                                            continue  # Skip this result if it doesn't match the department filter
+                                    
+                                    all_results.append(result)
+                    except Exception as e:
+                        logger.warning(f"Error processing college event document {document_id}: {str(e)}")
+                        continue
             
             # Sort by similarity score (lower is better) and return top results
             all_results.sort(key=lambda x: x['score'])
@@ -653,9 +1084,13 @@ class VectorDatabase:
             logger.error(f"Error querying college events: {str(e)}")
             return []
 
-    def generate_response(self, query: str, context_chunks: List[Dict[str, Any]], 
-                         search_context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Generate response using OpenAI with retrieved context and search information"""
+    async def generate_response(self, query: str, context_chunks: List[Dict[str, Any]], 
+                               search_context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Generate response using OpenAI with retrieved context and search information.
+        
+        The call goes through the LLM gateway, so identical questions asked at the same time
+        over the same context share one completion.
+        """
         try:
             if not context_chunks:
                 return {
@@ -669,7 +1104,10 @@ class VectorDatabase:
             sources_info = []
             context_parts = []
             
-            for chunk in context_chunks[:3]:  # Use top 3 chunks
+            # As many of the best chunks as fit in the context token budget
+            packed_chunks = pack_context(context_chunks, text_key='text', overhead_tokens=20)
+            
+            for chunk in packed_chunks:
                 source_info = {
                     "title": chunk.get('title', 'Unknown Document'),
                     "filename": chunk.get('filename', 'Unknown'),
@@ -713,33 +1151,48 @@ Instructions:
 
 Answer:"""
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a helpful college assistant that answers questions based on provided documents. Always base your responses on the given context, mention source documents when relevant, and be clear about what information is available."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.3,
-                top_p=1.0
-            )
+            try:
+                response = await llm_gateway.chat(
+                    model=CHAT_MODEL,
+                    messages=[
+                        {
+                            "role": "system", 
+                            "content": "You are a helpful college assistant that answers questions based on provided documents. Always base your responses on the given context, mention source documents when relevant, and be clear about what information is available."
+                        },
+                        {
+                            "role": "user", 
+                            "content": prompt
+                        }
+                    ],
+                    max_tokens=500,
+                    temperature=0.3,
+                    top_p=1.0
+                )
+                answer = response.choices[0].message.content.strip()
+                usage = usage_from_response(response)
+                degraded = False
+            except Exception as e:
+                # Upstream slow, failing or circuit open: answer from the retrieved text itself
+                logger.warning(f"LLM unavailable, answering extractively: {str(e)}")
+                answer = ("The AI assistant is temporarily unavailable. The most relevant passages from your documents are:\n\n"
+                          + extractive_answer(query, packed_chunks, text_key='text'))
+                usage = {}
+                degraded = True
             
             return {
-                "response": response.choices[0].message.content.strip(),
+                "response": answer,
                 "sources_count": len(context_chunks),
                 "source_documents": sources_info,
                 "search_context": search_context or {},
                 "context_breakdown": {
                     "departments_searched": list(set(chunk.get('department') for chunk in context_chunks if chunk.get('department'))),
                     "subjects_searched": list(set(chunk.get('subject') for chunk in context_chunks if chunk.get('subject'))),
-                    "storage_types": list(set(chunk.get('storage_type') for chunk in context_chunks if chunk.get('storage_type')))
-                }
+                    "storage_types": list(set(chunk.get('storage_type') for chunk in context_chunks if chunk.get('storage_type'))),
+                    "chunks_in_context": len(packed_chunks),
+                    "context_tokens": sum(chunk['tokens'] for chunk in packed_chunks)
+                },
+                "usage": usage,
+                "degraded": degraded
             }
             
         except Exception as e:
@@ -780,42 +1233,106 @@ Answer:"""
             logger.error(f"Error getting user documents: {str(e)}")
             return []
 
-    def delete_document(self, document_id: str, user_id: str, role: str, department: str = "Computer Science") -> bool:
-        """Delete a document and all its associated files"""
+    def delete_document(self, document_id: str, user_id: str, role: str, department: str = None) -> bool:
+        """Delete a document, its vector files and its entries in the master indexes"""
         try:
-            storage_path = self._get_user_storage_path(user_id, role, department)
-            
-            # Search in main folder and subfolders for the document
-            search_paths = [storage_path]
-            for item in storage_path.iterdir():
-                if item.is_dir():
-                    search_paths.append(item)
+            entry = self.get_catalog_entry(document_id)
+            if not entry:
+                logger.info(f"Document {document_id} not found in catalog")
+                return False
+            
+            # Department-scoped documents can only be deleted through their own department
+            if department and entry.get("department"):
+                requested = department.replace(" ", "").replace("/", "_").replace("\\", "_")
+                stored = entry["department"].replace(" ", "").replace("/", "_").replace("\\", "_")
+                if requested.lower() != stored.lower():
+                    logger.info(f"Document {document_id} does not belong to department {department}")
+                    return False
+            
+            vector_db_path = Path(entry["vector_db_path"])
+            files_to_delete = [
+                vector_db_path / f"faiss_index_{document_id}.pkl",
+                vector_db_path / f"chunks_{document_id}.pkl",
+                vector_db_path / f"metadata_{document_id}.pkl"
+            ]
+            if entry.get("file_path"):
+                files_to_delete.append(Path(entry["file_path"]))
             
             deleted_count = 0
-            for search_path in search_paths:
-                # Files to delete in this path
-                files_to_delete = [
-                    search_path / f"faiss_index_{document_id}.pkl",
-                    search_path / f"chunks_{document_id}.pkl",
-                    search_path / f"metadata_{document_id}.pkl"
-                ]
-                
-                # Also delete the original file
-                for file_path in search_path.glob(f"{document_id}_*"):
-                    files_to_delete.append(file_path)
-                
-                for file_path in files_to_delete:
-                    if file_path.exists():
-                        file_path.unlink()
-                        deleted_count += 1
+            for file_path in files_to_delete:
+                if file_path.exists():
+                    file_path.unlink()
+                    deleted_count += 1
+            
+            self._evict_document(vector_db_path, document_id)
+            self._remove_from_master_indexes(entry)
             
-            logger.info(f"Deleted {deleted_count} files for document {document_id}")
-            return deleted_count > 0
+            self._update_catalog(lambda catalog: catalog.pop(document_id, None))
+            
+            logger.info(f"Deleted {deleted_count} files for {entry['scope']} document {document_id}")
+            return True
             
         except Exception as e:
             logger.error(f"Error deleting document {document_id}: {str(e)}")
             return False
 
+    def _remove_from_master_indexes(self, entry: Dict[str, Any]):
+        """Remove a document from the master index that lists its scope"""
+        document_id = entry["document_id"]
+        
+        try:
+            if entry["scope"] == "college_event":
+                index_path = self._get_college_event_storage_path()['indexes'] / "college_events_index.pkl"
+                with scope_lock("college_events_index"):
+                    if index_path.exists():
+                        with open(index_path, 'rb') as f:
+                            events_index = pickle.load(f)
+                        events_index["events"] = [
+                            event for event in events_index.get("events", [])
+                            if event.get("document_id") != document_id
+                        ]
+                        for event_type, events in list(events_index.get("event_types", {}).items()):
+                            remaining = [event for event in events if event.get("document_id") != document_id]
+                            if remaining:
+                                events_index["event_types"][event_type] = remaining
+                            else:
+                                del events_index["event_types"][event_type]
+                        atomic_pickle_dump(events_index, index_path)
+            
+            elif entry["scope"] == "department_event":
+                department = entry["department"]
+                storage_paths = self._get_department_event_storage_path(department)
+                safe_department = department.replace(" ", "").replace("/", "_").replace("\\", "_")
+                index_file = storage_paths['indexes'] / f"{safe_department}_events_index.pkl"
+                with scope_lock(index_file.name):
+                    if index_file.exists():
+                        with open(index_file, 'rb') as f:
+                            index = pickle.load(f)
+                        index = [document for document in index if document.get("id") != document_id]
+                        atomic_pickle_dump(index, index_file)
+            
+            else:
+                index_path = self.base_storage_path / "document_index.pkl"
+                with scope_lock("document_index"):
+                    if index_path.exists():
+                        with open(index_path, 'rb') as f:
+                            doc_index = pickle.load(f)
+                        dept_data = doc_index["departments"].get(entry["department"])
+                        if dept_data:
+                            dept_data["general"] = [
+                                document for document in dept_data["general"]
+                                if document.get("document_id") != document_id
+                            ]
+                            for subject, documents in list(dept_data["subjects"].items()):
+                                dept_data["subjects"][subject] = [
+                                    document for document in documents
+                                    if document.get("document_id") != document_id
+                                ]
+                        atomic_pickle_dump(doc_index, index_path)
+                        
+        except Exception as e:
+            logger.error(f"Error removing document {document_id} from master index: {str(e)}")
+
     # Department Events Methods
     def _get_department_event_storage_path(self, department: str) -> Dict[str, Path]:
         """Get organized storage paths for department events"""
@@ -844,19 +1361,19 @@ Answer:"""
             safe_department = department.replace(" ", "").replace("/", "_").replace("\\", "_")
             index_file = storage_paths['indexes'] / f"{safe_department}_events_index.pkl"
             
-            # Load existing index or create new one
-            if index_file.exists():
-                with open(index_file, 'rb') as f:
-                    index = pickle.load(f)
-            else:
-                index = []
-            
-            # Add new document to index
-            index.append(document_metadata)
-            
-            # Save updated index
-            with open(index_file, 'wb') as f:
-                pickle.dump(index, f)
+            with scope_lock(index_file.name):
+                # Load existing index or create new one
+                if index_file.exists():
+                    with open(index_file, 'rb') as f:
+                        index = pickle.load(f)
+                else:
+                    index = []
+                
+                # Add new document to index
+                index.append(document_metadata)
+                
+                # Save updated index
+                atomic_pickle_dump(index, index_file)
                 
             logger.info(f"Updated department events index for {department} with document {document_metadata['id']}")
             
@@ -865,74 +1382,85 @@ Answer:"""
             raise
 
     def process_department_event_document(self, file_path: str, user_id: str, role: str,
-                                         title: str, event_type: str, department: str) -> Dict[str, Any]:
-        """Process a department event document and store it with vector embeddings"""
+                                         title: str, event_type: str, department: str, filename: str = None,
+                                         document_id: str = None, content_hash: str = None,
+                                         prepared: Tuple[List[str], np.ndarray, int] = None,
+                                         awaiting_events: bool = False) -> Dict[str, Any]:
+        """Process a department event document and store it with vector embeddings.
+        
+        prepared is an optional (chunks, embeddings, text length) already produced by the
+        ingestion pipeline; without it the document is extracted and embedded here. With
+        awaiting_events the document is catalogued as incomplete until its events are stored.
+        """
+        import faiss
+        
         try:
             logger.info(f"Processing department event document: {file_path} for department: {department}")
             
-            # Extract text from document
-            text = self.extract_text_from_document(file_path)
-            
-            if not text.strip():
-                raise ValueError("No text content found in the document")
+            # Generate unique document ID
+            document_id = document_id or str(uuid.uuid4())
+            filename = filename or Path(file_path).name
             
-            # Split text into chunks
-            chunks = self._split_text(text)
+            # Get department events storage paths
+            storage_paths = self._get_department_event_storage_path(department)
+            saved_file_path = storage_paths['uploads'] / f"{document_id}_{filename}"
             
-            if not chunks:
-                raise ValueError("No meaningful chunks could be created from the document")
+            # The same file uploaded again as this department's event returns the stored document
+            duplicate = self.find_duplicate(content_hash, storage_paths['vector_db'])
+            if duplicate:
+                existing = self._reuse_duplicate(duplicate, file_path, saved_file_path, title)
+                return {
+                    'success': True,
+                    'document_id': duplicate['document_id'],
+                    'chunks_count': existing.get('chunks_count', 0),
+                    'user_file_path': duplicate.get('file_path'),
+                    'duplicate': True,
+                    'message': f'Identical department event document already exists for {department}'
+                }
             
-            # Create embeddings
-            embeddings = self.create_embeddings(chunks)
+            # Chunks and embeddings (reused when the same file is stored in another scope)
+            chunks, embeddings, text_length = prepared or self._chunk_and_embed(file_path, content_hash)
             
             # Create FAISS index
             faiss_index = faiss.IndexFlatIP(embeddings.shape[1])
             faiss_index.add(embeddings.astype('float32'))
             
-            # Generate unique document ID
-            document_id = str(uuid.uuid4())
-            
-            # Get department events storage paths
-            storage_paths = self._get_department_event_storage_path(department)
-            
-            # Save the uploaded file to department events uploads folder
-            file_extension = Path(file_path).suffix
-            saved_file_path = storage_paths['uploads'] / f"{document_id}_{Path(file_path).stem}{file_extension}"
-            
-            import shutil
-            shutil.copy2(file_path, saved_file_path)
+            # Save the uploaded file to department events uploads folder (no-op when streamed there)
+            self._store_upload(file_path, saved_file_path)
             
             # Save chunks, embeddings, and metadata in vector_db folder
             chunks_file = storage_paths['vector_db'] / f"chunks_{document_id}.pkl"
-            with open(chunks_file, 'wb') as f:
-                pickle.dump(chunks, f)
+            atomic_pickle_dump(chunks, chunks_file)
             
             faiss_file = storage_paths['vector_db'] / f"faiss_index_{document_id}.pkl"
-            with open(faiss_file, 'wb') as f:
-                pickle.dump(faiss_index, f)
+            atomic_pickle_dump(faiss_index, faiss_file)
             
             # Create document metadata with correct file path
             cleaned_department = department.replace(' ', '').replace('/', '_').replace('\\', '_')
             document_metadata = {
                 'id': document_id,
                 'title': title,
-                'filename': Path(file_path).name,
+                'filename': filename,
                 'event_type': event_type,
                 'department': department,
                 'uploaded_by': user_id,
                 'uploader_role': role,
                 'upload_date': datetime.now().isoformat(),
-                'file_path': f"storage/uploads/department_events/{cleaned_department}/{document_id}_{Path(file_path).stem}{Path(file_path).suffix}",
+                'file_path': f"storage/uploads/department_events/{cleaned_department}/{document_id}_{filename}",
                 'chunks_count': len(chunks),
-                'file_size': os.path.getsize(file_path)
+                'text_length': text_length,
+                'file_size': os.path.getsize(saved_file_path),
+                'content_hash': content_hash
             }
             
             metadata_file = storage_paths['vector_db'] / f"metadata_{document_id}.pkl"
-            with open(metadata_file, 'wb') as f:
-                pickle.dump(document_metadata, f)
+            atomic_pickle_dump(document_metadata, metadata_file)
             
             # Update master index
             self._update_department_events_index(document_metadata, department)
+            self._register_document(document_id, "department_event", storage_paths['vector_db'], saved_file_path,
+                                    title=title, filename=document_metadata['filename'], department=department,
+                                    content_hash=content_hash, complete=not awaiting_events)
             
             logger.info(f"Successfully processed department event document {document_id} for {department}")
             
@@ -940,6 +1468,7 @@ Answer:"""
                 'success': True,
                 'document_id': document_id,
                 'chunks_count': len(chunks),
+                'user_file_path': str(saved_file_path),
                 'message': f'Department event document processed successfully for {department}'
             }
             
@@ -960,45 +1489,20 @@ Answer:"""
                 logger.info(f"No department events found for {department}")
                 return []
             
-            # Get all document files in the vector database folder
-            faiss_files = list(vector_db_path.glob("faiss_index_*.pkl"))
-            chunks_files = list(vector_db_path.glob("chunks_*.pkl"))
-            metadata_files = list(vector_db_path.glob("metadata_*.pkl"))
+            # Get all loaded documents in the vector database folder
+            scope_documents = self._load_scope_documents(vector_db_path)
             
-            if not faiss_files:
+            if not scope_documents:
                 logger.info(f"No indexed documents found for department {department}")
                 return []
             
-            # Create query embedding
-            query_embedding = self.create_embeddings([query])
+            # Query embedding, batched with concurrent chat queries
+            query_embedding = np.array([self.query_embedder.embed(query)])
             
             all_results = []
             
-            for faiss_file in faiss_files:
+            for document_id, (faiss_index, chunks, document_metadata) in scope_documents.items():
                 try:
-                    # Extract document ID from filename
-                    document_id = faiss_file.stem.replace("faiss_index_", "")
-                    
-                    # Load corresponding files
-                    chunks_file = vector_db_path / f"chunks_{document_id}.pkl"
-                    metadata_file = vector_db_path / f"metadata_{document_id}.pkl"
-                    
-                    if not chunks_file.exists() or not metadata_file.exists():
-                        logger.warning(f"Missing files for document {document_id} in department {department}")
-                        continue
-                    
-                    # Load FAISS index
-                    with open(faiss_file, 'rb') as f:
-                        faiss_index = pickle.load(f)
-                    
-                    # Load chunks
-                    with open(chunks_file, 'rb') as f:
-                        chunks = pickle.load(f)
-                    
-                    # Load metadata
-                    with open(metadata_file, 'rb') as f:
-                        document_metadata = pickle.load(f)
-                    
                     # Search in this document
                     scores, indices = faiss_index.search(query_embedding.astype('float32'), min(top_k, len(chunks)))
                     
@@ -1019,7 +1523,7 @@ Answer:"""
                             all_results.append(result)
                             
                 except Exception as e:
-                    logger.error(f"Error processing document {faiss_file} for department {department}: {str(e)}")
+                    logger.error(f"Error processing document {document_id} for department {department}: {str(e)}")
                     continue
             
             # Sort by score and return top results
@@ -1054,6 +1558,3 @@ Answer:"""
         except Exception as e:
             logger.error(f"Error listing department events for {department}: {str(e)}")
             return []
-
-# Create singleton instance
-vector_db = VectorDatabase()